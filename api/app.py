@@ -5,6 +5,8 @@ from routes.email_routes import email_bp
 from routes.health_routes import health_bp
 from routes.news_routes import news_bp
 from routes.travel_routes import travel_bp
+from utils.load_shedding import load_shedder
+from utils import request_context, deadline, timing, profiling
 
 def create_app():
     """
@@ -17,7 +19,19 @@ def create_app():
     app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
     
     # Configure CORS
-    CORS(app, expose_headers=['Content-Disposition'])
+    CORS(app, expose_headers=['Content-Disposition', request_context.REQUEST_ID_HEADER])
+    
+    # Give every request a unique ID and trace context (first, so every later hook and log line can use it)
+    request_context.init_app(app)
+    
+    # Time request phases (registered first so queueing in later hooks is included in the total)
+    timing.init_app(app)
+    
+    # Give every request an end-to-end deadline that provider calls derive their timeouts from
+    deadline.init_app(app)
+    
+    # Shed requests that would queue too long before they reach a route
+    load_shedder.init_app(app)
     
     # Register blueprints
     app.register_blueprint(health_bp, url_prefix='/api/health')
@@ -25,6 +39,9 @@ def create_app():
     app.register_blueprint(news_bp, url_prefix='/api/news')
     app.register_blueprint(travel_bp, url_prefix='/api/travel')
     
+    # Profile selected requests when PROFILING_ENABLED is set (wraps the views registered above)
+    profiling.init_app(app, request_context.get_request_id)
+    
     # Log registered routes
     logger.info("Registered API routes:")
     for rule in app.url_map.iter_rules():
@@ -0,0 +1 @@
+# Benchmarks package for offline performance measurements
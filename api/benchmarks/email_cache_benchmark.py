@@ -0,0 +1,150 @@
+"""
+Email cache micro-benchmark
+Measures lookup and store ops/sec of the near-duplicate email cache with a full index, and checks that each case
+gets the expected outcome: near-duplicates that differ in names, numbers or dates are served with those substituted,
+and anything else (a word that changes the meaning, a phrase the cached result doesn't quote) goes to the model.
+Exits with status 1 if a case is served a wrong result or misses a hit, so it can guard changes to utils/email_cache.py.
+
+Usage:
+    python api/benchmarks/email_cache_benchmark.py [--iterations 300] [--entries 256]
+"""
+
+import argparse
+import logging
+import os
+import sys
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import measure, print_table
+
+_INVOICE = ("Hi {name},\n\nCould you confirm when the invoice from last week will be paid? It was for order "
+            "#{order}, due on {date}.\n\nThanks,\nAlex")
+_INVOICE_RESULT = {
+    "enhanced_email": ("Dear {name},\n\nCould you please confirm when the invoice from last week will be paid? "
+                       "It covers order #{order} and was due on {date}.\n\nBest regards,\nAlex"),
+    "subject": "Payment status of order #{order}"
+}
+_REVIEW = ("Hi {name},\n\nI {can} attend the budget review on {date}. The budget was {approved} by Finance.\n\n"
+           "Thanks,\nAlex")
+_REVIEW_RESULT = {
+    "enhanced_email": ("Dear {name},\n\nI {can} attend the budget review on {date}. Finance has {approved} the "
+                       "budget.\n\nBest regards,\nAlex"),
+    "subject": "Budget review on {date}"
+}
+
+def _fill(template: Any, **values: str) -> Any:
+    if isinstance(template, dict):
+        return {key: value.format(**values) for key, value in template.items()}
+    return template.format(**values)
+
+def _cases() -> Dict[str, Tuple[str, Dict[str, Any], str, Optional[Dict[str, Any]]]]:
+    """
+    Build the cases as (cached email, cached result, new email, expected result or None for a miss)
+    """
+    invoice = dict(name="Priya", order="1042", date="March 3")
+    review = dict(name="Priya", can="can", date="March 3", approved="approved")
+    # The date is only reflected in the result ("next Monday"), so it can't be substituted
+    paraphrased = {"enhanced_email": "Dear Priya,\n\nI will attend the budget review next Monday.",
+                   "subject": "Budget review"}
+    return {
+        "exact repeat": (_fill(_INVOICE, **invoice), _fill(_INVOICE_RESULT, **invoice),
+                         _fill(_INVOICE, **invoice), _fill(_INVOICE_RESULT, **invoice)),
+        "name, number, date": (_fill(_INVOICE, **invoice), _fill(_INVOICE_RESULT, **invoice),
+                               _fill(_INVOICE, name="Sam", order="2201", date="April 9"),
+                               _fill(_INVOICE_RESULT, name="Sam", order="2201", date="April 9")),
+        # "will be paid" must survive replacing the name
+        "name that is a word": (_fill(_INVOICE, **dict(invoice, name="Will")),
+                                _fill(_INVOICE_RESULT, **dict(invoice, name="Will")),
+                                _fill(_INVOICE, **dict(invoice, name="Sam")),
+                                _fill(_INVOICE_RESULT, **dict(invoice, name="Sam"))),
+        "can/cannot": (_fill(_REVIEW, **review), _fill(_REVIEW_RESULT, **review),
+                       _fill(_REVIEW, **dict(review, can="cannot")), None),
+        "approved/rejected": (_fill(_REVIEW, **review), _fill(_REVIEW_RESULT, **review),
+                              _fill(_REVIEW, **dict(review, approved="rejected")), None),
+        "phrase not quoted": (_fill(_REVIEW, **review), paraphrased,
+                              _fill(_REVIEW, **dict(review, date="April 9")), None)
+    }
+
+def _outcome(result: Optional[Dict[str, Any]], expected: Optional[Dict[str, Any]]) -> str:
+    """
+    Classify a lookup against the case's expected result
+    """
+    if expected is None:
+        return "rejected" if result is None else "wrong"
+    if result is None:
+        return "missed"
+    return "ok" if result == expected else "wrong"
+
+def _index_outcomes() -> List[Tuple[str, str]]:
+    """
+    Check that expired entries never hide live ones, with each available index backend
+    """
+    from utils.email_cache import _SimilarityIndex, _ngram_counts
+
+    email = _fill(_INVOICE, name="Priya", order="1042", date="March 3")
+    live = _fill(_INVOICE, name="Sam", order="2201", date="April 9")
+    index = _SimilarityIndex(16)
+    # More expired exact copies than any shortlist would look at, ahead of the one live near-duplicate
+    for _ in range(8):
+        index.add(email, _ngram_counts(email), {}, -1)
+    index.add(live, _ngram_counts(live), {"live": True}, 60)
+
+    backends = [("python", None)] if index.matrix is None else [("numpy", index.matrix), ("python", None)]
+    outcomes = []
+    for name, matrix in backends:
+        index.matrix = matrix
+        entry, _ = index.nearest(_ngram_counts(email))
+        outcomes.append((f"expired entries ({name})", "ok" if entry is not None and entry["result"] else "missed"))
+    return outcomes
+
+def _filler(i: int) -> str:
+    return f"Hello team,\n\nNotes for sprint {i}: ticket {i * 7} moved to QA, demo on day {i % 28 + 1}.\n\nBest,\nLee"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark and check the near-duplicate email cache")
+    parser.add_argument('--iterations', type=int, default=300, help="Timed iterations per case")
+    parser.add_argument('--entries', type=int, default=256, help="Emails indexed before timing lookups")
+    args = parser.parse_args()
+
+    # Keep the per-lookup hit and miss logging out of the measurements
+    logging.disable(logging.CRITICAL)
+    from utils.email_cache import EmailSimilarityCache, numpy
+
+    outcomes = []
+    for case, (cached, result, email, expected) in _cases().items():
+        cache = EmailSimilarityCache(True, 0.8, args.entries, 3600, True)
+        cache.store("bench", cached, result)
+        outcomes.append((case, _outcome(cache.lookup("bench", email, "bench"), expected)))
+    outcomes.extend(_index_outcomes())
+
+    cache = EmailSimilarityCache(True, 0.8, args.entries, 3600, True)
+    for i in range(args.entries - 1):
+        cache.store("bench", _filler(i), {"enhanced_email": _filler(i), "subject": f"Sprint {i}"})
+    cached, result, email, _ = _cases()["name, number, date"]
+    cache.store("bench", cached, result)
+    backend = "numpy" if numpy is not None else "python"
+    rows = [
+        {"case": f"lookup hit ({args.entries} entries)", "variant": backend,
+         **measure(lambda: cache.lookup("bench", email, "bench"), args.iterations, warmup=min(20, args.iterations))},
+        {"case": f"lookup miss ({args.entries} entries)", "variant": backend,
+         **measure(lambda: cache.lookup("bench", "Unrelated note about lunch.", "bench"), args.iterations,
+                   warmup=min(20, args.iterations))},
+        {"case": f"store ({args.entries} entries)", "variant": backend,
+         **measure(lambda: cache.store("bench", email, result), args.iterations, warmup=min(20, args.iterations))}
+    ]
+    print_table("Email cache", rows)
+
+    width = max(len(case) for case, _ in outcomes)
+    print("\nResult (ok = expected result, rejected = correctly a miss, missed = a miss instead of a hit, "
+          "wrong = a wrong result served)")
+    for case, outcome in outcomes:
+        print(f"{case:<{width}} {outcome:>10}")
+    counts = Counter(outcome for _, outcome in outcomes)
+    if counts["wrong"] or counts["missed"]:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
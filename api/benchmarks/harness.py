@@ -0,0 +1,67 @@
+"""
+Shared micro-benchmark helpers
+Small timing utilities used by the benchmark scripts so every script reports numbers the same way.
+"""
+
+import math
+import time
+from typing import Any, Callable, Dict, List
+
+def measure(fn: Callable[[], Any], iterations: int = 1000, warmup: int = 50) -> Dict[str, float]:
+    """
+    Time repeated calls of a zero-argument function
+
+    Args:
+        fn: Function to benchmark
+        iterations: Number of timed calls
+        warmup: Number of untimed calls made first
+
+    Returns:
+        Dictionary with ops_per_sec, mean_us and worst_us
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples: List[float] = []
+    perf_counter = time.perf_counter
+    for _ in range(iterations):
+        started = perf_counter()
+        fn()
+        samples.append(perf_counter() - started)
+
+    total = sum(samples)
+    return {
+        "ops_per_sec": iterations / total if total else float('inf'),
+        "mean_us": total / iterations * 1e6,
+        "worst_us": max(samples) * 1e6
+    }
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of already sorted samples (0.0 for no samples)
+
+    Args:
+        sorted_samples: Samples in ascending order
+        pct: Percentile between 0 and 100
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+def print_table(title: str, rows: List[Dict[str, Any]]) -> None:
+    """
+    Print benchmark rows as an aligned text table
+
+    Args:
+        title: Heading printed above the table
+        rows: Dictionaries with case, variant and the keys returned by measure()
+    """
+    width = max([24] + [len(row['case']) for row in rows])
+    print(f"\n{title}")
+    print(f"{'case':<{width}} {'variant':<22} {'ops/sec':>12} {'mean (us)':>12} {'worst (us)':>12}")
+    for row in rows:
+        print(
+            f"{row['case']:<{width}} {row['variant']:<22} {row['ops_per_sec']:>12,.0f} "
+            f"{row['mean_us']:>12.1f} {row['worst_us']:>12.1f}"
+        )
@@ -0,0 +1,69 @@
+"""
+JSON backend micro-benchmark
+Compares Flask jsonify against the pluggable JSON backend for response serialization, and stdlib json
+against orjson for parsing model output, over representative payloads.
+
+Usage:
+    python api/benchmarks/json_benchmark.py [--iterations 2000]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import measure, print_table
+from benchmarks.payloads import representative_payloads
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark JSON serialization and parsing")
+    parser.add_argument('--iterations', type=int, default=2000, help="Timed iterations per case")
+    args = parser.parse_args()
+
+    from flask import Flask, jsonify
+    from utils import json_backend
+    from utils.response_utils import safe_json_parse
+
+    # Keep per-call parse logging out of the measurements
+    logging.getLogger().setLevel(logging.WARNING)
+
+    app = Flask(__name__)
+    payloads = representative_payloads()
+
+    serialize_rows = []
+    parse_rows = []
+
+    with app.app_context():
+        for name, payload in payloads.items():
+            text = json.dumps(payload)
+            fenced = f"```json\n{text}\n```"
+            size_kb = len(text) / 1024
+            case = f"{name} ({size_kb:.1f}KB)"
+
+            serialize_rows.append({"case": case, "variant": "flask.jsonify",
+                                   **measure(lambda: jsonify(payload), args.iterations)})
+            serialize_rows.append({"case": case, "variant": "stdlib json.dumps",
+                                   **measure(lambda: json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), args.iterations)})
+            if json_backend.orjson is not None:
+                serialize_rows.append({"case": case, "variant": "orjson.dumps",
+                                       **measure(lambda: json_backend.orjson.dumps(payload), args.iterations)})
+
+            parse_rows.append({"case": case, "variant": "stdlib json.loads",
+                               **measure(lambda: json.loads(text), args.iterations)})
+            if json_backend.orjson is not None:
+                parse_rows.append({"case": case, "variant": "orjson.loads",
+                                   **measure(lambda: json_backend.orjson.loads(text), args.iterations)})
+            parse_rows.append({"case": case, "variant": "safe_json_parse",
+                               **measure(lambda: safe_json_parse(text, "bench", "bench"), args.iterations)})
+            parse_rows.append({"case": case, "variant": "safe_json_parse fenced",
+                               **measure(lambda: safe_json_parse(fenced, "bench", "bench"), args.iterations)})
+
+    print(f"Active JSON backend: {json_backend.BACKEND_NAME}")
+    print_table("Serialization", serialize_rows)
+    print_table("Parsing", parse_rows)
+
+if __name__ == '__main__':
+    main()
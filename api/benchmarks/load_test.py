@@ -0,0 +1,296 @@
+"""
+End-to-end load test
+Drives the API routes at a configurable concurrency and reports throughput (RPS), p50/p95/p99 latency, error rate
+and peak RSS per scenario. By default the app runs in this process on a threaded HTTP server, backed by the local
+mock provider (benchmarks/mock_provider.py), so runs need no network access or API keys. Results are written as
+JSON, and a previous results file can be passed to print the change between runs (e.g. between commits).
+
+Usage:
+    python api/benchmarks/load_test.py [--scenarios email,travel,news,health_models] [--concurrency 16]
+        [--requests 200] [--latency-ms 300] [--output results.json] [--compare previous.json]
+    python api/benchmarks/load_test.py --target http://localhost:5000   # an already running API
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import percentile
+from benchmarks.mock_provider import MockSettings, start_in_background
+
+_EMAIL_TEMPLATES = [
+    "Hi {name}, just wanted to follow up on the invoice from last week. Can you let me know when it will be paid? Thanks",
+    "Hey team, the meeting on {day} is moved to 3pm. Pls bring the quarterly numbers and the draft roadmap.",
+    "Dear {name}, I am writing to ask about the status of my application submitted on {day}. Looking forward to hearing back."
+]
+_NAMES = ['Priya', 'Alex', 'Sam', 'Jordan', 'Maria', 'Chen']
+_DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+_DESTINATIONS = ['Lisbon', 'Kyoto', 'Cape Town', 'Goa', 'Reykjavik']
+_CATEGORIES = [['Technology'], ['Business', 'Sports'], ['Health', 'Science'], ['Entertainment']]
+
+def _email_request(i: int, model: str) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+    template = _EMAIL_TEMPLATES[i % len(_EMAIL_TEMPLATES)]
+    content = template.format(name=_NAMES[i % len(_NAMES)], day=_DAYS[i % len(_DAYS)])
+    # A unique suffix keeps exact-match response caches from short-circuiting the run; near-duplicate templates
+    # would still hit the email cache, which the local app runs with disabled (see _start_local_app)
+    return 'POST', '/api/email/enhance', {"email_content": f"{content} (ref {i})", "model": model}
+
+def _travel_request(i: int, model: str) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+    return 'POST', '/api/travel/generate', {
+        "destination": _DESTINATIONS[i % len(_DESTINATIONS)],
+        "budget": 1500 + (i % 10) * 100,
+        "start_date": "2026-05-01",
+        "end_date": f"2026-05-0{2 + i % 6}",
+        "travelers": 1 + i % 4,
+        "preferences": ["food", "culture"],
+        "model": model
+    }
+
+def _news_request(i: int, model: str) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+    return 'POST', '/api/news/fetch', {"categories": _CATEGORIES[i % len(_CATEGORIES)], "model": model}
+
+def _health_models_request(i: int, model: str) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+    return 'GET', '/api/health/models', None
+
+# Scenario name -> function building the i-th request as (method, path, JSON body)
+SCENARIOS: Dict[str, Callable[[int, str], Tuple[str, str, Optional[Dict[str, Any]]]]] = {
+    "email": _email_request,
+    "travel": _travel_request,
+    "news": _news_request,
+    "health_models": _health_models_request
+}
+
+def _current_rss_mb() -> Optional[float]:
+    """
+    Current resident set size of this process in MB (Linux only)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+class RssSampler:
+    """
+    Samples this process's RSS on a background thread and keeps the peak
+    Falls back to the lifetime peak from getrusage where /proc is not available
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            rss = _current_rss_mb()
+            if rss is not None:
+                self.peak_mb = max(self.peak_mb, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> 'RssSampler':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        if not self.peak_mb:
+            import resource
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss is in KB on Linux and bytes on macOS
+            self.peak_mb = max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+def run_scenario(session_factory: Callable[[], Any], base_url: str, name: str, model: str,
+                 concurrency: int, total_requests: int, timeout: float) -> Dict[str, Any]:
+    """
+    Send total_requests requests of a scenario from concurrency worker threads
+
+    Returns:
+        Dictionary with request counts, status counts, rps, latency percentiles (ms), error_rate and peak_rss_mb
+    """
+    build_request = SCENARIOS[name]
+    counter = itertools.count()
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def worker() -> None:
+        session = session_factory()
+        while True:
+            i = next(counter)
+            if i >= total_requests:
+                return
+            method, path, body = build_request(i, model)
+            started = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, json=body, timeout=timeout)
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(worker) for _ in range(concurrency)]:
+                future.result()
+        duration = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not status.startswith(('2', '3')))
+    return {
+        "scenario": name,
+        "model": model if name != "health_models" else None,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "duration_s": round(duration, 3),
+        "rps": round(len(latencies) / duration, 2) if duration else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "p99": round(percentile(latencies, 99) * 1000, 1),
+            "max": round(latencies[-1] * 1000, 1) if latencies else 0.0
+        },
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+        "statuses": statuses,
+        "peak_rss_mb": round(rss.peak_mb, 1)
+    }
+
+def _start_local_app(mock_settings: MockSettings) -> str:
+    """
+    Start the mock provider and the API (in this process, on a threaded server) pointed at it
+
+    Returns:
+        Base URL of the API
+    """
+    _, provider_url = start_in_background(mock_settings)
+    # Provider settings are read when config is first imported, so they must be set before importing the app
+    os.environ.setdefault('DEEPSEEK_API_KEY', 'mock-key')
+    os.environ.setdefault('GEMINI_API_KEY', 'mock-key')
+    os.environ['DEEPSEEK_BASE_URL'] = provider_url
+    os.environ['GEMINI_BASE_URL'] = provider_url
+    os.environ['OLLAMA_HOSTS'] = provider_url
+    os.environ['IPLOCATION_BASE_URL'] = provider_url
+    # Measure the model path: templated emails would otherwise be served by the near-duplicate email cache, and
+    # repeated news combinations by their stored editions
+    os.environ['EMAIL_CACHE_ENABLED'] = 'false'
+    os.environ['NEWS_EDITIONS_ENABLED'] = 'false'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('LOG_FILE', '')
+
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    # Per-request access lines would slow the server down and bury the report
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    server = make_server('127.0.0.1', 0, create_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, name="load-test-api", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              timeout=5, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def print_results(results: List[Dict[str, Any]], previous: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Print scenario results as an aligned text table, with the RPS and p95 change against a previous run if given
+    """
+    baseline = {(row["scenario"], row["model"]): row for row in (previous or {}).get("scenarios", [])}
+    print(f"\n{'scenario':<15} {'model':<14} {'conc':>5} {'reqs':>6} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'errors':>8} {'rss MB':>8}")
+    for row in results:
+        latency = row["latency_ms"]
+        line = (
+            f"{row['scenario']:<15} {row['model'] or '-':<14} {row['concurrency']:>5} {row['requests']:>6} "
+            f"{row['rps']:>9.1f} {latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f} "
+            f"{row['error_rate']:>8.1%} {row['peak_rss_mb']:>8.1f}"
+        )
+        before = baseline.get((row["scenario"], row["model"]))
+        if before and before["rps"] and before["latency_ms"]["p95"]:
+            rps_change = row["rps"] / before["rps"] - 1
+            p95_change = latency["p95"] / before["latency_ms"]["p95"] - 1
+            line += f"   rps {rps_change:+.1%}, p95 {p95_change:+.1%} vs {previous.get('commit') or 'previous'}"
+        print(line)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the API routes")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument('--model', default='deepseek-api', help="Model requested by the tool scenarios")
+    parser.add_argument('--concurrency', type=int, default=16, help="Concurrent clients per scenario")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per scenario")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Client timeout per request in seconds")
+    parser.add_argument('--target', help="Base URL of a running API (default: start the app against the mock provider)")
+    parser.add_argument('--latency', choices=['fixed', 'uniform', 'lognormal'], default='lognormal', help="Mock provider latency distribution")
+    parser.add_argument('--latency-ms', type=float, default=300.0, help="Mock provider first-token latency")
+    parser.add_argument('--tokens-per-sec', type=float, default=0.0, help="Mock provider output token rate")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Mock provider 500 rate")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Mock provider 429 rate")
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help="Mock provider truncated output rate")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--compare', help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    import requests
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+
+    mock_settings = MockSettings(
+        latency=args.latency, latency_ms=args.latency_ms, tokens_per_sec=args.tokens_per_sec,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, truncate_rate=args.truncate_rate,
+        seed=args.seed
+    )
+    base_url = args.target.rstrip('/') if args.target else _start_local_app(mock_settings)
+
+    results = []
+    for name in scenarios:
+        print(f"Running {name} ({args.requests} requests, concurrency {args.concurrency})...")
+        results.append(run_scenario(requests.Session, base_url, name, args.model, args.concurrency,
+                                    args.requests, args.timeout))
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "target": args.target or "local app + mock provider",
+        "mock_provider": None if args.target else vars(mock_settings),
+        "scenarios": results
+    }
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+    print_results(results, previous)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == '__main__':
+    main()
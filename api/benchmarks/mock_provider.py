@@ -0,0 +1,366 @@
+"""
+Local mock LLM provider server
+A stand-in for the AI providers so the request path can be benchmarked offline and reproducibly. One server speaks:
+  - the OpenAI chat completions API (POST /chat/completions), used by the DeepSeek client
+  - the Gemini generateContent REST API (POST /v1beta/models/<model>:generateContent)
+  - the Ollama API (GET /api/tags, POST /api/generate, POST /api/chat)
+  - the ip-api.com geolocation API (GET /json/<ip>), used to pick the news region
+
+Responses are schema-valid JSON bodies for the requested operation (email, itinerary or news, detected from the
+prompt) built from benchmarks/payloads.py. Latency, token rate, server errors, 429s and truncated outputs are
+injected with a seeded random generator, so a run with the same settings and request order is repeatable.
+
+Point the API at it with:
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8090 GEMINI_BASE_URL=http://127.0.0.1:8090 OLLAMA_HOSTS=http://127.0.0.1:8090 \
+    IPLOCATION_BASE_URL=http://127.0.0.1:8090
+
+Usage:
+    python api/benchmarks/mock_provider.py [--port 8090] [--latency lognormal] [--latency-ms 800]
+        [--tokens-per-sec 80] [--error-rate 0.01] [--rate-limit-rate 0.02] [--truncate-rate 0.01]
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.payloads import email_response, itinerary_response, news_response
+
+# Rough characters per token, used for usage counts and token-rate delays
+CHARS_PER_TOKEN = 4
+
+# Country returned by the mock geolocation endpoint
+MOCK_COUNTRY = "India"
+
+# Models listed by the mock Ollama /api/tags endpoint
+OLLAMA_MODELS = ['llama3:8b', 'deepseek-r1:7b']
+
+_GEMINI_PATH = re.compile(r'^/[^/]+/models/([^/:]+):generateContent$')
+_ARTICLE_COUNT = re.compile(r'Generate (\d+) realistic news articles')
+_ITINERARY_DAY = re.compile(r'Day \d+ = ')
+
+class MockSettings:
+    """
+    Fault and latency injection settings of the mock server
+    """
+
+    def __init__(self, latency: str = 'fixed', latency_ms: float = 0.0, latency_sigma: float = 0.5,
+                 tokens_per_sec: float = 0.0, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 retry_after: float = 1.0, truncate_rate: float = 0.0, seed: int = 0):
+        """
+        Args:
+            latency: Time-to-first-token distribution: "fixed", "uniform" (0 to 2x latency_ms) or "lognormal"
+                (median latency_ms)
+            latency_ms: Fixed, mean or median time to first token in milliseconds
+            latency_sigma: Shape of the lognormal distribution
+            tokens_per_sec: Output token rate added on top of the first-token latency (0 returns instantly)
+            error_rate: Share of calls answered with a 500 error
+            rate_limit_rate: Share of calls answered with a 429 and a Retry-After of retry_after seconds
+            retry_after: Retry-After returned with injected 429s
+            truncate_rate: Share of calls whose output is cut off mid-body, as if the token limit was hit
+            seed: Random seed for the injected faults and latencies
+        """
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_sec = tokens_per_sec
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.truncate_rate = truncate_rate
+        self.seed = seed
+
+class MockProvider:
+    """
+    Decides each mock call's outcome and builds its output
+    """
+
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self._random = random.Random(settings.seed)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.calls: Dict[str, int] = {}
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def outcome(self, api: str) -> Tuple[str, float]:
+        """
+        Pick the outcome of a call ("ok", "error", "rate_limited" or "truncated") and its first-token latency
+        """
+        settings = self.settings
+        with self._lock:
+            self.calls[api] = self.calls.get(api, 0) + 1
+            roll = self._random.random()
+            if settings.latency == 'uniform':
+                latency = self._random.uniform(0, 2 * settings.latency_ms)
+            elif settings.latency == 'lognormal' and settings.latency_ms > 0:
+                latency = self._random.lognormvariate(math.log(settings.latency_ms), settings.latency_sigma)
+            else:
+                latency = settings.latency_ms
+
+        if roll < settings.rate_limit_rate:
+            return "rate_limited", latency
+        roll -= settings.rate_limit_rate
+        if roll < settings.error_rate:
+            return "error", latency
+        roll -= settings.error_rate
+        if roll < settings.truncate_rate:
+            return "truncated", latency
+        return "ok", latency
+
+    def generate(self, prompt: str, outcome: str, first_token_ms: float) -> Tuple[str, int, int]:
+        """
+        Build the output text for a prompt and wait as long as the configured latency and token rate say
+
+        Returns:
+            (text, prompt_tokens, completion_tokens)
+        """
+        text = json.dumps(canned_body(prompt))
+        if outcome == "truncated":
+            text = text[:len(text) // 2]
+        completion_tokens = max(1, len(text) // CHARS_PER_TOKEN)
+        delay = first_token_ms / 1000
+        if self.settings.tokens_per_sec > 0:
+            delay += completion_tokens / self.settings.tokens_per_sec
+        if delay > 0:
+            time.sleep(delay)
+        return text, max(1, len(prompt) // CHARS_PER_TOKEN), completion_tokens
+
+def canned_body(prompt: str) -> Dict[str, Any]:
+    """
+    Build a schema-valid response body for the operation the prompt asks for
+    """
+    if 'travel planner' in prompt or 'itinerary' in prompt:
+        days = len(_ITINERARY_DAY.findall(prompt)) or 3
+        return itinerary_response(days)
+    if 'news' in prompt:
+        match = _ARTICLE_COUNT.search(prompt)
+        return news_response(int(match.group(1)) if match else 5)
+    return email_response()
+
+def _gemini_prompt(body: Dict[str, Any]) -> str:
+    parts = []
+    system = body.get('systemInstruction') or body.get('system_instruction') or {}
+    for content in [system] + list(body.get('contents') or []):
+        for part in (content or {}).get('parts') or []:
+            parts.append(part.get('text') or '')
+    return "\n".join(parts)
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler serving the OpenAI, Gemini and Ollama routes
+    """
+
+    provider: MockProvider = None  # set by create_server
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Per-call access logs would dominate the benchmark output
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def do_GET(self) -> None:
+        if self.path == '/api/tags':
+            self._send_json(200, {"models": [{"name": name, "model": name} for name in OLLAMA_MODELS]})
+        elif self.path.startswith('/json/'):
+            self._send_json(200, {"status": "success", "country": MOCK_COUNTRY, "query": self.path[len('/json/'):]})
+        elif self.path == '/':
+            self._send_json(200, {"status": "mock provider running"})
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self) -> None:
+        path = self.path.split('?')[0]
+        body = self._read_json()
+        if path in ('/chat/completions', '/v1/chat/completions'):
+            self._openai_chat(body)
+            return
+        match = _GEMINI_PATH.match(path)
+        if match:
+            self._gemini_generate(match.group(1), body)
+        elif path == '/api/chat':
+            prompt = "\n".join(message.get('content') or '' for message in body.get('messages') or [])
+            self._ollama(body, prompt, chat=True)
+        elif path == '/api/generate':
+            self._ollama(body, body.get('prompt') or '', chat=False)
+        else:
+            self._send_json(404, {"error": f"unknown path {path}"})
+
+    def _openai_chat(self, body: Dict[str, Any]) -> None:
+        provider = self.provider
+        outcome, latency = provider.outcome('openai')
+        request_id = f"mock-req-{provider.next_id()}"
+        if outcome == "rate_limited":
+            self._send_json(429, {"error": {"message": "Rate limit reached for requests", "type": "rate_limit_error",
+                                            "code": "rate_limit_exceeded"}},
+                            {"Retry-After": f"{provider.settings.retry_after:g}", "x-request-id": request_id})
+            return
+        if outcome == "error":
+            self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error"}},
+                            {"x-request-id": request_id})
+            return
+
+        prompt = "\n".join(message.get('content') or '' for message in body.get('messages') or [])
+        text, prompt_tokens, completion_tokens = provider.generate(prompt, outcome, latency)
+        self._send_json(200, {
+            "id": f"chatcmpl-{request_id}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get('model', 'mock'),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "length" if outcome == "truncated" else "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }, {"x-request-id": request_id})
+
+    def _gemini_generate(self, model: str, body: Dict[str, Any]) -> None:
+        provider = self.provider
+        outcome, latency = provider.outcome('gemini')
+        if outcome == "rate_limited":
+            self._send_json(429, {"error": {
+                "code": 429,
+                "message": "Resource has been exhausted (e.g. check quota).",
+                "status": "RESOURCE_EXHAUSTED",
+                "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo",
+                             "retryDelay": f"{provider.settings.retry_after:g}s"}]
+            }})
+            return
+        if outcome == "error":
+            self._send_json(500, {"error": {"code": 500, "message": "Injected server error", "status": "INTERNAL"}})
+            return
+
+        text, prompt_tokens, completion_tokens = provider.generate(_gemini_prompt(body), outcome, latency)
+        self._send_json(200, {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": text}]},
+                "finishReason": "MAX_TOKENS" if outcome == "truncated" else "STOP",
+                "index": 0
+            }],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": completion_tokens,
+                "totalTokenCount": prompt_tokens + completion_tokens
+            },
+            "modelVersion": model,
+            "responseId": f"mock-resp-{provider.next_id()}"
+        })
+
+    def _ollama(self, body: Dict[str, Any], prompt: str, chat: bool) -> None:
+        provider = self.provider
+        model = body.get('model', OLLAMA_MODELS[0])
+        created_at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        if not chat and not prompt:
+            # A generate request without a prompt only loads the model
+            self._send_json(200, {"model": model, "created_at": created_at, "response": "", "done": True,
+                                  "done_reason": "load"})
+            return
+
+        # Ollama has no rate limits; injected 429s are treated as server errors
+        outcome, latency = provider.outcome('ollama')
+        if outcome in ("error", "rate_limited"):
+            self._send_json(500, {"error": "Injected server error"})
+            return
+
+        started = time.monotonic()
+        text, prompt_tokens, completion_tokens = provider.generate(prompt, outcome, latency)
+        duration_ns = int((time.monotonic() - started) * 1e9)
+        result = {
+            "model": model,
+            "created_at": created_at,
+            "done": True,
+            "done_reason": "length" if outcome == "truncated" else "stop",
+            "total_duration": duration_ns,
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": completion_tokens,
+            "eval_duration": duration_ns
+        }
+        if chat:
+            result["message"] = {"role": "assistant", "content": text}
+        else:
+            result["response"] = text
+        self._send_json(200, result)
+
+def create_server(settings: MockSettings, host: str = '127.0.0.1', port: int = 8090) -> ThreadingHTTPServer:
+    """
+    Create a mock provider server (port 0 picks a free port, see server.server_address)
+    """
+    handler = type('BoundMockProviderHandler', (MockProviderHandler,), {'provider': MockProvider(settings)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def start_in_background(settings: MockSettings, host: str = '127.0.0.1', port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start a mock provider server on a daemon thread
+
+    Returns:
+        (server, base_url) - call server.shutdown() to stop it
+    """
+    server = create_server(settings, host, port)
+    threading.Thread(target=server.serve_forever, name="mock-provider", daemon=True).start()
+    return server, f"http://{server.server_address[0]}:{server.server_address[1]}"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local mock LLM provider server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', choices=['fixed', 'uniform', 'lognormal'], default='fixed', help="First-token latency distribution")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Fixed, mean or median first-token latency")
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help="Lognormal shape")
+    parser.add_argument('--tokens-per-sec', type=float, default=0.0, help="Output token rate (0 = instant)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of calls failing with 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Share of calls failing with 429")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Retry-After of injected 429s in seconds")
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help="Share of outputs cut off mid-body")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        latency=args.latency, latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+        tokens_per_sec=args.tokens_per_sec, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after, truncate_rate=args.truncate_rate, seed=args.seed
+    )
+    server = create_server(settings, args.host, args.port)
+    print(f"Mock provider listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Parser micro-benchmark
+Measures ops/sec and worst-case time of the response parsing strategies over the parser corpus, and reports which
+strategies return the right object for each case, to guide and guard optimizations of the parsing layer.
+
+Strategies:
+  - safe_json_parse: the production parser (direct parse, then clean and parse)
+  - clean_ai_response: the production cleaner alone (fence stripping plus the greedy \\{.*\\} search)
+  - find/rfind slice: first "{" to last "}" by string search, then json.loads
+  - raw_decode: decode the first complete JSON value starting at the first "{"
+
+Usage:
+    python api/benchmarks/parser_benchmark.py [--iterations 300] [--archive recordings.jsonl.gz]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Any, Callable, Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import measure, print_table
+from benchmarks.parser_corpus import parser_corpus, archive_outputs, UNKNOWN
+
+_decoder = json.JSONDecoder()
+
+def _slice_parse(text: str) -> Optional[Any]:
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end < start:
+        return None
+    try:
+        return json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+
+def _raw_decode_parse(text: str) -> Optional[Any]:
+    start = text.find('{')
+    while start >= 0:
+        try:
+            return _decoder.raw_decode(text, start)[0]
+        except ValueError:
+            start = text.find('{', start + 1)
+    return None
+
+def _outcome(result: Optional[Any], expected: Any) -> str:
+    """
+    Classify a strategy's result against the case's expected object
+    """
+    if expected is UNKNOWN:
+        return "object" if isinstance(result, dict) else "failed"
+    if expected is None:
+        return "rejected" if result is None else "wrong"
+    if result is None:
+        return "failed"
+    return "ok" if result == expected else "wrong"
+
+def _strategies() -> Dict[str, Callable[[str], Optional[Any]]]:
+    from utils.response_utils import safe_json_parse, clean_ai_response
+
+    def _cleaner(text: str) -> Optional[Any]:
+        try:
+            return json.loads(clean_ai_response(text))
+        except ValueError:
+            return None
+
+    return {
+        "safe_json_parse": lambda text: safe_json_parse(text, "bench", "bench")[0],
+        "clean_ai_response": _cleaner,
+        "find/rfind slice": _slice_parse,
+        "raw_decode": _raw_decode_parse
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark response parsing strategies")
+    parser.add_argument('--iterations', type=int, default=300, help="Timed iterations per case and strategy")
+    parser.add_argument('--archive', help="Also benchmark raw responses from a provider record/replay archive")
+    parser.add_argument('--archive-limit', type=int, default=20, help="Maximum archive responses to include")
+    args = parser.parse_args()
+
+    # Keep per-call parse logging (including the error logs of failing cases) out of the measurements
+    logging.disable(logging.CRITICAL)
+
+    corpus = parser_corpus()
+    if args.archive:
+        corpus.update(archive_outputs(args.archive, args.archive_limit))
+    strategies = _strategies()
+
+    rows = []
+    outcomes = {}
+    for case, (text, expected) in corpus.items():
+        label = f"{case} ({len(text) / 1024:.1f}KB)"
+        for name, strategy in strategies.items():
+            outcomes[(label, name)] = _outcome(strategy(text), expected)
+            rows.append({"case": label, "variant": name,
+                         **measure(lambda: strategy(text), args.iterations, warmup=min(20, args.iterations))})
+
+    print_table("Response parsing", rows)
+
+    width = max(len(row["case"]) for row in rows)
+    print("\nResult (ok = expected object, wrong = a different object, failed = no object, rejected = correctly none)")
+    print(f"{'case':<{width}} " + " ".join(f"{name:>18}" for name in strategies))
+    for case in dict.fromkeys(row["case"] for row in rows):
+        print(f"{case:<{width}} " + " ".join(f"{outcomes[(case, name)]:>18}" for name in strategies))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Parser benchmark corpus
+This module builds model outputs in the shapes safe_json_parse and clean_ai_response see in practice (clean JSON,
+markdown fences, prose around the JSON, reasoning blocks, truncation, several objects, very large bodies) plus
+pathological inputs, and can add raw responses from a provider record/replay archive.
+"""
+
+import json
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from benchmarks.payloads import email_response, itinerary_response, news_response
+
+def _extract_text(entry: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the model output text from a record/replay archive entry (see utils/provider_replay.py)
+    """
+    response = entry.get("response") or {}
+    try:
+        if entry["provider"] == "deepseek":
+            return response["choices"][0]["message"]["content"]
+        if entry["provider"] == "gemini":
+            return "".join(part.get("text") or "" for part in response["candidates"][0]["content"]["parts"])
+        if entry["provider"] == "ollama":
+            return (json.loads(response["text"]).get("message") or {}).get("content")
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+    return None
+
+# Expected result of archive cases, which is not known up front
+UNKNOWN = object()
+
+def archive_outputs(path: str, limit: int) -> Iterator[tuple]:
+    """
+    Yield up to limit (name, (text, UNKNOWN)) cases from a record/replay archive
+    """
+    from utils.provider_replay import iter_archive
+
+    count = 0
+    for entry in iter_archive(path):
+        text = _extract_text(entry)
+        if not text:
+            continue
+        count += 1
+        yield f"archive_{entry['provider']}_{count}", (text, UNKNOWN)
+        if count >= limit:
+            return
+
+def parser_corpus() -> Dict[str, Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Get the named model outputs of the parser benchmark
+
+    Returns:
+        Dictionary of case name -> (model output, the object a correct parser returns or None if there is none)
+    """
+    email_data = email_response()
+    itinerary_data = itinerary_response(7)
+    large_data = itinerary_response(30, 8)
+    news_data = news_response(12)
+    email = json.dumps(email_data, indent=2)
+    itinerary = json.dumps(itinerary_data, indent=2)
+
+    return {
+        # Valid JSON as returned by providers with a JSON response format
+        "clean_email": (email, email_data),
+        "clean_itinerary_7d": (itinerary, itinerary_data),
+        "clean_news_compact": (json.dumps(news_data), news_data),
+        # Markdown code fences, with and without a language tag
+        "fenced_json": (f"```json\n{email}\n```", email_data),
+        "fenced_plain": (f"```\n{itinerary}\n```", itinerary_data),
+        # Prose before and after the JSON
+        "prose_wrapped": (f"Here is the enhanced email in the requested format:\n\n{email}\n\nLet me know if you need any other changes.", email_data),
+        # Prose with braces after the JSON (the greedy regex spans up to the last brace)
+        "prose_trailing_braces": (f"{email}\n\nTip: personalize the greeting, e.g. \"Hi {{first_name}}\".", email_data),
+        # Reasoning block before the answer, as emitted by local reasoning models
+        "think_block": (f"<think>\nThe user wants a JSON object like {{\"enhanced_email\": ...}}. Let me improve the tone.\n</think>\n{email}", email_data),
+        # Output cut off by the token limit
+        "truncated_itinerary": (itinerary[:int(len(itinerary) * 0.6)], None),
+        # Two objects in one response (the first one is the answer)
+        "multi_object": (f"{email}\n{json.dumps(email_response())}", email_data),
+        # Very large body (30-day itinerary)
+        "very_large": (json.dumps(large_data, indent=2), large_data),
+        # Many opening braces and no closing one: worst case for the greedy \{.*\} search
+        "brace_flood": ("Unable to comply {" * 2000, None)
+    }
@@ -0,0 +1,118 @@
+"""
+Representative payloads for benchmarks
+This module builds response bodies shaped like real model outputs for each tool, sized like production traffic.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Any, List
+
+ACTIVITY_TYPES = ['culture', 'food', 'adventure', 'relaxation', 'sightseeing', 'shopping']
+NEWS_CATEGORIES = ['Technology', 'Business', 'Sports', 'Health', 'Science', 'Entertainment']
+
+def email_response() -> Dict[str, Any]:
+    """
+    Build an email enhancement response
+    """
+    return {
+        "original_email_score": "62%",
+        "enhanced_email": (
+            "Hi Priya,\n\nI'm following up on our discussion from Tuesday about the Q3 budget approval. "
+            "Could you confirm by Friday whether the revised figures work for your team? "
+            "Once approved, we can schedule the vendor kickoff for the following week.\n\n"
+            "Thanks for your help,\nAlex"
+        ) * 3,
+        "recommended_subject": "Q3 budget approval - confirmation needed by Friday",
+        "key_improvements": [
+            "Changed 'I wanted to follow up' to 'I'm following up on our discussion' for more directness",
+            "Added a specific deadline for the budget confirmation",
+            "Restructured the opening to lead with the budget approval",
+            "Enhanced the closing with a clear next step instead of 'let me know'"
+        ],
+        "analysis": {
+            "tone": "professional",
+            "clarity": "clear",
+            "conciseness": "concise",
+            "call_to_action": "present"
+        }
+    }
+
+def itinerary_response(trip_days: int = 7, activities_per_day: int = 5) -> Dict[str, Any]:
+    """
+    Build a travel itinerary response
+
+    Args:
+        trip_days: Number of days in the itinerary
+        activities_per_day: Number of activities per day
+    """
+    start = datetime(2026, 5, 1)
+    daily_itinerary: List[Dict[str, Any]] = []
+    for day in range(trip_days):
+        current = start + timedelta(days=day)
+        daily_itinerary.append({
+            "day": day + 1,
+            "date": current.strftime('%Y-%m-%d'),
+            "day_of_week": current.strftime('%A'),
+            "weather": "Sunny, 24°C with a light breeze in the afternoon",
+            "activities": [
+                {
+                    "time": f"{9 + slot * 2:02d}:00",
+                    "description": f"Guided visit to landmark {day}-{slot} with time for photos and a short walk through the old town",
+                    "type": ACTIVITY_TYPES[(day + slot) % len(ACTIVITY_TYPES)],
+                    "cost": f"${20 + slot * 15}",
+                    "location": f"Historic District, Stop {slot + 1}"
+                }
+                for slot in range(activities_per_day)
+            ]
+        })
+    return {
+        "destination": "Lisbon, Portugal",
+        "total_cost": "$2450",
+        "budget_status": "within_budget",
+        "daily_itinerary": daily_itinerary,
+        "travel_tips": [
+            "Buy a Viva Viagem card for public transport",
+            "Book popular restaurants a day in advance",
+            "Wear comfortable shoes for the hilly streets"
+        ],
+        "budget_breakdown": {
+            "accommodation": "$900",
+            "food": "$600",
+            "activities": "$450",
+            "transportation": "$300",
+            "other": "$200"
+        }
+    }
+
+def news_response(article_count: int = 12) -> Dict[str, Any]:
+    """
+    Build a news fetch response
+
+    Args:
+        article_count: Number of articles to include
+    """
+    return {
+        "articles": [
+            {
+                "title": f"National report {i}: policy changes expected to reshape the sector this year",
+                "description": (
+                    "Officials outlined a series of measures on Monday aimed at improving national competitiveness, "
+                    "with analysts expecting the changes to affect households and businesses across the country."
+                ),
+                "category": NEWS_CATEGORIES[i % len(NEWS_CATEGORIES)],
+                "source": "National Herald"
+            }
+            for i in range(article_count)
+        ]
+    }
+
+def representative_payloads() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the standard set of named payloads used across benchmarks
+    """
+    return {
+        "email": email_response(),
+        "itinerary_3d": itinerary_response(3),
+        "itinerary_14d": itinerary_response(14, 6),
+        "news_12": news_response(12),
+        "news_batch_60": news_response(60)
+    }
@@ -3,34 +3,27 @@ import logging
 from dotenv import load_dotenv
 from openai import OpenAI
 from google import genai
+from utils.log_utils import configure_logging
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
 # In production (Vercel), only use StreamHandler due to read-only filesystem
-# In development, use both FileHandler and StreamHandler
+# In development, use both a rotating FileHandler and StreamHandler
 is_production = os.getenv('VERCEL') == '1' or os.getenv('ENVIRONMENT') == 'production'
 
-if is_production:
-    # Production: only console logging (Vercel captures this)
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler()
-        ]
-    )
-else:
-    # Development: both file and console logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('api.log'),
-            logging.StreamHandler()
-        ]
-    )
+configure_logging(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    log_format='%(asctime)s - %(name)s - %(levelname)s - %(request_tag)s%(message)s',
+    log_file=None if is_production else os.getenv("LOG_FILE", "api.log"),
+    max_bytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+    backup_count=int(os.getenv("LOG_BACKUP_COUNT", "5")),
+    rotate_interval=float(os.getenv("LOG_ROTATE_INTERVAL", "86400")),
+    info_sample_rate=float(os.getenv("LOG_INFO_SAMPLE_RATE", "1.0")),
+    # Serverless instances freeze background threads between invocations, so production writes synchronously
+    use_queue=not is_production
+)
 
 # Create logger instance
 logger = logging.getLogger(__name__)
@@ -42,8 +35,30 @@ else:
     logger.info("Running in DEVELOPMENT mode")
 
 # Access environment variables
-DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+def _parse_api_keys(keys_value: str, single_key: str):
+    """
+    Parse a comma-separated key pool where each entry is "key" or "key:weight"
+    The single-key variable is included as well, so existing deployments keep working
+    """
+    keys = []
+    for entry in (keys_value or "").split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        key, _, weight = entry.rpartition(':')
+        if key and weight.isdigit():
+            keys.append((key, max(1, int(weight))))
+        else:
+            keys.append((entry, 1))
+    if single_key and single_key not in [key for key, _ in keys]:
+        keys.insert(0, (single_key, 1))
+    return keys
+
+# Each provider can use a pool of API keys; requests are spread across them by weight
+DEEPSEEK_API_KEYS = _parse_api_keys(os.getenv("DEEPSEEK_API_KEYS"), os.getenv("DEEPSEEK_API_KEY"))
+GEMINI_API_KEYS = _parse_api_keys(os.getenv("GEMINI_API_KEYS"), os.getenv("GEMINI_API_KEY"))
+DEEPSEEK_API_KEY = DEEPSEEK_API_KEYS[0][0] if DEEPSEEK_API_KEYS else None
+GEMINI_API_KEY = GEMINI_API_KEYS[0][0] if GEMINI_API_KEYS else None
 
 # Check if Deepseek API key is available
 if not DEEPSEEK_API_KEY:
@@ -52,7 +67,7 @@ if not DEEPSEEK_API_KEY:
     logger.warning("You can get your API key from: https://platform.deepseek.com/")
 else:
     # Log success without revealing any part of the API key
-    logger.info("DeepSeek API key loaded successfully.")
+    logger.info(f"DeepSeek API key(s) loaded successfully ({len(DEEPSEEK_API_KEYS)} in pool).")
 
 # Check if Gemini AI API key is available    
 if not GEMINI_API_KEY:
@@ -61,10 +76,138 @@ if not GEMINI_API_KEY:
     logger.warning("You can get your API key from: https://ai.google.dev/gemini-api/docs/api-key")
 else:
     # Log success without revealing any part of the API key
-    logger.info("Gemini AI API key loaded successfully.")
+    logger.info(f"Gemini AI API key(s) loaded successfully ({len(GEMINI_API_KEYS)} in pool).")
     
-# Initialize OpenAI DeepSeek client
-deepseek_client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url="https://api.deepseek.com") if DEEPSEEK_API_KEY else None
+# Provider endpoints (overridable to point the API at a local mock provider, see benchmarks/mock_provider.py)
+DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+# IP geolocation service (ip-api.com's /json/<ip> API) used to pick the news region; unset, no lookup is made and the
+# region defaults to India. Lookups send the client's IP to that service
+IPLOCATION_BASE_URL = os.getenv("IPLOCATION_BASE_URL", "").rstrip('/')
+
+# Client factories, called once per pooled API key (see utils.credential_pool)
+def create_deepseek_client(api_key: str) -> OpenAI:
+    """
+    Create an OpenAI-compatible DeepSeek client (retries are handled by the credential pool, not the SDK)
+    """
+    return OpenAI(api_key=api_key, base_url=DEEPSEEK_BASE_URL, max_retries=0)
+
+def create_gemini_client(api_key: str) -> genai.Client:
+    """
+    Create a Gemini client for one API key
+    """
+    if GEMINI_BASE_URL:
+        return genai.Client(api_key=api_key, http_options=genai.types.HttpOptions(base_url=GEMINI_BASE_URL))
+    return genai.Client(api_key=api_key)
+
+# Pacing budgets per API key (requests and tokens per minute, 0 disables pacing); set them to the keys' quota tier
+PROVIDER_RATE_LIMITS = {
+    "deepseek": {
+        "rpm": int(os.getenv("DEEPSEEK_RPM", "0")),
+        "tpm": int(os.getenv("DEEPSEEK_TPM", "0"))
+    },
+    "gemini": {
+        "rpm": int(os.getenv("GEMINI_RPM", "0")),
+        "tpm": int(os.getenv("GEMINI_TPM", "0"))
+    }
+}
+# Retries for rate-limited and transient provider errors, with jittered exponential backoff (seconds)
+PROVIDER_MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", "3"))
+PROVIDER_BACKOFF_BASE = float(os.getenv("PROVIDER_BACKOFF_BASE", "0.5"))
+PROVIDER_BACKOFF_MAX = float(os.getenv("PROVIDER_BACKOFF_MAX", "8"))
+# Longest a call may wait for rate budget before it is rejected instead
+PROVIDER_MAX_PACING_WAIT = float(os.getenv("PROVIDER_MAX_PACING_WAIT", "20"))
+
+# Per-tool bulkheads: concurrent requests, requests allowed to wait, and how long they may wait (seconds)
+# Slow itinerary generations are capped so they can't take every server thread from email and news
+def _bulkhead_limits(tool: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+    """
+    Read a tool's bulkhead limits from <TOOL>_MAX_CONCURRENCY, <TOOL>_MAX_QUEUE and <TOOL>_QUEUE_TIMEOUT
+    """
+    prefix = tool.upper()
+    return {
+        "max_concurrency": int(os.getenv(f"{prefix}_MAX_CONCURRENCY", str(max_concurrency))),
+        "max_queue": int(os.getenv(f"{prefix}_MAX_QUEUE", str(max_queue))),
+        "queue_timeout": float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", str(queue_timeout)))
+    }
+
+BULKHEAD_LIMITS = {
+    "email": _bulkhead_limits("email", 8, 16, 5),
+    "news": _bulkhead_limits("news", 4, 8, 10),
+    "travel": _bulkhead_limits("travel", 2, 4, 20)
+}
+
+# End-to-end request deadline in seconds: clients may ask for less (or more, up to the max) via X-Request-Timeout
+REQUEST_TIMEOUT_DEFAULT = float(os.getenv("REQUEST_TIMEOUT_DEFAULT", "60"))
+REQUEST_TIMEOUT_MAX = float(os.getenv("REQUEST_TIMEOUT_MAX", "120"))
+
+# Load shedding: in-flight requests per route, and estimated queue wait (seconds), beyond which new requests get 503
+# Routes with a bulkhead are capped lower, at their bulkhead's concurrency plus queue
+LOAD_SHED_MAX_DEPTH = int(os.getenv("LOAD_SHED_MAX_DEPTH", "32"))
+LOAD_SHED_MAX_EXPECTED_WAIT = float(os.getenv("LOAD_SHED_MAX_EXPECTED_WAIT", "30"))
+# Assumed concurrency for routes without a bulkhead, used for the wait estimate
+LOAD_SHED_DEFAULT_CONCURRENCY = int(os.getenv("LOAD_SHED_DEFAULT_CONCURRENCY", "8"))
+
+# Opt-in request profiling: requests sending X-Profile (matching PROFILING_TOKEN, which production requires) or a random sample are profiled
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+# Profiles are written outside the source tree; /tmp is the only writable location on Vercel
+PROFILING_DIR = os.getenv("PROFILING_DIR", "/tmp/everyday-ai-profiles" if is_production else "profiles")
+# "cprofile" (default) or "pyinstrument" for a sampling profiler with flame graph output, when installed
+PROFILER = os.getenv("PROFILER", "cprofile").lower()
+
+# Near-duplicate email cache: an email whose character n-gram vector has at least EMAIL_CACHE_THRESHOLD cosine similarity
+# to a recently enhanced one is served that enhancement, with the differing names, dates and numbers substituted
+# (opt-in: emails that differ in any other word always go to the model)
+EMAIL_CACHE_ENABLED = os.getenv("EMAIL_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+EMAIL_CACHE_THRESHOLD = float(os.getenv("EMAIL_CACHE_THRESHOLD", "0.8"))
+EMAIL_CACHE_MAX_ENTRIES = int(os.getenv("EMAIL_CACHE_MAX_ENTRIES", "256"))
+EMAIL_CACHE_TTL = float(os.getenv("EMAIL_CACHE_TTL", "3600"))
+EMAIL_CACHE_PERSONALIZE = os.getenv("EMAIL_CACHE_PERSONALIZE", "true").lower() in ("1", "true", "yes")
+
+# Provider record/replay: "off", "record" (archive every provider response) or "replay" (serve responses from the archive)
+PROVIDER_REPLAY_MODE = os.getenv("PROVIDER_REPLAY_MODE", "off").lower()
+PROVIDER_REPLAY_ARCHIVE = os.getenv("PROVIDER_REPLAY_ARCHIVE", "/tmp/everyday-ai-recordings.jsonl.gz" if is_production else "recordings.jsonl.gz")
+# Replayed calls wait this multiple of the recorded latency (0 replays instantly)
+PROVIDER_REPLAY_LATENCY_SCALE = float(os.getenv("PROVIDER_REPLAY_LATENCY_SCALE", "1.0"))
+
+# News editions: popular (region, categories) requests are pre-generated every NEWS_EDITIONS_INTERVAL seconds and served
+# from memory while younger than NEWS_EDITIONS_MAX_AGE. Popularity is a request count decaying with NEWS_EDITIONS_HALF_LIFE;
+# pre-generation only runs while the model has at least NEWS_EDITIONS_MIN_HEADROOM of its capacity left (rate budget,
+# news bulkhead and Ollama slots).
+# Opt-in: the scheduler is a background thread, which serverless platforms freeze between invocations.
+# NEWS_EDITIONS_STORE_ON_DEMAND also serves on-demand results as editions (a response cache of NEWS_EDITIONS_MAX_AGE)
+NEWS_EDITIONS_ENABLED = os.getenv("NEWS_EDITIONS_ENABLED", "false").lower() in ("1", "true", "yes")
+NEWS_EDITIONS_STORE_ON_DEMAND = os.getenv("NEWS_EDITIONS_STORE_ON_DEMAND", "false").lower() in ("1", "true", "yes")
+NEWS_EDITIONS_INTERVAL = float(os.getenv("NEWS_EDITIONS_INTERVAL", "900"))
+NEWS_EDITIONS_TOP_K = int(os.getenv("NEWS_EDITIONS_TOP_K", "5"))
+NEWS_EDITIONS_MAX_AGE = float(os.getenv("NEWS_EDITIONS_MAX_AGE", "1800"))
+NEWS_EDITIONS_MIN_REQUESTS = float(os.getenv("NEWS_EDITIONS_MIN_REQUESTS", "1.5"))
+NEWS_EDITIONS_HALF_LIFE = float(os.getenv("NEWS_EDITIONS_HALF_LIFE", "21600"))
+NEWS_EDITIONS_MIN_HEADROOM = float(os.getenv("NEWS_EDITIONS_MIN_HEADROOM", "0.5"))
+
+# Model availability snapshot served by /api/health/models: background refresh interval and client cache lifetime (seconds)
+MODEL_STATUS_REFRESH_INTERVAL = float(os.getenv("MODEL_STATUS_REFRESH_INTERVAL", "15"))
+MODEL_STATUS_MAX_AGE = int(os.getenv("MODEL_STATUS_MAX_AGE", "5"))
+
+# Local Ollama model settings (development only)
+def _parse_keep_alive(value: str):
+    """
+    Ollama accepts keep_alive as a duration string ("30m") or a number of seconds (-1 keeps models loaded)
+    """
+    try:
+        return int(value)
+    except ValueError:
+        return value
 
-# Initialize Gemini client if API key is available
-gemini_client = genai.Client() if GEMINI_API_KEY else None
\ No newline at end of file
+# Comma-separated list of Ollama servers; generations are routed to the least-loaded host with the model
+OLLAMA_HOSTS = [host.strip().rstrip('/') for host in os.getenv("OLLAMA_HOSTS", "http://localhost:11434").split(',') if host.strip()]
+OLLAMA_KEEP_ALIVE = _parse_keep_alive(os.getenv("OLLAMA_KEEP_ALIVE", "30m"))
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "true").lower() in ("1", "true", "yes")
+# Constrain local generations to the response JSON schema via Ollama's "format" parameter
+OLLAMA_STRUCTURED_OUTPUT = os.getenv("OLLAMA_STRUCTURED_OUTPUT", "true").lower() in ("1", "true", "yes")
+# Concurrent generations per model per host, and how many more may wait before requests are rejected
+OLLAMA_MODEL_PARALLELISM = int(os.getenv("OLLAMA_MODEL_PARALLELISM", "1"))
+OLLAMA_MAX_QUEUE = int(os.getenv("OLLAMA_MAX_QUEUE", "4"))
+OLLAMA_NUM_THREAD = int(os.getenv("OLLAMA_NUM_THREAD")) if os.getenv("OLLAMA_NUM_THREAD") else None
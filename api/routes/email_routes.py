@@ -1,10 +1,14 @@
 from flask import Blueprint, request
-from datetime import datetime
 from services.deepseek_service import DeepSeekService
-from services.ollama_service import OllamaService
+from services.ollama_service import get_ollama_service
 from services.gemini_service import GeminiService
 from utils.env_utils import should_initialize_local_models
-from utils.response_helpers import success_response, error_response, validate_json_request, validate_required_field
+from utils.bulkhead import bulkhead
+from utils.email_cache import email_cache
+from utils.request_context import get_request_id
+from utils.response_helpers import (
+    success_response, error_response, service_error_response, validate_json_request, validate_required_field
+)
 from config import logger
 
 # Create Blueprint for email routes
@@ -17,7 +21,7 @@ gemini_service = GeminiService()
 # Only initialize Ollama service in development
 is_development = should_initialize_local_models()
 if is_development:
-    ollama_service = OllamaService()
+    ollama_service = get_ollama_service()
     logger.info("Email routes: Ollama service initialized for development")
 else:
     ollama_service = None
@@ -34,14 +38,15 @@ def enhance_email_root():
     return enhance_email()
 
 @email_bp.route('/enhance', methods=['POST'])
+@bulkhead('email')
 def enhance_email():
     """
     Enhance email content using selected AI model
     Expected input: JSON with 'email_content' and 'model' fields
     Returns: Enhanced email with analysis in JSON format
     """
-    # Log API invocation with timestamp
-    request_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+    # Log API invocation with the request ID
+    request_id = get_request_id()
     logger.info(f"[{request_id}] Email enhancement API invoked")
     
     try:
@@ -64,6 +69,11 @@ def enhance_email():
         # Log email content length (for monitoring, not the actual content for privacy)
         logger.info(f"[{request_id}] Processing email content: {len(email_content)} characters")
         
+        # Serve near-duplicates of a recently enhanced email (e.g. the same template) without a model call
+        cached = email_cache.lookup(selected_model, email_content, request_id)
+        if cached is not None:
+            return success_response(cached)
+        
         # Route to appropriate service based on model selection
         # Check if model is a local (Ollama) model
         available_local_models = ollama_service.get_available_model_ids() if is_development and ollama_service else []
@@ -82,8 +92,9 @@ def enhance_email():
             enhanced_data, error = deepseek_service.enhance_email(email_content, request_id)
         
         if error:
-            return error_response(error, 500)
+            return service_error_response(error)
         
+        email_cache.store(selected_model, email_content, enhanced_data)
         return success_response(enhanced_data)
         
     except Exception as e:
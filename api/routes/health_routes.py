@@ -1,8 +1,16 @@
-from flask import Blueprint, jsonify
-from services.ollama_service import OllamaService
-from config import logger, DEEPSEEK_API_KEY, GEMINI_API_KEY
+from flask import Blueprint, jsonify, request, current_app
+from services.ollama_service import get_ollama_service
+from services.model_status_service import ModelStatusService
+from config import logger, DEEPSEEK_API_KEY, GEMINI_API_KEY, MODEL_STATUS_REFRESH_INTERVAL, MODEL_STATUS_MAX_AGE
 from utils.env_utils import should_initialize_local_models, get_environment_name
 from utils.response_helpers import success_response
+from utils.token_budget import token_budget_planner
+from utils.response_utils import get_parse_stats
+from utils.credential_pool import get_credential_pool_status
+from utils.bulkhead import get_bulkhead_status
+from utils.load_shedding import load_shedder
+from utils.email_cache import email_cache
+from services.news_edition_service import news_edition_service
 
 # Create Blueprint for health routes
 health_bp = Blueprint('health', __name__)
@@ -10,7 +18,7 @@ health_bp = Blueprint('health', __name__)
 # Only initialize Ollama service in development
 is_development = should_initialize_local_models()
 if is_development:
-    ollama_service = OllamaService()
+    ollama_service = get_ollama_service()
     logger.info("Health routes: Ollama service initialized for development")
 else:
     ollama_service = None
@@ -26,68 +34,81 @@ def health_check():
         "message": "Everyday AI API is running"
     })
 
+def build_models_snapshot():
+    """
+    Probe all providers and build the /models response
+    Makes a single /api/tags call per Ollama host, regardless of the number of models
+    """
+    # Check DeepSeek API availability (from config)
+    deepseek_available = DEEPSEEK_API_KEY is not None
+    
+    # Check Gemini API availability (from config)
+    gemini_available = GEMINI_API_KEY is not None
+    
+    # Build models dictionary
+    models_dict = {
+        "deepseek-api": {
+            "available": deepseek_available,
+            "type": "cloud",
+            "description": "DeepSeek API (cloud-based)"
+        },
+        "gemini-flash": {
+            "available": gemini_available,
+            "type": "cloud",
+            "description": "Google Gemini 2.5 Flash (cloud-based)"
+        }
+    }
+    
+    # Check Ollama service availability and dynamically discover models
+    ollama_available = False
+    discovered_models = {}
+    
+    if is_development and ollama_service is not None:
+        ollama_available, model_availability = ollama_service.refresh_models()
+        
+        if ollama_available:
+            for model_id, is_model_available in model_availability.items():
+                # Extract the base model name from model_id (e.g., "local-llama3" -> "llama3")
+                base_name = model_id.replace("local-", "").upper()
+                
+                discovered_models[model_id] = {
+                    "available": is_model_available,
+                    "type": "local",
+                    "description": f"Local {base_name} (Ollama)",
+                    "requires": "Development environment + Ollama + model loaded"
+                }
+    
+    # Merge discovered models with the base models dictionary
+    models_dict.update(discovered_models)
+    
+    return {
+        "models": models_dict,
+        "ollama_service": {
+            "available": ollama_available,
+            "status": "running" if ollama_available else "not available",
+            "discovered_models_count": len(discovered_models),
+            "hosts": ollama_service.get_host_status(include_load=False) if ollama_service is not None else [],
+            "environment": get_environment_name()
+        },
+        "environment": get_environment_name()
+    }
+
+# Model availability is probed in the background and served from memory
+model_status_service = ModelStatusService(build_models_snapshot, MODEL_STATUS_REFRESH_INTERVAL)
+
 @health_bp.route('/models', methods=['GET'])
 def check_models():
     """
     Check available AI models and their status
+    Served from the cached snapshot with an ETag; clients revalidating with If-None-Match get a 304
     """
     try:
-        # Check DeepSeek API availability (from config)
-        deepseek_available = DEEPSEEK_API_KEY is not None
-        
-        # Check Gemini API availability (from config)
-        gemini_available = GEMINI_API_KEY is not None
-        
-        # Build models dictionary
-        models_dict = {
-            "deepseek-api": {
-                "available": deepseek_available,
-                "type": "cloud",
-                "description": "DeepSeek API (cloud-based)"
-            },
-            "gemini-flash": {
-                "available": gemini_available,
-                "type": "cloud",
-                "description": "Google Gemini 2.5 Flash (cloud-based)"
-            }
-        }
-        
-        # Check Ollama service availability and dynamically discover models
-        ollama_available = False
-        discovered_models = {}
-        
-        if is_development and ollama_service is not None:
-            ollama_available = ollama_service.is_available()
-            
-            if ollama_available:
-                # Get dynamically discovered models
-                available_model_ids = ollama_service.get_available_model_ids()
-                
-                for model_id in available_model_ids:
-                    is_model_available = ollama_service.is_model_available(model_id)
-                    # Extract the base model name from model_id (e.g., "local-llama3" -> "llama3")
-                    base_name = model_id.replace("local-", "").upper()
-                    
-                    discovered_models[model_id] = {
-                        "available": is_model_available,
-                        "type": "local",
-                        "description": f"Local {base_name} (Ollama)",
-                        "requires": "Development environment + Ollama + model loaded"
-                    }
-        
-        # Merge discovered models with the base models dictionary
-        models_dict.update(discovered_models)
+        body, etag = model_status_service.get_snapshot()
         
-        return jsonify({
-            "models": models_dict,
-            "ollama_service": {
-                "available": ollama_available,
-                "status": "running" if ollama_available else "not available",
-                "discovered_models_count": len(discovered_models),
-                "environment": get_environment_name()
-            },
-            "environment": get_environment_name()
-        })
+        response = current_app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f'public, max-age={MODEL_STATUS_MAX_AGE}'
+        return response.make_conditional(request)
         
     except Exception as e:
         logger.error(f"Error checking models: {str(e)}")
@@ -96,6 +117,17 @@ def check_models():
             "message": str(e)
         }), 500
 
+@health_bp.route('/queues', methods=['GET'])
+def check_queues():
+    """
+    Live admission queue state and host load for local models, and per-tool bulkheads
+    """
+    return success_response({
+        "queues": ollama_service.get_queue_status() if ollama_service is not None else [],
+        "hosts": ollama_service.get_host_status() if ollama_service is not None else [],
+        "bulkheads": get_bulkhead_status()
+    })
+
 @health_bp.route('/test', methods=['GET'])
 def test():
     """
@@ -119,5 +151,11 @@ def status():
         'services': {
             'deepseek_ai': 'available' if DEEPSEEK_API_KEY else 'not_configured'
         },
+        'token_budgets': token_budget_planner.snapshot(),
+        'json_parse_stats': get_parse_stats(),
+        'rate_limits': get_credential_pool_status(),
+        'load_shedding': load_shedder.status(),
+        'email_cache': email_cache.status(),
+        'news_editions': news_edition_service.status(),
         'version': '1.0.0'
     }) 
\ No newline at end of file
@@ -1,11 +1,16 @@
 from flask import Blueprint, request
-from datetime import datetime
 from services.deepseek_service import DeepSeekService
 from services.gemini_service import GeminiService
-from services.ollama_service import OllamaService
+from services.ollama_service import get_ollama_service
 from services.iplocation_service import IpLocationService
+from services.news_edition_service import news_edition_service
 from utils.env_utils import should_initialize_local_models
-from utils.response_helpers import success_response, error_response, validate_json_request, validate_required_field
+from utils.bulkhead import bulkhead, background_slot, bulkhead_headroom
+from utils.credential_pool import get_credential_pool
+from utils.request_context import get_request_id
+from utils.response_helpers import (
+    success_response, error_response, service_error_response, validate_json_request, validate_required_field
+)
 from config import logger
 
 # Create Blueprint for news routes
@@ -19,21 +24,82 @@ iplocation_service = IpLocationService()
 # Only initialize Ollama service in development
 is_development = should_initialize_local_models()
 if is_development:
-    ollama_service = OllamaService()
+    ollama_service = get_ollama_service()
     logger.info("News routes: Ollama service initialized for development")
 else:
     ollama_service = None
     logger.info("News routes: Ollama service not initialized in production")
 
+def model_provider(selected_model):
+    """
+    Get the provider a model is dispatched to: "ollama" (a local model), "gemini" or "deepseek"
+
+    Returns:
+        The provider name, or None for a model id the route doesn't know (sent to DeepSeek on demand, but never
+        tracked or pre-generated as an edition)
+    """
+    available_local_models = ollama_service.get_available_model_ids() if is_development and ollama_service else []
+    if selected_model in available_local_models:
+        return 'ollama'
+    if selected_model == 'gemini-flash':
+        return 'gemini'
+    if selected_model == 'deepseek-api':
+        return 'deepseek'
+    return None
+
+def generate_news(selected_model, categories, region, request_id):
+    """
+    Generate news articles with the selected model's service
+
+    Returns:
+        (news_articles, error_message) - if error_message is not None, the request failed
+    """
+    provider = model_provider(selected_model)
+    if provider == 'ollama':
+        return ollama_service.fetch_news_by_category(categories, region, selected_model, request_id)
+    if provider == 'gemini':
+        return gemini_service.fetch_news_by_category(categories, region, request_id)
+    return deepseek_service.fetch_news_by_category(categories, region, request_id)
+
+def provider_headroom(selected_model):
+    """
+    Fraction of capacity left for pre-generating with a model: the lower of the free news bulkhead slots and
+    the rate budget of its hosted provider, or the free generation slots of a local model
+    """
+    provider = model_provider(selected_model)
+    if provider is None:
+        return 0.0
+    if provider == 'ollama':
+        capacity = ollama_service.headroom(selected_model)
+    else:
+        capacity = get_credential_pool(provider).headroom()
+    return min(bulkhead_headroom('news'), capacity)
+
+def pregenerate_news(selected_model, categories, region, request_id):
+    """
+    Generate a news edition in a free slot of the news bulkhead, so pre-generation never queues ahead of requests
+
+    Returns:
+        (news_articles, error_message) - if error_message is not None, the edition wasn't generated
+    """
+    with background_slot('news') as admitted:
+        if not admitted:
+            return None, "news bulkhead busy"
+        return generate_news(selected_model, categories, region, request_id)
+
+# Pre-generate editions of popular region/category combinations in the background
+news_edition_service.set_generator(pregenerate_news, provider_headroom)
+
 @news_bp.route('/fetch', methods=['POST'])
+@bulkhead('news')
 def fetch_news_by_category():
     """
     Fetch news articles by category and region using selected AI model
     Expected input: JSON with 'categories' field (list of strings), 'region' field (string), and 'model' field (string)
     Returns: List of news articles in JSON format
     """
-    # Log API invocation with timestamp
-    request_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+    # Log API invocation with the request ID
+    request_id = get_request_id()
     logger.info(f"[{request_id}] News fetch API invoked")
     
     # Get client IP address from request headers
@@ -72,8 +138,16 @@ def fetch_news_by_category():
         # Log categories and region (for monitoring, not the actual content for privacy)
         logger.info(f"[{request_id}] Fetching news for categories: {categories} in region: {region}")
         
-        # Route to appropriate service based on model selection
-        # Check if model is a local (Ollama) model
+        # Serve the current edition of the combination when there is one (known models only)
+        known_model = model_provider(selected_model) is not None
+        if known_model:
+            news_edition_service.record_request(selected_model, region, categories)
+            edition = news_edition_service.get_edition(selected_model, region, categories)
+            if edition is not None:
+                logger.info(f"[{request_id}] Serving news edition for region: {region}")
+                return success_response({"articles": edition})
+        
+        # Check the selected model can be used (gemini-flash, a local (Ollama) model, or the deepseek-api default)
         available_local_models = ollama_service.get_available_model_ids() if is_development and ollama_service else []
         
         if selected_model in available_local_models:
@@ -81,17 +155,16 @@ def fetch_news_by_category():
                 return error_response("Local models are not available in production environment. Please use DeepSeek API.", 400)
             if ollama_service is None:
                 return error_response("Local Ollama service is not available.", 500)
-            news_data, error = ollama_service.fetch_news_by_category(categories, region, selected_model, request_id)
         elif selected_model == 'gemini-flash':
             if not gemini_service.is_available():
                 return error_response("Gemini AI API key is not configured. Please set GEMINI_API_KEY environment variable.", 500)
-            news_data, error = gemini_service.fetch_news_by_category(categories, region, request_id)
-        else:  # default to deepseek-api
-            news_data, error = deepseek_service.fetch_news_by_category(categories, region, request_id)
         
+        news_data, error = generate_news(selected_model, categories, region, request_id)
         if error:
-            return error_response(error, 500)
+            return service_error_response(error)
         
+        if known_model:
+            news_edition_service.store_edition(selected_model, region, categories, news_data)
         return success_response({"articles": news_data})
         
     except Exception as e:
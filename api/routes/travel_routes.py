@@ -1,10 +1,13 @@
 from flask import Blueprint, request
-from datetime import datetime
 from services.deepseek_service import DeepSeekService
 from services.gemini_service import GeminiService
-from services.ollama_service import OllamaService
+from services.ollama_service import get_ollama_service
 from utils.env_utils import should_initialize_local_models
-from utils.response_helpers import success_response, error_response, validate_json_request, validate_required_field
+from utils.bulkhead import bulkhead
+from utils.request_context import get_request_id
+from utils.response_helpers import (
+    success_response, error_response, service_error_response, validate_json_request, validate_required_field
+)
 from config import logger
 
 # Create Blueprint for travel routes
@@ -17,7 +20,7 @@ gemini_service = GeminiService()
 # Only initialize Ollama service in development
 is_development = should_initialize_local_models()
 if is_development:
-    ollama_service = OllamaService()
+    ollama_service = get_ollama_service()
     logger.info("Travel routes: Ollama service initialized for development")
 else:
     ollama_service = None
@@ -36,13 +39,14 @@ def generate_itinerary_root():
 
 
 @travel_bp.route('/generate', methods=['POST'])
+@bulkhead('travel')
 def generate_itinerary():
     """
     Generate travel itinerary using selected AI model
     Expected input: JSON with destination, budget, start_date, end_date, travelers, preferences, and model
     Returns: Generated itinerary with daily breakdown in JSON format
     """
-    request_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+    request_id = get_request_id()
     logger.info(f"[{request_id}] Travel itinerary generation API invoked")
     
     try:
@@ -91,7 +95,7 @@ def generate_itinerary():
         
         if error:
             logger.error(f"THIS ----- Error: {error}")
-            return error_response(error, 500)
+            return service_error_response(error)
         
         return success_response(itinerary_data)
         
@@ -1,6 +1,12 @@
 from typing import Dict, Any, Optional, List
+from openai.types.chat import ChatCompletion
 from config import logger
-from utils.prompts import EMAIL_ENHANCEMENT_PROMPT, TRAVEL_ITINERARY_PROMPT, NEWS_FETCH_PROMPT, SYSTEM_MESSAGES, MODEL_CONFIGS
+from utils.prompts import EMAIL_ENHANCEMENT_PROMPT, NEWS_FETCH_PROMPT, SYSTEM_MESSAGES, OPERATION_SYSTEM_MESSAGES, MODEL_CONFIGS
+from utils.token_budget import token_budget_planner, CHARS_PER_TOKEN
+from utils.credential_pool import get_credential_pool
+from utils.deadline import timeout_for
+from utils.provider_replay import provider_replay
+from utils.itinerary_utils import format_itinerary_prompt, parse_trip_dates, complete_itinerary, ITINERARY_MODEL_FIELDS
 from utils.response_utils import (
     safe_json_parse, 
     validate_response_structure, 
@@ -15,15 +21,44 @@ class DeepSeekService:
     """
     
     def __init__(self):
-        from config import deepseek_client
-        self.client = deepseek_client
         self.model_id = "deepseek-api"
+        self.credential_pool = get_credential_pool("deepseek")
     
     def is_available(self) -> bool:
         """
-        Check if the DeepSeek service is available (API key configured)
+        Check if the DeepSeek service is available (API key configured, or calls replayed from an archive)
         """
-        return self.client is not None
+        return provider_replay.mode == "replay" or self.credential_pool.is_available()
+    
+    def _record_usage(self, response, operation: str, token_units: float) -> None:
+        """
+        Feed the reported output token usage back into the token budget planner
+        """
+        usage = getattr(response, 'usage', None)
+        finish_reason = response.choices[0].finish_reason if response.choices else None
+        token_budget_planner.record(self.model_id, operation, token_units, getattr(usage, 'completion_tokens', None), finish_reason == 'length')
+    
+    def _create_completion(self, request_id: str, **kwargs):
+        """
+        Call chat.completions.create on a pooled DeepSeek key within its rate budget, retrying transient failures
+        Each attempt's timeout is capped by the time left on the request deadline
+        Calls are recorded or replayed when PROVIDER_REPLAY_MODE is set (see utils/provider_replay.py)
+        """
+        prompt_chars = sum(len(message["content"]) for message in kwargs["messages"])
+        estimated_tokens = prompt_chars / CHARS_PER_TOKEN + kwargs["max_tokens"]
+        return provider_replay.call(
+            "deepseek",
+            {key: kwargs.get(key) for key in ("model", "messages", "response_format", "temperature")},
+            lambda: self.credential_pool.call(
+                lambda client: client.chat.completions.create(**{**kwargs, "timeout": timeout_for(kwargs["timeout"])}),
+                estimated_tokens,
+                request_id,
+                used_tokens=lambda response: getattr(getattr(response, 'usage', None), 'total_tokens', None),
+                provider_request_id=lambda response: getattr(response, '_request_id', None) or getattr(response, 'id', None)
+            ),
+            encode=lambda response: response.model_dump(mode='json'),
+            decode=ChatCompletion.model_validate
+        )
     
     def enhance_email(self, email_content: str, request_id: str) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
         """
@@ -49,8 +84,12 @@ class DeepSeekService:
             # Get model configuration
             config = MODEL_CONFIGS[self.model_id]
             
-            # Call DeepSeek AI with timeout
-            response = self.client.chat.completions.create(
+            # Size the output token limit from the request
+            max_tokens, token_units = token_budget_planner.plan(self.model_id, "email", email_content=email_content)
+            
+            # Call DeepSeek AI with timeout (paced and retried by the rate limiter)
+            response = self._create_completion(
+                request_id,
                 model=config["model"],
                 messages=[
                     {
@@ -66,13 +105,14 @@ class DeepSeekService:
                     'type': 'json_object'
                 },
                 temperature=config["temperature"],
-                max_tokens=config["max_tokens"],
+                max_tokens=max_tokens,
                 timeout=config["timeout"]
             )
             
             # Extract AI response
             ai_response = response.choices[0].message.content.strip()
             log_request_success(request_id, self.model_id, len(ai_response), "email enhancement")
+            self._record_usage(response, "email", token_units)
             
             # Parse and validate response using common utilities
             enhanced_data, error = safe_json_parse(ai_response, request_id, self.model_id)
@@ -106,30 +146,8 @@ class DeepSeekService:
         if not self.is_available():
             return None, "API key not configured. Please set DEEPSEEK_API_KEY environment variable."
         
-        # Extract travel details
-        destination = travel_data['destination']
-        budget = travel_data['budget']
-        start_date = travel_data['start_date']
-        end_date = travel_data['end_date']
-        travelers = travel_data['travelers']
-        preferences = travel_data['preferences']
-        
-        # Calculate trip duration
-        from datetime import datetime
-        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-        trip_days = (end_dt - start_dt).days + 1
-        
-        # Use common prompt from prompts module
-        prompt = TRAVEL_ITINERARY_PROMPT.format(
-            trip_days=trip_days,
-            start_date=start_date,
-            end_date=end_date,
-            destination=destination,
-            budget=budget,
-            travelers=travelers,
-            preferences_text=', '.join(preferences) if isinstance(preferences, list) else str(preferences)
-        )
+        # Build prompt (calendar fields are computed on the server, not by the model)
+        prompt = format_itinerary_prompt(travel_data)
         
         try:
             log_request_start(request_id, self.model_id, "itinerary generation")
@@ -137,13 +155,17 @@ class DeepSeekService:
             # Get model configuration
             config = MODEL_CONFIGS[self.model_id]
             
+            # Size the output token limit from the request
+            max_tokens, token_units = token_budget_planner.plan(self.model_id, "itinerary", trip_days=parse_trip_dates(travel_data)[2])
+            
             # Call DeepSeek AI
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
+                request_id,
                 model=config["model"],
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are an expert travel planner. Create detailed, realistic travel itineraries in the exact JSON format requested."
+                        "content": OPERATION_SYSTEM_MESSAGES["itinerary"]
                     },
                     {
                         "role": "user",
@@ -154,13 +176,14 @@ class DeepSeekService:
                     'type': 'json_object'
                 },
                 temperature=config["temperature"],
-                max_tokens=config["max_tokens"],
+                max_tokens=max_tokens,
                 timeout=config["timeout"]
             )
             
             # Extract AI response
             ai_response = response.choices[0].message.content.strip()
             log_request_success(request_id, self.model_id, len(ai_response), "itinerary generation")
+            self._record_usage(response, "itinerary", token_units)
             
             # Parse and validate response using common utilities
             itinerary_data, error = safe_json_parse(ai_response, request_id, self.model_id)
@@ -168,14 +191,13 @@ class DeepSeekService:
                 return None, error
             
             # Validate the response structure
-            required_fields = ['destination', 'total_cost', 'budget_status', 'daily_itinerary', 'travel_tips', 'budget_breakdown']
-            validation_error = validate_response_structure(itinerary_data, required_fields)
+            validation_error = validate_response_structure(itinerary_data, ITINERARY_MODEL_FIELDS)
             
             if validation_error:
                 logger.error(f"[{request_id}] {validation_error}")
                 return None, validation_error
             
-            return itinerary_data, None
+            return complete_itinerary(itinerary_data, travel_data, request_id), None
             
         except Exception as e:
             return None, format_error_message(e, self.model_id, request_id)
@@ -206,13 +228,17 @@ class DeepSeekService:
             # Get model configuration
             config = MODEL_CONFIGS[self.model_id]
             
+            # Size the output token limit from the request
+            max_tokens, token_units = token_budget_planner.plan(self.model_id, "news", categories=categories)
+            
             # Call DeepSeek AI
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
+                request_id,
                 model=config["model"],
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are an expert news aggregator. You generate realistic news articles based on specified categories and regions. Always respond in the exact JSON format requested."
+                        "content": OPERATION_SYSTEM_MESSAGES["news"]
                     },
                     {
                         "role": "user",
@@ -223,13 +249,14 @@ class DeepSeekService:
                     'type': 'json_object'
                 },
                 temperature=config["temperature"],
-                max_tokens=3000,  # Higher token limit for news articles
+                max_tokens=max_tokens,
                 timeout=config["timeout"]
             )
             
             # Extract AI response
             ai_response = response.choices[0].message.content.strip()
             log_request_success(request_id, self.model_id, len(ai_response), "news fetching")
+            self._record_usage(response, "news", token_units)
             
             # Parse and validate response using common utilities
             news_data, error = safe_json_parse(ai_response, request_id, self.model_id)
@@ -1,5 +1,10 @@
 from config import logger
-from utils.prompts import EMAIL_ENHANCEMENT_PROMPT, EMAIL_RESPONSE_JSON_SCHEMA, MODEL_CONFIGS, SYSTEM_MESSAGES, TRAVEL_ITINERARY_PROMPT, TRAVEL_ITINERARY_JSON_SCHEMA, NEWS_FETCH_PROMPT, NEWS_JSON_SCHEMA
+from utils.prompts import EMAIL_ENHANCEMENT_PROMPT, EMAIL_RESPONSE_JSON_SCHEMA, MODEL_CONFIGS, SYSTEM_MESSAGES, OPERATION_SYSTEM_MESSAGES, TRAVEL_ITINERARY_JSON_SCHEMA, NEWS_FETCH_PROMPT, NEWS_JSON_SCHEMA
+from utils.token_budget import token_budget_planner, CHARS_PER_TOKEN
+from utils.credential_pool import get_credential_pool
+from utils.deadline import timeout_for
+from utils.provider_replay import provider_replay
+from utils.itinerary_utils import format_itinerary_prompt, parse_trip_dates, complete_itinerary, ITINERARY_MODEL_FIELDS
 from utils.response_utils import (
     log_request_start, log_request_success, safe_json_parse, validate_response_structure, format_error_message)
 from typing import Dict, Any, Optional, List
@@ -11,15 +16,58 @@ class GeminiService:
     """
     
     def __init__(self):
-        from config import gemini_client
-        self.client = gemini_client
         self.model_id = "gemini-flash"
+        self.credential_pool = get_credential_pool("gemini")
         
     def is_available(self):
         """
-        Check if Gemini AI client is available
+        Check if Gemini AI client is available (API key configured, or calls replayed from an archive)
         """
-        return self.client is not None
+        return provider_replay.mode == "replay" or self.credential_pool.is_available()
+    
+    def _record_usage(self, response, operation: str, token_units: float) -> None:
+        """
+        Feed the reported output token usage back into the token budget planner
+        """
+        usage = getattr(response, 'usage_metadata', None)
+        candidates = getattr(response, 'candidates', None) or []
+        finish_reason = str(getattr(candidates[0], 'finish_reason', '')) if candidates else ''
+        token_budget_planner.record(self.model_id, operation, token_units, getattr(usage, 'candidates_token_count', None), 'MAX_TOKENS' in finish_reason)
+    
+    def _with_timeout(self, kwargs: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        Set the HTTP timeout (in milliseconds) on the generate_content config for one attempt
+        """
+        http_options = types.HttpOptions(timeout=int(timeout_for(timeout) * 1000))
+        return {**kwargs, "config": kwargs["config"].model_copy(update={"http_options": http_options})}
+    
+    def _generate_content(self, request_id: str, **kwargs):
+        """
+        Call generate_content on a pooled Gemini key within its rate budget, retrying transient failures
+        Each attempt's timeout is capped by the time left on the request deadline
+        Calls are recorded or replayed when PROVIDER_REPLAY_MODE is set (see utils/provider_replay.py)
+        """
+        config = kwargs["config"]
+        timeout = MODEL_CONFIGS[self.model_id]["timeout"]
+        prompt_chars = len(kwargs["contents"]) + len(config.system_instruction or "")
+        estimated_tokens = prompt_chars / CHARS_PER_TOKEN + (config.max_output_tokens or 0)
+        return provider_replay.call(
+            "gemini",
+            {
+                "model": kwargs["model"],
+                "contents": kwargs["contents"],
+                "config": config.model_dump(mode='json', exclude_none=True, exclude={'http_options', 'max_output_tokens'})
+            },
+            lambda: self.credential_pool.call(
+                lambda client: client.models.generate_content(**self._with_timeout(kwargs, timeout)),
+                estimated_tokens,
+                request_id,
+                used_tokens=lambda response: getattr(getattr(response, 'usage_metadata', None), 'total_token_count', None),
+                provider_request_id=lambda response: getattr(response, 'response_id', None)
+            ),
+            encode=lambda response: response.model_dump(mode='json', exclude_none=True),
+            decode=types.GenerateContentResponse.model_validate
+        )
     
     def enhance_email(self, email_content: str, request_id: str) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
         """
@@ -45,15 +93,19 @@ class GeminiService:
             # Get model configuration
             config = MODEL_CONFIGS[self.model_id]
             
+            # Size the output token limit from the request
+            max_tokens, token_units = token_budget_planner.plan(self.model_id, "email", email_content=email_content)
+            
             # Call Gemini API
-            response = self.client.models.generate_content(
+            response = self._generate_content(
+                request_id,
                 model=config["model"],
                 contents=prompt,
                 config=types.GenerateContentConfig(
                     responseMimeType="application/json",
                     response_json_schema=EMAIL_RESPONSE_JSON_SCHEMA,
                     temperature=config["temperature"],
-                    maxOutputTokens=config["max_tokens"],
+                    maxOutputTokens=max_tokens,
                     topP=config.get("top_p", 0.9),
                     system_instruction=SYSTEM_MESSAGES[self.model_id],
                     thinking_config=types.ThinkingConfig(thinking_budget=0) # Disables thinking
@@ -63,6 +115,7 @@ class GeminiService:
             # Extract AI response
             ai_response = response.text.strip()
             log_request_success(request_id, self.model_id, len(ai_response), "email enhancement")
+            self._record_usage(response, "email", token_units)
             
             # Parse and validate response using common utilities
             enhanced_data, error = safe_json_parse(ai_response, request_id, self.model_id)
@@ -96,30 +149,8 @@ class GeminiService:
         if not self.is_available():
             return None, "API key not configured. Please set GEMINI_API_KEY environment variable."
         
-        # Extract travel details
-        destination = travel_data['destination']
-        budget = travel_data['budget']
-        start_date = travel_data['start_date']
-        end_date = travel_data['end_date']
-        travelers = travel_data['travelers']
-        preferences = travel_data['preferences']
-        
-        # Calculate trip duration
-        from datetime import datetime
-        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-        trip_days = (end_dt - start_dt).days + 1
-        
-        # Use common prompt from prompts module
-        prompt = TRAVEL_ITINERARY_PROMPT.format(
-            trip_days=trip_days,
-            start_date=start_date,
-            end_date=end_date,
-            destination=destination,
-            budget=budget,
-            travelers=travelers,
-            preferences_text=', '.join(preferences) if isinstance(preferences, list) else str(preferences)
-        )
+        # Build prompt (calendar fields are computed on the server, not by the model)
+        prompt = format_itinerary_prompt(travel_data)
         
         try:
             log_request_start(request_id, self.model_id, "itinerary generation")
@@ -127,17 +158,21 @@ class GeminiService:
             # Get model configuration
             config = MODEL_CONFIGS[self.model_id]
             
+            # Size the output token limit from the request
+            max_tokens, token_units = token_budget_planner.plan(self.model_id, "itinerary", trip_days=parse_trip_dates(travel_data)[2])
+            
             # Call Gemini API
-            response = self.client.models.generate_content(
+            response = self._generate_content(
+                request_id,
                 model=config["model"],
                 contents=prompt,
                 config=types.GenerateContentConfig(
                     responseMimeType="application/json",
                     response_json_schema=TRAVEL_ITINERARY_JSON_SCHEMA,
                     temperature=config["temperature"],
-                    maxOutputTokens=config["max_tokens"],
+                    maxOutputTokens=max_tokens,
                     topP=config.get("top_p", 0.9),
-                    system_instruction="You are an expert travel planner. Create detailed, realistic travel itineraries in the exact JSON format requested.",
+                    system_instruction=OPERATION_SYSTEM_MESSAGES["itinerary"],
                     thinking_config=types.ThinkingConfig(thinking_budget=0) # Disables thinking
                 )
             )
@@ -145,6 +180,7 @@ class GeminiService:
             # Extract AI response
             ai_response = response.text.strip()
             log_request_success(request_id, self.model_id, len(ai_response), "itinerary generation")
+            self._record_usage(response, "itinerary", token_units)
             
             # Parse and validate response using common utilities
             itinerary_data, error = safe_json_parse(ai_response, request_id, self.model_id)
@@ -152,14 +188,13 @@ class GeminiService:
                 return None, error
             
             # Validate the response structure
-            required_fields = ['destination', 'total_cost', 'budget_status', 'daily_itinerary', 'travel_tips', 'budget_breakdown']
-            validation_error = validate_response_structure(itinerary_data, required_fields)
+            validation_error = validate_response_structure(itinerary_data, ITINERARY_MODEL_FIELDS)
             
             if validation_error:
                 logger.error(f"[{request_id}] {validation_error}")
                 return None, validation_error
             
-            return itinerary_data, None
+            return complete_itinerary(itinerary_data, travel_data, request_id), None
             
         except Exception as e:
             return None, format_error_message(e, self.model_id, request_id)
@@ -190,17 +225,21 @@ class GeminiService:
             # Get model configuration
             config = MODEL_CONFIGS[self.model_id]
             
+            # Size the output token limit from the request
+            max_tokens, token_units = token_budget_planner.plan(self.model_id, "news", categories=categories)
+            
             # Call Gemini API
-            response = self.client.models.generate_content(
+            response = self._generate_content(
+                request_id,
                 model=config["model"],
                 contents=prompt,
                 config=types.GenerateContentConfig(
                     responseMimeType="application/json",
                     response_json_schema=NEWS_JSON_SCHEMA,
                     temperature=config["temperature"],
-                    maxOutputTokens=config["max_tokens"],
+                    maxOutputTokens=max_tokens,
                     topP=config.get("top_p", 0.9),
-                    system_instruction="You are an expert news aggregator. You generate realistic news articles based on specified categories and regions. Always respond in the exact JSON format requested.",
+                    system_instruction=OPERATION_SYSTEM_MESSAGES["news"],
                     thinking_config=types.ThinkingConfig(thinking_budget=0) # Disables thinking
                 )
             )
@@ -208,6 +247,7 @@ class GeminiService:
             # Extract AI response
             ai_response = response.text.strip()
             log_request_success(request_id, self.model_id, len(ai_response), "news fetching")
+            self._record_usage(response, "news", token_units)
             
             # Parse and validate response using common utilities
             news_data, error = safe_json_parse(ai_response, request_id, self.model_id)
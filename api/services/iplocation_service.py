@@ -1,5 +1,8 @@
+import ipaddress
 import requests
-from config import logger
+from config import logger, IPLOCATION_BASE_URL
+from utils.deadline import timeout_for
+from utils.timing import timed_phase
 
 class IpLocationService:
     def __init__(self):
@@ -7,20 +10,31 @@ class IpLocationService:
         pass
         
 
+    @timed_phase('geo')
     def get_location(self, ip_address: str, request_id: str) -> str:
         
         """
         Get location information based on IP address.
-        If not IP address, then use India as default.
+        If not IP address, or no IPLOCATION_BASE_URL is configured, then use India as default.
         """
         
+        if not IPLOCATION_BASE_URL:
+            return "India"
+        
         if not ip_address:
             logger.warning(f"[{request_id}][get_location] >> No IP address provided, defaulting to India")
             return "India"
         
+        # The address comes from the client-controlled X-Forwarded-For header and goes into the URL path
+        try:
+            ip_address = str(ipaddress.ip_address(ip_address.strip()))
+        except ValueError:
+            logger.warning(f"[{request_id}][get_location] >> Invalid IP address provided, defaulting to India")
+            return "India"
+        
         try:
-            url = f"https://http://ip-api.com/json/{ip_address}"
-            response = requests.get(url, timeout=5)
+            url = f"{IPLOCATION_BASE_URL}/json/{ip_address}"
+            response = requests.get(url, timeout=timeout_for(5))
             response.raise_for_status()  # Raise an error for bad responses
             data = response.json()
             
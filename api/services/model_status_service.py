@@ -0,0 +1,91 @@
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from config import logger
+from utils import json_backend
+
+class ModelStatusService:
+    """
+    Serves the model availability snapshot from memory
+    A background prober rebuilds it periodically, so requests never wait on model discovery
+    """
+
+    def __init__(self, build_snapshot: Callable[[], Dict[str, Any]], interval: float):
+        """
+        Args:
+            build_snapshot: Function that probes providers and returns the snapshot dictionary
+            interval: Seconds between background refreshes
+        """
+        self._build_snapshot = build_snapshot
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._built_at = 0.0
+        self._prober: Optional[threading.Thread] = None
+
+    def _is_stale(self) -> bool:
+        """
+        Check if there is no snapshot yet or the prober has fallen behind
+        """
+        with self._lock:
+            return self._body is None or time.monotonic() - self._built_at > self.interval * 3
+
+    def _rebuild(self) -> None:
+        """
+        Build the snapshot and pre-serialize it with its ETag (caller holds _refresh_lock)
+        """
+        snapshot = self._build_snapshot()
+        body = json_backend.dumps_bytes(snapshot)
+        etag = hashlib.sha1(body).hexdigest()[:20]
+        with self._lock:
+            self._body = body
+            self._etag = etag
+            self._built_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """
+        Rebuild the snapshot now
+        """
+        with self._refresh_lock:
+            self._rebuild()
+
+    def _probe_forever(self) -> None:
+        """
+        Background prober loop
+        """
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"ModelStatusService: Background probe failed: {str(e)}")
+
+    def _ensure_prober(self) -> None:
+        """
+        Start the background prober on first use
+        """
+        with self._lock:
+            if self._prober is None:
+                self._prober = threading.Thread(target=self._probe_forever, name="model-status-prober", daemon=True)
+                self._prober.start()
+
+    def get_snapshot(self) -> tuple[bytes, str]:
+        """
+        Get the serialized snapshot and its ETag
+        Refreshes synchronously only when there is no snapshot yet or the prober has fallen behind
+        (e.g. in serverless environments where background threads are frozen between requests)
+
+        Returns:
+            (body, etag) - body is the JSON-encoded snapshot
+        """
+        self._ensure_prober()
+        if self._is_stale():
+            # Concurrent callers wait for a single rebuild instead of each probing
+            with self._refresh_lock:
+                if self._is_stale():
+                    self._rebuild()
+        with self._lock:
+            return self._body, self._etag
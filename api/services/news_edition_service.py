@@ -0,0 +1,232 @@
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config import (
+    logger, NEWS_EDITIONS_ENABLED, NEWS_EDITIONS_INTERVAL, NEWS_EDITIONS_TOP_K, NEWS_EDITIONS_MAX_AGE,
+    NEWS_EDITIONS_MIN_REQUESTS, NEWS_EDITIONS_HALF_LIFE, NEWS_EDITIONS_MIN_HEADROOM, NEWS_EDITIONS_STORE_ON_DEMAND
+)
+from utils.request_context import new_request_id
+
+# Most (model, region, categories) combinations tracked; the least popular are forgotten beyond this
+MAX_TRACKED = 1000
+
+# (model, region, normalized categories)
+EditionKey = Tuple[str, str, Tuple[str, ...]]
+
+def edition_key(model_id: str, region: str, categories: List[str]) -> EditionKey:
+    """
+    Key of a news request, independent of category order, case and surrounding whitespace
+    """
+    return model_id, region.strip().lower(), tuple(sorted({category.strip().lower() for category in categories}))
+
+class NewsEditionService:
+    """
+    Serves pre-generated news "editions" for popular region/category combinations
+    Requests are counted per combination; a background scheduler regenerates the top-K every interval,
+    within the provider's rate budget, so those requests don't wait on an LLM call
+    """
+
+    def __init__(self, enabled: bool, interval: float, top_k: int, max_age: float, min_requests: float,
+                 half_life: float, min_headroom: float, store_on_demand: bool = False):
+        """
+        Args:
+            enabled: Whether editions are tracked, generated and served
+            interval: Seconds between pre-generation rounds
+            top_k: Combinations pre-generated per round
+            max_age: Seconds an edition is served after it was generated
+            min_requests: Decayed request count a combination needs to be pre-generated
+            half_life: Seconds after which a request counts half towards popularity
+            min_headroom: Fraction of the model's capacity (rate budget, free slots) that must be left to pre-generate
+            store_on_demand: Whether on-demand results are kept as editions too
+        """
+        self.enabled = enabled and top_k > 0
+        self.interval = interval
+        self.top_k = top_k
+        self.max_age = max_age
+        self.min_requests = min_requests
+        self.half_life = half_life
+        self.min_headroom = min_headroom
+        self.store_on_demand = store_on_demand
+        self._generate: Optional[Callable[[str, List[str], str, str], tuple]] = None
+        self._headroom: Optional[Callable[[str], float]] = None
+        self._lock = threading.Lock()
+        # key -> {"score", "updated", "region", "categories"} (the last requested spelling is used to generate)
+        self._popularity: Dict[EditionKey, Dict[str, Any]] = {}
+        # key -> {"articles", "generated_at", "pregenerated", "served"}
+        self._editions: Dict[EditionKey, Dict[str, Any]] = {}
+        self._scheduler: Optional[threading.Thread] = None
+        self._rounds = 0
+        self._generated = 0
+        self._failed = 0
+        self._skipped_for_budget = 0
+        self._served = 0
+
+    def set_generator(self, generate: Callable[[str, List[str], str, str], tuple],
+                      headroom: Callable[[str], float]) -> None:
+        """
+        Args:
+            generate: Function (model_id, categories, region, request_id) -> (articles, error_message)
+            headroom: Function returning the fraction of a model's capacity currently available (0.0 for models
+                that must never be pre-generated)
+        """
+        self._generate = generate
+        self._headroom = headroom
+
+    def _decayed(self, entry: Dict[str, Any], now: float) -> float:
+        return entry["score"] * math.exp(-math.log(2) * (now - entry["updated"]) / self.half_life)
+
+    def record_request(self, model_id: str, region: str, categories: List[str]) -> None:
+        """
+        Count a news request towards its combination's popularity
+        """
+        if not self.enabled:
+            return
+        key = edition_key(model_id, region, categories)
+        now = time.time()
+        with self._lock:
+            entry = self._popularity.get(key)
+            score = self._decayed(entry, now) if entry is not None else 0.0
+            self._popularity[key] = {"score": score + 1, "updated": now, "region": region, "categories": categories}
+            if len(self._popularity) > MAX_TRACKED:
+                least = min(self._popularity, key=lambda k: self._decayed(self._popularity[k], now))
+                del self._popularity[least]
+        self._ensure_scheduler()
+
+    def get_edition(self, model_id: str, region: str, categories: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the current edition of a combination
+
+        Returns:
+            The edition's articles, or None if there is none younger than max_age
+        """
+        if not self.enabled:
+            return None
+        key = edition_key(model_id, region, categories)
+        with self._lock:
+            edition = self._editions.get(key)
+            if edition is None or time.time() - edition["generated_at"] > self.max_age:
+                return None
+            edition["served"] += 1
+            self._served += 1
+            return edition["articles"]
+
+    def store_edition(self, model_id: str, region: str, categories: List[str], articles: List[Dict[str, Any]],
+                      pregenerated: bool = False) -> None:
+        """
+        Keep freshly generated articles as the combination's edition
+        On-demand results are only kept with store_on_demand, so by default only the top-K are served from memory
+        """
+        if not self.enabled or (not pregenerated and not self.store_on_demand):
+            return
+        key = edition_key(model_id, region, categories)
+        now = time.time()
+        with self._lock:
+            self._editions[key] = {"articles": articles, "generated_at": now, "pregenerated": pregenerated, "served": 0}
+            # Expired editions can't be served any more
+            for expired in [k for k, edition in self._editions.items() if now - edition["generated_at"] > self.max_age]:
+                del self._editions[expired]
+
+    def _top_combinations(self) -> List[Tuple[EditionKey, Dict[str, Any]]]:
+        """
+        Get the top-K combinations with at least min_requests decayed requests, most popular first
+        """
+        now = time.time()
+        with self._lock:
+            scored = [(self._decayed(entry, now), key, entry) for key, entry in self._popularity.items()]
+        scored = [item for item in scored if item[0] >= self.min_requests]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [(key, entry) for _, key, entry in scored[:self.top_k]]
+
+    def run_round(self) -> None:
+        """
+        Regenerate the editions of the most popular combinations that are due
+        A combination is due when its edition won't outlive the next round
+        """
+        if self._generate is None:
+            return
+        with self._lock:
+            self._rounds += 1
+        for key, entry in self._top_combinations():
+            model_id = key[0]
+            with self._lock:
+                edition = self._editions.get(key)
+            if edition is not None and time.time() - edition["generated_at"] + self.interval <= self.max_age:
+                continue
+
+            headroom = self._headroom(model_id) if self._headroom is not None else 1.0
+            if headroom < self.min_headroom:
+                # Leave the remaining rate budget to user requests
+                with self._lock:
+                    self._skipped_for_budget += 1
+                logger.info(f"NewsEditionService: Skipping {model_id} editions, {headroom:.0%} of its capacity left")
+                continue
+
+            request_id = new_request_id()
+            logger.info(f"[{request_id}] Pre-generating news edition for {list(key[2])} in {entry['region']} with {model_id}")
+            try:
+                articles, error = self._generate(model_id, entry["categories"], entry["region"], request_id)
+            except Exception as e:
+                articles, error = None, str(e)
+            if error or not articles:
+                with self._lock:
+                    self._failed += 1
+                logger.warning(f"[{request_id}] News edition pre-generation failed: {error}")
+                continue
+            with self._lock:
+                self._generated += 1
+            self.store_edition(model_id, entry["region"], entry["categories"], articles, pregenerated=True)
+
+    def _schedule_forever(self) -> None:
+        """
+        Background scheduler loop
+        """
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.run_round()
+            except Exception as e:
+                logger.warning(f"NewsEditionService: Pre-generation round failed: {str(e)}")
+
+    def _ensure_scheduler(self) -> None:
+        """
+        Start the background scheduler on first use
+        """
+        with self._lock:
+            if self._scheduler is None:
+                self._scheduler = threading.Thread(target=self._schedule_forever, name="news-edition-scheduler",
+                                                   daemon=True)
+                self._scheduler.start()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get the tracked combinations, current editions and counters for monitoring
+        """
+        now = time.time()
+        with self._lock:
+            editions = [
+                {
+                    "model": key[0],
+                    "region": key[1],
+                    "categories": list(key[2]),
+                    "age_s": round(now - edition["generated_at"]),
+                    "pregenerated": edition["pregenerated"],
+                    "served": edition["served"]
+                }
+                for key, edition in self._editions.items()
+            ]
+            return {
+                "enabled": self.enabled,
+                "store_on_demand": self.store_on_demand,
+                "tracked": len(self._popularity),
+                "editions": editions,
+                "rounds": self._rounds,
+                "generated": self._generated,
+                "failed": self._failed,
+                "skipped_for_budget": self._skipped_for_budget,
+                "served": self._served
+            }
+
+news_edition_service = NewsEditionService(NEWS_EDITIONS_ENABLED, NEWS_EDITIONS_INTERVAL, NEWS_EDITIONS_TOP_K,
+                                          NEWS_EDITIONS_MAX_AGE, NEWS_EDITIONS_MIN_REQUESTS, NEWS_EDITIONS_HALF_LIFE,
+                                          NEWS_EDITIONS_MIN_HEADROOM, NEWS_EDITIONS_STORE_ON_DEMAND)
@@ -1,9 +1,24 @@
 import json
+import threading
+import time
 import requests
-from typing import Dict, Any, Optional, List
-from config import logger
+from typing import Dict, Any, Optional, List, Union
+from config import (
+    logger, OLLAMA_HOSTS, OLLAMA_KEEP_ALIVE, OLLAMA_WARMUP, OLLAMA_NUM_THREAD, OLLAMA_STRUCTURED_OUTPUT,
+    OLLAMA_MODEL_PARALLELISM, OLLAMA_MAX_QUEUE
+)
 from utils.env_utils import should_initialize_local_models
-from utils.prompts import EMAIL_ENHANCEMENT_PROMPT, TRAVEL_ITINERARY_PROMPT, NEWS_FETCH_PROMPT, MODEL_CONFIGS
+from utils.prompts import (
+    EMAIL_ENHANCEMENT_CHAT_PROMPT, EMAIL_RESPONSE_JSON_SCHEMA, NEWS_FETCH_CHAT_PROMPT, NEWS_JSON_SCHEMA,
+    TRAVEL_ITINERARY_CHAT_PROMPT, TRAVEL_ITINERARY_JSON_SCHEMA, MODEL_CONFIGS, SYSTEM_MESSAGES,
+    OPERATION_SYSTEM_MESSAGES, OPERATION_CHAT_INSTRUCTIONS
+)
+from utils.token_budget import token_budget_planner
+from utils.concurrency_utils import AdmissionQueue
+from utils.deadline import timeout_for
+from utils.timing import phase
+from utils.provider_replay import provider_replay
+from utils.itinerary_utils import format_itinerary_prompt, parse_trip_dates, complete_itinerary, ITINERARY_MODEL_FIELDS
 from utils.response_utils import (
     safe_json_parse, 
     validate_response_structure, 
@@ -12,50 +27,149 @@ from utils.response_utils import (
     log_request_success
 )
 
+# Models already preloaded by this process, keyed by (base_url, ollama_model_name)
+_warmed_models = set()
+_warmed_models_lock = threading.Lock()
+
+# How long a host that refused a connection is skipped before being retried
+HOST_RETRY_COOLDOWN = 30
+
+# Smoothing factor for the per-host latency moving average
+LATENCY_EWMA_ALPHA = 0.3
+
+def _encode_response(response: requests.Response) -> Dict[str, Any]:
+    """
+    Archive an Ollama HTTP response for record/replay
+    """
+    return {"status_code": response.status_code, "text": response.text}
+
+def _decode_response(data: Dict[str, Any]) -> requests.Response:
+    """
+    Rebuild an Ollama HTTP response from its archived form
+    """
+    response = requests.Response()
+    response.status_code = data["status_code"]
+    response._content = data["text"].encode('utf-8')
+    response.encoding = 'utf-8'
+    return response
+
+class OllamaHost:
+    """
+    Tracks one Ollama server: the models it serves, its in-flight requests and its recent latency
+    """
+    
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        # model_id -> Ollama model name on this host
+        self.models: Dict[str, str] = {}
+        self.in_flight = 0
+        self.avg_latency: Optional[float] = None
+        self.down_until = 0.0
+    
+    def is_up(self) -> bool:
+        """
+        Check if the host is outside its failure cooldown
+        """
+        return time.monotonic() >= self.down_until
+    
+    def mark_down(self) -> None:
+        """
+        Skip this host for HOST_RETRY_COOLDOWN seconds
+        """
+        self.down_until = time.monotonic() + HOST_RETRY_COOLDOWN
+    
+    def record_latency(self, seconds: float) -> None:
+        """
+        Fold a completed request's latency into the moving average
+        """
+        if self.avg_latency is None:
+            self.avg_latency = seconds
+        else:
+            self.avg_latency = LATENCY_EWMA_ALPHA * seconds + (1 - LATENCY_EWMA_ALPHA) * self.avg_latency
+    
+    def load_key(self) -> tuple:
+        """
+        Sort key for least-loaded routing: fewest in-flight requests, then lowest recent latency
+        """
+        return (self.in_flight, self.avg_latency or 0.0)
+    
+    def status(self, include_load: bool = True) -> Dict[str, Any]:
+        """
+        Get the host state for monitoring
+
+        Args:
+            include_load: Whether to include the live in_flight and avg_latency_ms counters
+        """
+        status = {
+            "url": self.base_url,
+            "up": self.is_up(),
+            "models": list(self.models.keys())
+        }
+        if include_load:
+            status["in_flight"] = self.in_flight
+            status["avg_latency_ms"] = round(self.avg_latency * 1000) if self.avg_latency is not None else None
+        return status
+
 class OllamaService:
     """
     Service class for interacting with local Ollama models
     Only available in development environment
-    Dynamically discovers available models from Ollama
+    Dynamically discovers available models from one or more Ollama hosts and routes
+    each generation to the least-loaded host that has the model
     """
     
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(self, base_url: Optional[Union[str, List[str]]] = None):
         # Only initialize in development environment
         self.is_development = should_initialize_local_models()
+        self._hosts_lock = threading.Lock()
+        # model_id -> admission queue bounding concurrent generations for that model
+        self._queues: Dict[str, AdmissionQueue] = {}
         
         if not self.is_development:
             logger.info("OllamaService: Not initializing in production environment")
             self.base_url = None
+            self.hosts = []
             self.supported_models = {}
             return
-            
-        self.base_url = base_url
+        
+        base_urls = [base_url] if isinstance(base_url, str) else (base_url or OLLAMA_HOSTS)
+        self.hosts = [OllamaHost(url) for url in base_urls]
+        # Primary host, kept for single-host callers and log messages
+        self.base_url = self.hosts[0].base_url
         self.supported_models = {}
         
         # Dynamically discover available models
-        self._discover_available_models()
+        for host in self.hosts:
+            self._discover_available_models(host)
         
         if self.supported_models:
             logger.info(f"OllamaService: Initialized with {len(self.supported_models)} discovered model(s): {list(self.supported_models.keys())}")
+            if OLLAMA_WARMUP:
+                self._warm_up_models()
         else:
             logger.warning("OllamaService: No models discovered. Ensure Ollama is running and models are loaded.")
+        
+        # Replayed calls need no host, so the recorded models are offered even when no host serves them
+        for model_id in provider_replay.recorded_models("ollama"):
+            self.supported_models.setdefault(model_id, model_id)
     
-    def _discover_available_models(self) -> None:
+    def _discover_available_models(self, host: OllamaHost) -> bool:
         """
-        Dynamically discover available models from Ollama
+        Dynamically discover available models from an Ollama host
         Queries the /api/tags endpoint and creates dynamic model IDs
+        Returns: True if the host answered
         """
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = requests.get(f"{host.base_url}/api/tags", timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 models = data.get("models", [])
                 
                 if not models:
-                    logger.warning("OllamaService: No models found in Ollama")
-                    return
+                    logger.warning(f"OllamaService: No models found in Ollama at {host.base_url}")
                 
                 # Dynamically create model IDs and map to Ollama model names
+                discovered = {}
                 for model in models:
                     model_name = model.get("name", "")
                     if model_name:
@@ -68,17 +182,49 @@ class OllamaService:
                         model_id = f"local-{base_name}"
                         
                         # Store mapping (use full model name including tags for accuracy)
-                        self.supported_models[model_id] = model_name
+                        discovered[model_id] = model_name
                         
-                        logger.info(f"OllamaService: Discovered model - {model_id} -> {model_name}")
+                        if host.models.get(model_id) != model_name:
+                            logger.info(f"OllamaService: Discovered model at {host.base_url} - {model_id} -> {model_name}")
+                
+                with self._hosts_lock:
+                    host.models = discovered
+                    for model_id, model_name in discovered.items():
+                        self.supported_models.setdefault(model_id, model_name)
+                return True
             else:
-                logger.warning(f"OllamaService: Failed to fetch models from Ollama (status {response.status_code})")
+                logger.warning(f"OllamaService: Failed to fetch models from Ollama at {host.base_url} (status {response.status_code})")
         except requests.exceptions.ConnectionError:
-            logger.warning("OllamaService: Cannot connect to Ollama service. Ensure Ollama is running.")
+            logger.warning(f"OllamaService: Cannot connect to Ollama at {host.base_url}. Ensure Ollama is running.")
         except requests.exceptions.Timeout:
-            logger.warning("OllamaService: Timeout connecting to Ollama service.")
+            logger.warning(f"OllamaService: Timeout connecting to Ollama at {host.base_url}.")
         except Exception as e:
             logger.warning(f"OllamaService: Error discovering available models: {str(e)}")
+        return False
+    
+    def refresh_models(self) -> tuple[bool, Dict[str, bool]]:
+        """
+        Re-discover the models on every host with a single /api/tags call per host
+        Hosts that answer are put back into rotation; hosts that don't are skipped until they recover
+        
+        Returns:
+            (ollama_available, model_availability) - model_availability maps every known model ID
+            to whether at least one reachable host serves it
+        """
+        if not self.is_development:
+            return False, {}
+        
+        reachable = False
+        served = set()
+        for host in self.hosts:
+            if self._discover_available_models(host):
+                reachable = True
+                host.down_until = 0.0
+                served.update(host.models.keys())
+            else:
+                host.mark_down()
+        
+        return reachable, {model_id: model_id in served for model_id in self.supported_models}
     
     def _get_model_config(self, model_id: str) -> Dict[str, Any]:
         """
@@ -99,10 +245,85 @@ class OllamaService:
         return {
             "temperature": 0.7,
             "top_p": 0.9,
-            "max_tokens": 2000,
+            "max_output_tokens": 8192,
+            "num_ctx": 8192,
             "timeout": 60
         }
     
+    def _load_options(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the Ollama options that determine how a model is loaded
+        These must be identical for warm-up and generation, otherwise Ollama reloads the model
+        
+        Args:
+            config: Model configuration from _get_model_config()
+            
+        Returns:
+            Dictionary of Ollama load options (num_ctx, num_thread)
+        """
+        options = {}
+        if config.get("num_ctx"):
+            options["num_ctx"] = config["num_ctx"]
+        num_thread = config.get("num_thread", OLLAMA_NUM_THREAD)
+        if num_thread:
+            options["num_thread"] = num_thread
+        return options
+    
+    def _build_options(self, config: Dict[str, Any], max_tokens: int) -> Dict[str, Any]:
+        """
+        Map a model configuration onto Ollama generation options
+        
+        Args:
+            config: Model configuration from _get_model_config()
+            max_tokens: Output token limit for this request
+            
+        Returns:
+            Dictionary for the "options" field of an Ollama request
+        """
+        return {
+            "temperature": config.get("temperature", 0.7),
+            "top_p": config.get("top_p", 0.9),
+            "num_predict": max_tokens,
+            **self._load_options(config)
+        }
+    
+    def _warm_up_models(self) -> None:
+        """
+        Preload discovered models in the background so the first request doesn't pay for a cold model load
+        Each model is warmed at most once per process, even with several OllamaService instances
+        """
+        with _warmed_models_lock:
+            pending = [
+                (host, model_id, model_name) for host in self.hosts for model_id, model_name in host.models.items()
+                if (host.base_url, model_name) not in _warmed_models
+            ]
+            _warmed_models.update((host.base_url, model_name) for host, _, model_name in pending)
+        
+        if not pending:
+            return
+        
+        def warm_up():
+            for host, model_id, model_name in pending:
+                try:
+                    # A generate request without a prompt only loads the model
+                    response = requests.post(
+                        f"{host.base_url}/api/generate",
+                        json={
+                            "model": model_name,
+                            "keep_alive": OLLAMA_KEEP_ALIVE,
+                            "options": self._load_options(self._get_model_config(model_id))
+                        },
+                        timeout=300
+                    )
+                    if response.status_code == 200:
+                        logger.info(f"OllamaService: Warmed up model {model_name} at {host.base_url}")
+                    else:
+                        logger.warning(f"OllamaService: Warm-up failed for {model_name} at {host.base_url} (status {response.status_code})")
+                except Exception as e:
+                    logger.warning(f"OllamaService: Warm-up failed for {model_name} at {host.base_url}: {str(e)}")
+        
+        threading.Thread(target=warm_up, name="ollama-warmup", daemon=True).start()
+    
     def get_available_model_ids(self) -> List[str]:
         """
         Get list of all available local model IDs
@@ -114,42 +335,177 @@ class OllamaService:
     
     def is_available(self) -> bool:
         """
-        Check if the Ollama service is available
-        Always returns False in production
+        Check if the Ollama service is available: at least one host is outside its failure cooldown
+        Answered from the tracked host state (refreshed by the model status prober and by failed calls) rather
+        than a live probe, so the request path never waits on /api/tags
+        Always returns False in production; always True in replay mode, which needs no host
         """
         if not self.is_development:
             return False
-            
-        try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            return response.status_code == 200
-        except Exception as e:
-            logger.warning(f"Ollama service check failed: {str(e)}")
-            return False
+        if provider_replay.mode == "replay":
+            return True
+        
+        with self._hosts_lock:
+            return any(host.is_up() for host in self.hosts)
     
     def is_model_available(self, model_id: str) -> bool:
         """
-        Check if a specific model is available in Ollama
-        Always returns False in production
+        Check if a specific model is available in Ollama: a host outside its failure cooldown serves it
+        Always returns False in production; in replay mode, True for the models with recordings
         """
         if not self.is_development:
             return False
+        if provider_replay.mode == "replay":
+            return model_id in self.supported_models
+        
+        with self._hosts_lock:
+            return any(model_id in host.models and host.is_up() for host in self.hosts)
+    
+    def get_host_status(self, include_load: bool = True) -> List[Dict[str, Any]]:
+        """
+        Get the routing state of every configured Ollama host
+        
+        Args:
+            include_load: Whether to include the live load counters (leave them out of cached snapshots, whose
+                ETag would otherwise change on every refresh)
             
-        try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code == 200:
-                models = response.json().get("models", [])
-                ollama_model_name = self.supported_models.get(model_id)
-                if ollama_model_name:
-                    return any(model.get("name", "").startswith(ollama_model_name) for model in models)
-            return False
-        except Exception as e:
-            logger.warning(f"Model availability check failed for {model_id}: {str(e)}")
-            return False
+        Returns:
+            List of host status dictionaries (url, up, models, and with include_load in_flight, avg_latency_ms)
+        """
+        with self._hosts_lock:
+            return [host.status(include_load) for host in self.hosts]
+    
+    def _get_queue(self, model_id: str) -> AdmissionQueue:
+        """
+        Get the admission queue for a model, sized to OLLAMA_MODEL_PARALLELISM per host serving it
+        """
+        with self._hosts_lock:
+            queue = self._queues.get(model_id)
+            if queue is None:
+                host_count = sum(1 for host in self.hosts if model_id in host.models)
+                queue = AdmissionQueue(model_id, OLLAMA_MODEL_PARALLELISM * max(1, host_count), OLLAMA_MAX_QUEUE)
+                self._queues[model_id] = queue
+            return queue
+    
+    def headroom(self, model_id: str) -> float:
+        """
+        Fraction of a model's generation slots currently free, for deferrable background work
+        0.0 in production and when no reachable host serves the model
+        """
+        if not self.is_development:
+            return 0.0
+        with self._hosts_lock:
+            served = any(model_id in host.models and host.is_up() for host in self.hosts)
+        return self._get_queue(model_id).headroom() if served else 0.0
+
+    def get_queue_status(self) -> List[Dict[str, Any]]:
+        """
+        Get the admission queue state of every local model that has received requests
+        
+        Returns:
+            List of queue status dictionaries (active, waiting, rejected, wait and run times, ...)
+        """
+        with self._hosts_lock:
+            queues = list(self._queues.values())
+        return [queue.status() for queue in queues]
+    
+    def _acquire_host(self, model_id: str, exclude: List[OllamaHost]) -> Optional[OllamaHost]:
+        """
+        Pick the least-loaded reachable host that serves a model and count the request against it
+        
+        Args:
+            model_id: The model ID to route
+            exclude: Hosts already tried for this request
+            
+        Returns:
+            The selected host, or None if no host can serve the model
+        """
+        with self._hosts_lock:
+            candidates = [host for host in self.hosts if model_id in host.models and host not in exclude]
+            up_candidates = [host for host in candidates if host.is_up()]
+            # If every host with the model is cooling down, try one anyway rather than failing outright
+            pool = up_candidates or candidates
+            if not pool:
+                return None
+            host = min(pool, key=OllamaHost.load_key)
+            host.in_flight += 1
+            return host
+    
+    def _release_host(self, host: OllamaHost, elapsed: Optional[float]) -> None:
+        """
+        Finish a request on a host, recording its latency if it completed
+        """
+        with self._hosts_lock:
+            host.in_flight -= 1
+            if elapsed is not None:
+                host.record_latency(elapsed)
+    
+    def _post_chat(self, model_id: str, payload: Dict[str, Any], timeout: float, request_id: str) -> requests.Response:
+        """
+        Send a chat request to the least-loaded host with the model, failing over to the next host
+        when a host cannot be reached
+        
+        Args:
+            model_id: The model ID (used to pick hosts and the host-specific model name)
+            payload: Chat request body without the "model" field
+            timeout: Request timeout in seconds (capped by the request deadline on each attempt)
+            request_id: Request identifier for logging
+            
+        Returns:
+            The Ollama HTTP response
+            
+        Raises:
+            requests.exceptions.ConnectionError: If no host with the model could be reached
+        """
+        tried: List[OllamaHost] = []
+        last_error: Optional[Exception] = None
+        
+        while True:
+            host = self._acquire_host(model_id, tried)
+            if host is None:
+                raise last_error or requests.exceptions.ConnectionError(f"No Ollama host serves {model_id}")
+            tried.append(host)
+            
+            started = time.monotonic()
+            elapsed = None
+            try:
+                logger.info(f"[{request_id}] Routing {model_id} to {host.base_url} ({host.in_flight} in flight)")
+                response = requests.post(
+                    f"{host.base_url}/api/chat",
+                    json={**payload, "model": host.models[model_id]},
+                    timeout=timeout_for(timeout)
+                )
+                elapsed = time.monotonic() - started
+                return response
+            except requests.exceptions.ConnectionError as e:
+                logger.warning(f"[{request_id}] Ollama host {host.base_url} unreachable, failing over: {str(e)}")
+                host.mark_down()
+                last_error = e
+            finally:
+                self._release_host(host, elapsed)
     
-    def _call_ollama(self, prompt: str, model_id: str, request_id: str) -> tuple[Optional[str], Optional[str]]:
+    def _system_message(self, model_id: str, operation: str) -> str:
         """
-        Make a call to the local Ollama API
+        Build the system message for an operation
+        It is identical for every request of the same model and operation, so Ollama can reuse the
+        cached KV prefix instead of re-evaluating the instructions each time
+        
+        Args:
+            model_id: The model ID
+            operation: One of "email", "itinerary" or "news"
+            
+        Returns:
+            System message with the operation's role and static instructions
+        """
+        role = SYSTEM_MESSAGES.get(model_id) if operation == "email" else None
+        return (role or OPERATION_SYSTEM_MESSAGES[operation]) + "\n" + OPERATION_CHAT_INSTRUCTIONS[operation]
+    
+    def _call_ollama(self, prompt: str, model_id: str, request_id: str, operation: str, json_schema: Optional[Dict[str, Any]] = None, **budget_inputs: Any) -> tuple[Optional[str], Optional[str]]:
+        """
+        Make a call to the local Ollama chat API
+        The prompt is sent as the user message after the operation's stable system message
+        The output token limit is planned from the operation and its inputs (see utils/token_budget.py)
+        If json_schema is given (and OLLAMA_STRUCTURED_OUTPUT is enabled), generation is constrained to it
         Returns: (response_text, error_message)
         """
         if not self.is_development:
@@ -163,37 +519,72 @@ class OllamaService:
             # Get model configuration (will use defaults if not in MODEL_CONFIGS)
             config = self._get_model_config(model_id)
             
+            # Size the output token limit from the request
+            max_tokens, token_units = token_budget_planner.plan(model_id, operation, **budget_inputs)
+            
             payload = {
-                "model": ollama_model_name,
-                "prompt": prompt,
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": self._system_message(model_id, operation)
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
                 "stream": False,
-                "options": {
-                    "temperature": config.get("temperature", 0.7),
-                    "top_p": config.get("top_p", 0.9),
-                    "max_tokens": config.get("max_tokens", 2000)
-                }
+                "keep_alive": OLLAMA_KEEP_ALIVE,
+                "options": self._build_options(config, max_tokens)
             }
             
+            if json_schema and OLLAMA_STRUCTURED_OUTPUT:
+                payload["format"] = json_schema
+            
+            # Wait for a free generation slot for this model, or fail fast if too many requests are queued
+            # Waiting never outlasts the request deadline, and a generation still running at the deadline is
+            # abandoned by closing the connection, which makes Ollama stop generating
+            queue = self._get_queue(model_id)
+            with phase('model_queue'):
+                admitted, queue_wait, reason = queue.acquire(timeout=timeout_for(config.get("timeout", 60)))
+            if not admitted:
+                logger.warning(f"[{request_id}] {model_id} request rejected ({reason}) after {queue_wait * 1000:.0f} ms in queue")
+                if reason == "queue_full":
+                    return None, f"Local model {model_id} is busy. Please try again in a moment."
+                return None, f"Timed out waiting for local model {model_id}. Please try again in a moment."
+            
             logger.info(f"[{request_id}] Calling Ollama API with model: {ollama_model_name}")
             
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=config.get("timeout", 60)
-            )
+            generation_started = time.monotonic()
+            try:
+                with phase('llm'):
+                    response = provider_replay.call(
+                        "ollama",
+                        {"model": model_id, "messages": payload["messages"], "format": payload.get("format")},
+                        lambda: self._post_chat(model_id, payload, config.get("timeout", 60), request_id),
+                        encode=_encode_response,
+                        decode=_decode_response
+                    )
+            finally:
+                generation_time = time.monotonic() - generation_started
+                queue.release(generation_time)
+            logger.info(f"[{request_id}] {model_id} queue wait: {queue_wait * 1000:.0f} ms, generation: {generation_time * 1000:.0f} ms")
             
             if response.status_code != 200:
                 logger.error(f"[{request_id}] Ollama API error: {response.status_code} - {response.text}")
                 return None, f"Ollama API error: {response.status_code} - {response.text}"
             
             result = response.json()
-            ai_response = result.get("response", "")
+            ai_response = (result.get("message") or {}).get("content", "")
             
             if not ai_response:
                 logger.error(f"[{request_id}] Ollama returned empty response")
                 return None, "Ollama returned empty response"
             
-            logger.info(f"[{request_id}] Ollama response received: {len(ai_response)} characters")
+            token_budget_planner.record(model_id, operation, token_units, result.get("eval_count"), result.get("done_reason") == "length")
+            
+            # A low prompt_eval_count means the shared system prefix was served from the KV cache
+            logger.info(f"[{request_id}] Ollama response received: {len(ai_response)} characters, {result.get('prompt_eval_count')} prompt tokens evaluated")
             logger.debug(f"[{request_id}] Ollama response preview: {ai_response[:200]}...")
             
             return ai_response, None
@@ -237,13 +628,13 @@ class OllamaService:
             return None, f"Model {model_id} not available. Please ensure the model is loaded in Ollama."
         
         # Use common prompt from prompts module
-        prompt = EMAIL_ENHANCEMENT_PROMPT.format(email_content=email_content)
+        prompt = EMAIL_ENHANCEMENT_CHAT_PROMPT.format(email_content=email_content)
         
         try:
             log_request_start(request_id, model_id, "email enhancement")
             
             # Call Ollama API
-            ai_response, error = self._call_ollama(prompt, model_id, request_id)
+            ai_response, error = self._call_ollama(prompt, model_id, request_id, "email", EMAIL_RESPONSE_JSON_SCHEMA, email_content=email_content)
             if error:
                 return None, error
             
@@ -281,36 +672,14 @@ class OllamaService:
         if not self.is_model_available(model_id):
             return None, f"Model {model_id} not available. Please ensure the model is loaded in Ollama."
         
-        # Extract travel details
-        destination = travel_data['destination']
-        budget = travel_data['budget']
-        start_date = travel_data['start_date']
-        end_date = travel_data['end_date']
-        travelers = travel_data['travelers']
-        preferences = travel_data['preferences']
-        
-        # Calculate trip duration
-        from datetime import datetime
-        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-        trip_days = (end_dt - start_dt).days + 1
-        
-        # Use common prompt from prompts module
-        prompt = TRAVEL_ITINERARY_PROMPT.format(
-            trip_days=trip_days,
-            start_date=start_date,
-            end_date=end_date,
-            destination=destination,
-            budget=budget,
-            travelers=travelers,
-            preferences_text=', '.join(preferences) if isinstance(preferences, list) else str(preferences)
-        )
+        # Build prompt (calendar fields are computed on the server, not by the model)
+        prompt = format_itinerary_prompt(travel_data, TRAVEL_ITINERARY_CHAT_PROMPT)
         
         try:
             log_request_start(request_id, model_id, "itinerary generation")
             
             # Call Ollama API
-            ai_response, error = self._call_ollama(prompt, model_id, request_id)
+            ai_response, error = self._call_ollama(prompt, model_id, request_id, "itinerary", TRAVEL_ITINERARY_JSON_SCHEMA, trip_days=parse_trip_dates(travel_data)[2])
             if error:
                 return None, error
             
@@ -322,14 +691,13 @@ class OllamaService:
                 return None, error
             
             # Validate the response structure
-            required_fields = ['destination', 'total_cost', 'budget_status', 'daily_itinerary', 'travel_tips', 'budget_breakdown']
-            validation_error = validate_response_structure(itinerary_data, required_fields)
+            validation_error = validate_response_structure(itinerary_data, ITINERARY_MODEL_FIELDS)
             
             if validation_error:
                 logger.error(f"[{request_id}] {validation_error}")
                 return None, validation_error
             
-            return itinerary_data, None
+            return complete_itinerary(itinerary_data, travel_data, request_id), None
             
         except Exception as e:
             return None, format_error_message(e, model_id, request_id)
@@ -350,13 +718,13 @@ class OllamaService:
         
         # Use common prompt from prompts module
         categories_text = ", ".join(categories)
-        prompt = NEWS_FETCH_PROMPT.format(categories=categories_text, region=region)
+        prompt = NEWS_FETCH_CHAT_PROMPT.format(categories=categories_text, region=region)
         
         try:
             log_request_start(request_id, model_id, "news fetching")
             
             # Call Ollama API
-            ai_response, error = self._call_ollama(prompt, model_id, request_id)
+            ai_response, error = self._call_ollama(prompt, model_id, request_id, "news", NEWS_JSON_SCHEMA, categories=categories)
             if error:
                 return None, error
             
@@ -389,4 +757,18 @@ class OllamaService:
             return articles, None
             
         except Exception as e:
-            return None, format_error_message(e, model_id, request_id) 
\ No newline at end of file
+            return None, format_error_message(e, model_id, request_id) 
+
+# Shared service instance, so host load and model state are tracked once per process
+_shared_service: Optional[OllamaService] = None
+_shared_service_lock = threading.Lock()
+
+def get_ollama_service() -> OllamaService:
+    """
+    Get the process-wide OllamaService, creating it on first use
+    """
+    global _shared_service
+    with _shared_service_lock:
+        if _shared_service is None:
+            _shared_service = OllamaService()
+        return _shared_service
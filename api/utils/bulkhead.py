@@ -0,0 +1,82 @@
+"""
+Per-tool bulkheads
+This module gives each tool (email, travel, news) its own bounded set of execution slots and wait queue, so a
+burst of slow requests for one tool is rejected at its own limit instead of occupying every server thread.
+"""
+
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, Iterator, List
+from config import logger, BULKHEAD_LIMITS
+from utils.concurrency_utils import AdmissionQueue
+from utils.response_helpers import error_response
+from utils.deadline import remaining
+from utils.timing import phase
+
+# One admission queue per tool, sized from BULKHEAD_LIMITS
+_bulkheads: Dict[str, AdmissionQueue] = {
+    name: AdmissionQueue(f"bulkhead:{name}", limits["max_concurrency"], limits["max_queue"])
+    for name, limits in BULKHEAD_LIMITS.items()
+}
+
+def bulkhead(name: str):
+    """
+    Route decorator that runs the view inside the named tool's bulkhead
+    Requests beyond the tool's concurrency and queue limits get a 503 with Retry-After
+
+    Args:
+        name: Tool name (key in BULKHEAD_LIMITS)
+    """
+    queue = _bulkheads[name]
+    timeout = BULKHEAD_LIMITS[name]["queue_timeout"]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            left = remaining()
+            with phase('queue'):
+                admitted, wait, reason = queue.acquire(timeout=timeout if left is None else max(0.0, min(timeout, left)))
+            if not admitted:
+                logger.warning(f"{name} bulkhead rejected a request ({reason}) after {wait:.2f}s")
+                response, status_code = error_response(f"The {name} service is busy. Please try again in a moment.", 503)
+                response.headers['Retry-After'] = str(max(1, int(timeout)))
+                return response, status_code
+            if wait >= 0.5:
+                logger.info(f"{name} bulkhead admitted a request after waiting {wait:.2f}s")
+
+            started = time.monotonic()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                queue.release(time.monotonic() - started)
+        return wrapper
+    return decorator
+
+@contextmanager
+def background_slot(name: str) -> Iterator[bool]:
+    """
+    Run deferrable background work in a free slot of the named tool's bulkhead, never queueing ahead of requests
+    Yields whether a slot was free; the work should be skipped when it wasn't
+    """
+    queue = _bulkheads[name]
+    if not queue.try_acquire():
+        yield False
+        return
+    started = time.monotonic()
+    try:
+        yield True
+    finally:
+        queue.release(time.monotonic() - started)
+
+def bulkhead_headroom(name: str) -> float:
+    """
+    Fraction of the named tool's bulkhead slots currently free
+    """
+    return _bulkheads[name].headroom()
+
+def get_bulkhead_status() -> List[Dict[str, Any]]:
+    """
+    Get the slots, queue and counters of every tool bulkhead for monitoring
+    """
+    return [queue.status() for queue in _bulkheads.values()]
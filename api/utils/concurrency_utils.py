@@ -0,0 +1,119 @@
+"""
+Concurrency utilities
+This module provides a bounded admission queue that limits how many requests run at once, caps how many
+may wait for a slot, and reports queue-wait time separately from execution time.
+"""
+
+import threading
+import time
+from typing import Dict, Any, Optional
+
+class AdmissionQueue:
+    """
+    Admits at most max_concurrency holders at a time, with at most max_queue callers waiting
+    Callers beyond the queue limit are rejected immediately instead of piling up
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._condition = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._completed = 0
+        self._total_run = 0.0
+
+    def acquire(self, timeout: Optional[float] = None) -> tuple[bool, float, Optional[str]]:
+        """
+        Wait for a free slot
+
+        Args:
+            timeout: Maximum seconds to wait in the queue (None waits indefinitely)
+
+        Returns:
+            (admitted, wait_seconds, reason) - reason is "queue_full" or "timeout" when not admitted
+        """
+        started = time.monotonic()
+        with self._condition:
+            if self._active >= self.max_concurrency and self._waiting >= self.max_queue:
+                self._rejected += 1
+                return False, 0.0, "queue_full"
+
+            self._waiting += 1
+            try:
+                deadline = started + timeout if timeout is not None else None
+                while self._active >= self.max_concurrency:
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        self._timed_out += 1
+                        return False, time.monotonic() - started, "timeout"
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+            self._active += 1
+            wait = time.monotonic() - started
+            self._admitted += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            return True, wait, None
+
+    def release(self, run_seconds: Optional[float] = None) -> None:
+        """
+        Free a slot taken by a successful acquire()
+
+        Args:
+            run_seconds: How long the slot was used, for the average run time metric
+        """
+        with self._condition:
+            self._active -= 1
+            if run_seconds is not None:
+                self._completed += 1
+                self._total_run += run_seconds
+            self._condition.notify()
+
+    def try_acquire(self) -> bool:
+        """
+        Take a slot only if one is free and nobody is waiting for it (for deferrable background work)
+        Release it with release() like a slot taken by acquire()
+        """
+        with self._condition:
+            if self._active >= self.max_concurrency or self._waiting > 0:
+                return False
+            self._active += 1
+            self._admitted += 1
+            return True
+
+    def headroom(self) -> float:
+        """
+        Fraction of slots currently free (0.0 while callers are waiting)
+        """
+        with self._condition:
+            if self._waiting > 0:
+                return 0.0
+            return max(0, self.max_concurrency - self._active) / self.max_concurrency
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get the queue state and counters for monitoring
+        """
+        with self._condition:
+            return {
+                "name": self.name,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "waiting": self._waiting,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "avg_wait_ms": round(self._total_wait / self._admitted * 1000, 1) if self._admitted else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 1),
+                "avg_run_ms": round(self._total_run / self._completed * 1000, 1) if self._completed else 0.0
+            }
@@ -0,0 +1,168 @@
+"""
+Itinerary cost utilities
+This module parses the free-form cost strings in generated itineraries, totals them per day and per
+budget category, and reconciles total_cost, budget_breakdown and budget_status against the requested budget.
+"""
+
+import re
+from typing import Dict, Any, Optional, List
+from config import logger
+
+BUDGET_CATEGORIES = ['accommodation', 'food', 'activities', 'transportation', 'other']
+
+# Activity types that are itemized under a budget category other than "activities"
+ACTIVITY_TYPE_CATEGORIES = {
+    'food': 'food'
+}
+
+_AMOUNT_PATTERN = re.compile(r'\d[\d,]*(?:\.\d+)?')
+_FREE_PATTERN = re.compile(r'\b(free|included|no cost|complimentary)\b', re.IGNORECASE)
+
+def parse_amount(value: Any) -> Optional[float]:
+    """
+    Extract a numeric amount from a cost value such as "$1,250", "$20-30", "Free" or 80
+
+    Ranges are resolved to their midpoint.
+
+    Args:
+        value: Cost value returned by the model
+
+    Returns:
+        The amount as a float, or None if no amount could be found
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+
+    amounts = _AMOUNT_PATTERN.findall(value)
+    if not amounts:
+        return 0.0 if _FREE_PATTERN.search(value) else None
+
+    first = float(amounts[0].replace(',', ''))
+    if len(amounts) > 1 and re.search(r'\d\s*(?:-|–|to)\s*\$?\d', value):
+        return (first + float(amounts[1].replace(',', ''))) / 2
+    return first
+
+def format_amount(amount: float) -> str:
+    """
+    Format an amount in the "$1,250" style used in itinerary responses
+
+    Args:
+        amount: Amount in dollars
+
+    Returns:
+        Formatted amount string
+    """
+    if float(amount).is_integer():
+        return f"${amount:,.0f}"
+    return f"${amount:,.2f}"
+
+def compute_budget_status(total_cost: Any, budget: Any) -> str:
+    """
+    Compare the itinerary total cost against the requested budget
+
+    Args:
+        total_cost: Total cost value (string or number)
+        budget: Requested budget
+
+    Returns:
+        'within_budget' or 'over_budget'
+    """
+    total = parse_amount(total_cost)
+    limit = parse_amount(budget)
+    if total is None or limit is None:
+        return "within_budget"
+    return "within_budget" if total <= limit else "over_budget"
+
+def summarize_activity_costs(daily_itinerary: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Total the activity costs of an itinerary in a single pass
+
+    Args:
+        daily_itinerary: List of day dictionaries with an "activities" list
+
+    Returns:
+        Dictionary with day_totals (one per day), category_totals (keyed by budget category),
+        total and unparsed (count of activity costs that could not be parsed)
+    """
+    day_totals: List[float] = []
+    category_totals = {category: 0.0 for category in BUDGET_CATEGORIES}
+    unparsed = 0
+
+    for day in daily_itinerary:
+        day_total = 0.0
+        activities = day.get('activities') if isinstance(day, dict) else None
+        for activity in activities or []:
+            if not isinstance(activity, dict):
+                continue
+            amount = parse_amount(activity.get('cost'))
+            if amount is None:
+                unparsed += 1
+                continue
+            day_total += amount
+            activity_type = str(activity.get('type', '')).lower()
+            category_totals[ACTIVITY_TYPE_CATEGORIES.get(activity_type, 'activities')] += amount
+        day_totals.append(day_total)
+
+    return {
+        "day_totals": day_totals,
+        "category_totals": category_totals,
+        "total": sum(day_totals),
+        "unparsed": unparsed
+    }
+
+def reconcile_costs(itinerary_data: Dict[str, Any], budget: Any, request_id: str) -> Dict[str, Any]:
+    """
+    Make an itinerary's cost fields internally consistent
+
+    Each budget category is raised to at least the sum of its itemized activities, total_cost is set to the
+    sum of the budget categories, each day gets a day_total, and budget_status is derived from the budget.
+    The itinerary is updated in place.
+
+    Args:
+        itinerary_data: Itinerary in the public response format
+        budget: Requested budget
+        request_id: Request identifier for logging
+
+    Returns:
+        The reconciled itinerary
+    """
+    daily_itinerary = itinerary_data.get('daily_itinerary') or []
+    summary = summarize_activity_costs(daily_itinerary)
+
+    for day, day_total in zip(daily_itinerary, summary['day_totals']):
+        if isinstance(day, dict):
+            day['day_total'] = format_amount(day_total)
+
+    raw_breakdown = itinerary_data.get('budget_breakdown')
+    if not isinstance(raw_breakdown, dict):
+        raw_breakdown = {}
+
+    breakdown: Dict[str, str] = {}
+    breakdown_total = 0.0
+    for category in BUDGET_CATEGORIES:
+        stated = parse_amount(raw_breakdown.get(category))
+        itemized = summary['category_totals'][category]
+        amount = max(stated or 0.0, itemized)
+        if stated is not None and amount != stated:
+            logger.info(f"[{request_id}] Reconciled budget_breakdown.{category}: {format_amount(stated)} -> {format_amount(amount)}")
+        breakdown[category] = format_amount(amount)
+        breakdown_total += amount
+
+    # Keep any extra categories the model added, and count them towards the total
+    for category, value in raw_breakdown.items():
+        if category in breakdown:
+            continue
+        breakdown[category] = value
+        breakdown_total += parse_amount(value) or 0.0
+
+    if summary['unparsed']:
+        logger.warning(f"[{request_id}] {summary['unparsed']} activity cost(s) could not be parsed")
+
+    itinerary_data['budget_breakdown'] = breakdown
+    itinerary_data['total_cost'] = format_amount(breakdown_total)
+    itinerary_data['budget_status'] = compute_budget_status(breakdown_total, budget)
+    return itinerary_data
@@ -0,0 +1,236 @@
+"""
+API credential pools
+This module keeps a client and a rate limiter per provider API key, spreads calls across the keys with
+smooth weighted round-robin, takes throttled or rejected keys out of rotation, and retries failed calls
+on the next available key.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from config import (
+    logger, DEEPSEEK_API_KEYS, GEMINI_API_KEYS, PROVIDER_RATE_LIMITS, PROVIDER_MAX_RETRIES,
+    create_deepseek_client, create_gemini_client
+)
+from utils.rate_limit import ProviderRateLimiter, RateLimitExceeded, classify_error, backoff_delay, error_token_usage
+from utils.deadline import remaining
+from utils.timing import phase
+from utils.request_context import add_provider_request_id
+
+# How long a key rejected as unauthorized or forbidden is left out of rotation (seconds)
+AUTH_FAILURE_COOLDOWN = 300
+
+class ApiCredential:
+    """
+    One API key of a provider, with its own client, rate budget and health counters
+    """
+
+    def __init__(self, label: str, client: Any, weight: int, limiter: ProviderRateLimiter):
+        self.label = label
+        self.client = client
+        self.weight = weight
+        self.limiter = limiter
+        # Smooth weighted round-robin state
+        self.current_weight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error_status: Optional[int] = None
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get the key's health and budget for monitoring (never includes the key itself)
+        """
+        return {
+            "label": self.label,
+            "weight": self.weight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error_status": self.last_error_status,
+            **self.limiter.status()
+        }
+
+class CredentialPool:
+    """
+    Spreads calls to one provider across its API keys
+    """
+
+    def __init__(self, provider: str, credentials: List[ApiCredential]):
+        self.provider = provider
+        self.credentials = credentials
+        self._lock = threading.Lock()
+        self._retries = 0
+
+    def is_available(self) -> bool:
+        """
+        Check if the provider has at least one API key configured
+        """
+        return bool(self.credentials)
+
+    def _select(self, tokens: float) -> ApiCredential:
+        """
+        Pick the next key by smooth weighted round-robin among the keys that can take a call right now
+        Falls back to the key that frees up soonest when every key is throttled or out of budget
+        """
+        with self._lock:
+            waits = [(credential, credential.limiter.wait_time(tokens)) for credential in self.credentials]
+            ready = [credential for credential, wait in waits if wait == 0]
+            if not ready:
+                return min(waits, key=lambda item: item[1])[0]
+
+            total_weight = 0
+            for credential in ready:
+                credential.current_weight += credential.weight
+                total_weight += credential.weight
+            selected = max(ready, key=lambda credential: credential.current_weight)
+            selected.current_weight -= total_weight
+            return selected
+
+    def _record(self, credential: ApiCredential, status: Optional[int] = None, failed: bool = False) -> None:
+        with self._lock:
+            credential.requests += 1
+            if failed:
+                credential.failures += 1
+                credential.consecutive_failures += 1
+                credential.last_error_status = status
+            else:
+                credential.consecutive_failures = 0
+
+    def call(self, fn: Callable[[Any], Any], estimated_tokens: float, request_id: str,
+             used_tokens: Optional[Callable[[Any], Optional[int]]] = None,
+             provider_request_id: Optional[Callable[[Any], Optional[str]]] = None) -> Any:
+        """
+        Run a provider call on a pooled key within its rate budget, retrying transient failures
+
+        Args:
+            fn: Function performing the provider call with the given client
+            estimated_tokens: Tokens to reserve (prompt estimate plus the output token limit)
+            request_id: Request identifier for logging
+            used_tokens: Optional function extracting the reported total token usage from the result
+            provider_request_id: Optional function extracting the provider's request ID from the result, attached
+                to the current request context
+
+        Returns:
+            The result of fn(client)
+
+        Raises:
+            RateLimitExceeded: If no key could take the call within PROVIDER_MAX_PACING_WAIT or the request deadline,
+                or the provider still answered 429 when retries ran out
+            Exception: The last provider error once it is not retryable or retries are exhausted
+        """
+        for attempt in range(PROVIDER_MAX_RETRIES + 1):
+            credential = self._select(estimated_tokens)
+            with phase('pacing'):
+                credential.limiter.acquire(estimated_tokens, request_id)
+            try:
+                with phase('llm'):
+                    result = fn(credential.client)
+            except Exception as e:
+                retryable, status, retry_after = classify_error(e)
+                self._record(credential, status, failed=True)
+                # A failed attempt produced no output: return its token reservation, or the unused part of it when
+                # the error reports usage, so retries don't use up the budget several times over
+                usage = error_token_usage(e)
+                credential.limiter.settle(estimated_tokens, usage if usage is not None else 0)
+                # Failed calls keep their provider request ID too (OpenAI SDK errors carry one)
+                add_provider_request_id(self.provider, getattr(e, 'request_id', None))
+
+                if status in (401, 403) and len(self.credentials) > 1:
+                    # A revoked or misconfigured key; the other keys may still work
+                    logger.error(f"[{request_id}] {self.provider} {credential.label} was rejected ({status}); removing it from rotation for {AUTH_FAILURE_COOLDOWN}s")
+                    credential.limiter.suspend(AUTH_FAILURE_COOLDOWN)
+                    retryable = True
+                left = remaining()
+                # Once the client has stopped waiting, a retry would only waste quota
+                if not retryable or attempt == PROVIDER_MAX_RETRIES or (left is not None and left <= 0):
+                    if status == 429:
+                        # Still hold the key back, and tell the client when a key frees up
+                        credential.limiter.throttle(retry_after if retry_after is not None else backoff_delay(attempt))
+                        raise RateLimitExceeded(f"{self.provider} rate limited", self.wait_time(estimated_tokens)) from e
+                    raise
+
+                with self._lock:
+                    self._retries += 1
+                if status == 429:
+                    # Only this key is throttled: the next attempt moves to another key, or waits out
+                    # this key's Retry-After in acquire() when every key is throttled
+                    cooldown = retry_after if retry_after is not None else backoff_delay(attempt)
+                    credential.limiter.throttle(cooldown)
+                    logger.warning(f"[{request_id}] {self.provider} {credential.label} rate limited; cooling down for {cooldown:.1f}s (attempt {attempt + 1}/{PROVIDER_MAX_RETRIES})")
+                elif status not in (401, 403):
+                    delay = retry_after if retry_after is not None else backoff_delay(attempt)
+                    if left is not None and delay >= left:
+                        raise
+                    logger.warning(f"[{request_id}] {self.provider} call failed ({status or type(e).__name__}); retrying in {delay:.2f}s (attempt {attempt + 1}/{PROVIDER_MAX_RETRIES})")
+                    time.sleep(delay)
+                continue
+
+            self._record(credential)
+            if provider_request_id is not None:
+                add_provider_request_id(self.provider, provider_request_id(result))
+            if used_tokens is not None:
+                try:
+                    credential.limiter.settle(estimated_tokens, used_tokens(result))
+                except Exception:
+                    pass
+            return result
+
+    def wait_time(self, tokens: float) -> float:
+        """
+        Seconds until some key could take a call reserving `tokens` tokens (0.0 without keys)
+        """
+        return min((credential.limiter.wait_time(tokens) for credential in self.credentials), default=0.0)
+
+    def headroom(self) -> float:
+        """
+        Fraction of rate budget available on the least used key (0.0 without keys), for deferrable background work
+        """
+        return max((credential.limiter.headroom() for credential in self.credentials), default=0.0)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get per-key health and budget for monitoring
+        """
+        with self._lock:
+            retries = self._retries
+        return {
+            "keys": [credential.status() for credential in self.credentials],
+            "retries": retries
+        }
+
+# API keys and client factory per provider
+_PROVIDER_KEYS = {
+    "deepseek": (DEEPSEEK_API_KEYS, create_deepseek_client),
+    "gemini": (GEMINI_API_KEYS, create_gemini_client)
+}
+
+_pools: Dict[str, CredentialPool] = {}
+_pools_lock = threading.Lock()
+
+def get_credential_pool(provider: str) -> CredentialPool:
+    """
+    Get the shared credential pool for a provider, creating one client and rate limiter per configured key
+
+    Args:
+        provider: Provider name ("deepseek" or "gemini")
+    """
+    with _pools_lock:
+        if provider not in _pools:
+            keys, create_client = _PROVIDER_KEYS[provider]
+            limits = PROVIDER_RATE_LIMITS.get(provider, {})
+            credentials = []
+            for index, (api_key, weight) in enumerate(keys, start=1):
+                label = f"key-{index}"
+                limiter = ProviderRateLimiter(f"{provider} {label}", limits.get("rpm", 0), limits.get("tpm", 0))
+                credentials.append(ApiCredential(label, create_client(api_key), weight, limiter))
+            _pools[provider] = CredentialPool(provider, credentials)
+        return _pools[provider]
+
+def get_credential_pool_status() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the status of every credential pool created so far, keyed by provider
+    """
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {provider: pool.status() for provider, pool in pools}
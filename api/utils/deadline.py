@@ -0,0 +1,79 @@
+"""
+Request deadlines
+This module gives each API request an end-to-end deadline, taken from the X-Request-Timeout header or the
+server default, and lets every provider call and wait derive its timeout from the time remaining, so work is
+abandoned once the client is no longer waiting for it.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Optional
+from flask import Flask, request
+from config import logger, REQUEST_TIMEOUT_DEFAULT, REQUEST_TIMEOUT_MAX
+
+# Header a client can send with the number of seconds it will wait for the response
+REQUEST_TIMEOUT_HEADER = 'X-Request-Timeout'
+
+# Absolute deadline (time.monotonic()) of the current request, None outside requests
+_deadline: ContextVar[Optional[float]] = ContextVar('request_deadline', default=None)
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when the current request's deadline has passed before a call could start
+    """
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left until the current request's deadline, or None when there is no deadline
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def timeout_for(timeout: Optional[float] = None) -> Optional[float]:
+    """
+    Cap a call's own timeout by the time left on the current request's deadline
+
+    Args:
+        timeout: The call's configured timeout in seconds (None for no limit of its own)
+
+    Returns:
+        The smaller of the two, or the configured timeout when there is no deadline
+
+    Raises:
+        DeadlineExceeded: If the deadline has already passed
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("Request timed out: deadline exceeded")
+    return left if timeout is None else min(timeout, left)
+
+def _parse_timeout(value: Optional[str]) -> float:
+    """
+    Read the client-supplied timeout, falling back to the default and capping it at REQUEST_TIMEOUT_MAX
+    """
+    if value:
+        try:
+            seconds = float(value)
+            if seconds > 0:
+                return min(seconds, REQUEST_TIMEOUT_MAX)
+        except ValueError:
+            pass
+        logger.warning(f"Ignoring invalid {REQUEST_TIMEOUT_HEADER} header: {value}")
+    return REQUEST_TIMEOUT_DEFAULT
+
+def init_app(app: Flask) -> None:
+    """
+    Start a deadline for every request of the app
+    """
+    @app.before_request
+    def _start_deadline():
+        seconds = _parse_timeout(request.headers.get(REQUEST_TIMEOUT_HEADER))
+        _deadline.set(time.monotonic() + seconds)
+
+    @app.teardown_request
+    def _clear_deadline(exc):
+        _deadline.set(None)
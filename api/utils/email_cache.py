@@ -0,0 +1,320 @@
+"""
+Near-duplicate email cache
+This module serves email enhancements for emails that are near-duplicates of a recently enhanced one (the same
+template with a different name, date or amount). Emails are vectorized locally as hashed character n-gram TF-IDF
+vectors and compared by cosine similarity against a bounded per-model index of recent emails. On a hit, the names,
+numbers and dates that differ between the two emails are substituted into the cached result. A hit is treated as a
+miss when the emails differ in any other word (a "can" that became "cannot" changes the meaning, however similar
+the vectors are), or when a differing phrase can't be found and replaced in the cached result.
+
+NumPy is used for the index when installed (one matrix-vector product per lookup); otherwise a pure Python sparse
+implementation is used.
+"""
+
+import copy
+import difflib
+import math
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from config import (
+    logger, EMAIL_CACHE_ENABLED, EMAIL_CACHE_THRESHOLD, EMAIL_CACHE_MAX_ENTRIES, EMAIL_CACHE_TTL,
+    EMAIL_CACHE_PERSONALIZE
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Character n-gram length and number of hash buckets of the vectors
+NGRAM = 3
+DIMENSIONS = 4096
+
+# IDF weighting starts once the index holds this many emails; document frequencies over a handful of emails
+# mostly up-weight the n-grams a new email doesn't share, which hides near-duplicates
+MIN_IDF_DOCUMENTS = 16
+
+# Largest differing span (in words, on either side) that is substituted into a cached result
+MAX_SUBSTITUTION_WORDS = 4
+
+_WHITESPACE = re.compile(r'\s+')
+# Words, and runs of punctuation, compared when substituting
+_TOKEN = re.compile(r'\w+|[^\w\s]+')
+# Punctuation ending a sentence; a capitalized word right after it may be an ordinary word
+_SENTENCE_END = re.compile(r'[.!?:;]')
+
+def _ngram_counts(text: str) -> Counter:
+    """
+    Count the hashed character n-grams of the whitespace-normalized, lowercased text
+    """
+    normalized = f" {_WHITESPACE.sub(' ', text.lower()).strip()} "
+    return Counter(zlib.crc32(normalized[i:i + NGRAM].encode('utf-8')) % DIMENSIONS
+                   for i in range(max(1, len(normalized) - NGRAM + 1)))
+
+def _tokens(text: str) -> List[re.Match]:
+    return list(_TOKEN.finditer(text))
+
+def _is_entity(text: str, tokens: List[re.Match], index: int) -> bool:
+    """
+    Check if a token is part of a name, number or date: it contains a digit, or it is capitalized mid-sentence
+    Punctuation tokens count as entity parts ("#1042", "3/14"); anything else, such as "can" and "cannot", doesn't
+    """
+    token = tokens[index].group()
+    if not re.search(r'\w', token) or any(char.isdigit() for char in token):
+        return True
+    if not token[0].isupper() or token == 'I':
+        return False
+    if index == 0:
+        return False
+    previous = tokens[index - 1]
+    # Sentence starts and line starts (greetings, sign-offs) are capitalized whatever the word
+    return not _SENTENCE_END.search(previous.group()) and '\n' not in text[previous.end():tokens[index].start()]
+
+def _substitutions(source: str, target: str) -> Optional[List[Tuple[str, str]]]:
+    """
+    Find the name, number and date replacements that turn the cached email into the new one
+
+    Returns:
+        (old phrase, new phrase) pairs, or None if the emails differ by anything other than short replacements
+        of entity-like words
+    """
+    source_tokens, target_tokens = _tokens(source), _tokens(target)
+    matcher = difflib.SequenceMatcher(None, [t.group().lower() for t in source_tokens],
+                                      [t.group().lower() for t in target_tokens], autojunk=False)
+    pairs = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        if tag != 'replace' or i2 - i1 > MAX_SUBSTITUTION_WORDS or j2 - j1 > MAX_SUBSTITUTION_WORDS:
+            return None
+        if not all(_is_entity(source, source_tokens, i) for i in range(i1, i2)) or \
+                not all(_is_entity(target, target_tokens, j) for j in range(j1, j2)):
+            return None
+        old = source[source_tokens[i1].start():source_tokens[i2 - 1].end()]
+        new = target[target_tokens[j1].start():target_tokens[j2 - 1].end()]
+        if not re.search(r'\w', old):
+            # Punctuation-only differences have nothing to anchor a substitution on
+            return None
+        pairs.append((old, new))
+    return pairs
+
+def _phrase_pattern(phrase: str) -> re.Pattern:
+    """
+    Pattern matching a phrase as whole words, with any whitespace between its words
+    Matching is case-sensitive: a name that is also a common word ("Will", "May", "Bill") must not replace the word
+    """
+    body = r'\s+'.join(re.escape(word) for word in phrase.split())
+    return re.compile(rf'(?<!\w){body}(?!\w)')
+
+def _personalize(data: Any, pairs: List[Tuple[re.Pattern, str]]) -> Any:
+    """
+    Apply the replacements to every string in a cached result
+    """
+    if isinstance(data, str):
+        for pattern, new in pairs:
+            data = pattern.sub(lambda _: new, data)
+        return data
+    if isinstance(data, list):
+        return [_personalize(item, pairs) for item in data]
+    if isinstance(data, dict):
+        return {key: _personalize(value, pairs) for key, value in data.items()}
+    return data
+
+def _contains(data: Any, pattern: re.Pattern) -> bool:
+    if isinstance(data, str):
+        return pattern.search(data) is not None
+    if isinstance(data, list):
+        return any(_contains(item, pattern) for item in data)
+    if isinstance(data, dict):
+        return any(_contains(value, pattern) for value in data.values())
+    return False
+
+class _SimilarityIndex:
+    """
+    Fixed-capacity index of unit-length TF-IDF vectors; the oldest entry is replaced when full
+    Callers hold the cache lock
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.entries: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self.next_slot = 0
+        # Document frequency of each bucket over the indexed emails, for the IDF weights
+        self.document_frequency: Counter = Counter()
+        self.matrix = numpy.zeros((capacity, DIMENSIONS), dtype=numpy.float32) if numpy is not None else None
+        # Expiry time of each slot (0 for empty slots), so expired rows are excluded before ranking
+        self.expires = numpy.zeros(capacity) if numpy is not None else None
+
+    def _weights(self, counts: Counter) -> Dict[int, float]:
+        """
+        Unit-length sublinear TF-IDF weights of an email's n-gram counts
+        """
+        documents = sum(1 for entry in self.entries if entry is not None)
+        if documents < MIN_IDF_DOCUMENTS:
+            weights = {bucket: 1 + math.log(count) for bucket, count in counts.items()}
+        else:
+            weights = {
+                bucket: (1 + math.log(count)) * (math.log((1 + documents) / (1 + self.document_frequency[bucket])) + 1)
+                for bucket, count in counts.items()
+            }
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        return {bucket: weight / norm for bucket, weight in weights.items()}
+
+    def nearest(self, counts: Counter) -> Tuple[Optional[Dict[str, Any]], float]:
+        """
+        Find the most similar live entry and its cosine similarity
+        """
+        query = self._weights(counts)
+        now = time.time()
+        if self.matrix is not None:
+            vector = numpy.zeros(DIMENSIONS, dtype=numpy.float32)
+            vector[list(query)] = list(query.values())
+            scores = numpy.where(self.expires > now, self.matrix @ vector, 0.0)
+            slot = int(numpy.argmax(scores))
+            if scores[slot] <= 0.0:
+                return None, 0.0
+            return self.entries[slot], float(scores[slot])
+
+        best, best_score = None, 0.0
+        for entry in self.entries:
+            if entry is None or entry["expires"] <= now:
+                continue
+            vector = entry["vector"]
+            score = sum(weight * vector.get(bucket, 0.0) for bucket, weight in query.items())
+            if score > best_score:
+                best, best_score = entry, score
+        return best, best_score
+
+    def add(self, email: str, counts: Counter, result: Dict[str, Any], ttl: float) -> None:
+        slot = self.next_slot
+        self.next_slot = (slot + 1) % self.capacity
+        evicted = self.entries[slot]
+        if evicted is not None:
+            self.document_frequency.subtract(evicted["counts"].keys())
+        self.document_frequency.update(counts.keys())
+
+        vector = self._weights(counts)
+        self.entries[slot] = {"email": email, "counts": counts, "vector": vector, "result": result,
+                              "expires": time.time() + ttl}
+        if self.matrix is not None:
+            self.matrix[slot] = 0.0
+            self.matrix[slot, list(vector)] = list(vector.values())
+            self.expires[slot] = self.entries[slot]["expires"]
+
+class EmailSimilarityCache:
+    """
+    Per-model near-duplicate cache of email enhancement results
+    """
+
+    def __init__(self, enabled: bool, threshold: float, max_entries: int, ttl: float, personalize: bool):
+        self.enabled = enabled and max_entries > 0
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.personalize = personalize
+        self._indexes: Dict[str, _SimilarityIndex] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._rejected = 0
+
+    def lookup(self, model_id: str, email_content: str, request_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached enhancement for a near-duplicate of the email
+
+        Args:
+            model_id: The model the enhancement is requested from
+            email_content: The email to enhance
+            request_id: Request identifier for logging
+
+        Returns:
+            The (personalized) cached enhancement, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        counts = _ngram_counts(email_content)
+        with self._lock:
+            index = self._indexes.get(model_id)
+            entry, score = index.nearest(counts) if index is not None else (None, 0.0)
+            if entry is None or score < self.threshold:
+                self._misses += 1
+                return None
+            source, result = entry["email"], entry["result"]
+
+        personalized = self._personalized(source, email_content, result)
+        if personalized is None:
+            with self._lock:
+                self._rejected += 1
+                self._misses += 1
+            logger.info(f"[{request_id}] Email cache candidate (similarity {score:.3f}) rejected: differences can't be substituted")
+            return None
+
+        with self._lock:
+            self._hits += 1
+        logger.info(f"[{request_id}] Email cache hit for {model_id} (similarity {score:.3f})")
+        return personalized
+
+    def _personalized(self, source: str, email_content: str, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Adapt a cached result to the new email, or None if it can't be done safely
+        Every phrase of the cached email that differs must occur in the result and be replaced everywhere in it:
+        a phrase the result doesn't mention verbatim may still be reflected in it (paraphrased or summarized),
+        and the new email's phrase wouldn't be
+        """
+        if source == email_content:
+            return copy.deepcopy(result)
+        if not self.personalize:
+            return None
+        pairs = _substitutions(source, email_content)
+        if pairs is None:
+            return None
+        patterns = [(_phrase_pattern(old), new) for old, new in pairs]
+        if not all(_contains(result, pattern) for pattern, _ in patterns):
+            return None
+        personalized = _personalize(result, patterns)
+        # The model may have reworded a replaced phrase ("March 3" as "3 March"), so any word of the cached
+        # email's phrases that the new email doesn't contain must be gone from the result
+        new_words = {token.group() for token in _tokens(email_content)}
+        for old, _ in pairs:
+            for word in re.findall(r'\w+', old):
+                if word not in new_words and _contains(personalized, _phrase_pattern(word)):
+                    return None
+        return personalized
+
+    def store(self, model_id: str, email_content: str, result: Dict[str, Any]) -> None:
+        """
+        Index a freshly generated enhancement
+        """
+        if not self.enabled:
+            return
+        counts = _ngram_counts(email_content)
+        with self._lock:
+            index = self._indexes.get(model_id)
+            if index is None:
+                index = self._indexes[model_id] = _SimilarityIndex(self.max_entries)
+            index.add(email_content, counts, copy.deepcopy(result), self.ttl)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get hit and miss counts for monitoring
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "backend": "numpy" if numpy is not None else "python",
+                "threshold": self.threshold,
+                "entries": {model_id: sum(1 for entry in index.entries if entry is not None)
+                            for model_id, index in self._indexes.items()},
+                "hits": self._hits,
+                "misses": self._misses,
+                "rejected": self._rejected,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0
+            }
+
+email_cache = EmailSimilarityCache(EMAIL_CACHE_ENABLED, EMAIL_CACHE_THRESHOLD, EMAIL_CACHE_MAX_ENTRIES,
+                                   EMAIL_CACHE_TTL, EMAIL_CACHE_PERSONALIZE)
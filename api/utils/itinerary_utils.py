@@ -0,0 +1,116 @@
+"""
+Itinerary post-processing utilities
+This module computes the deterministic itinerary fields (calendar, cost totals and budget status) on the server,
+so the model only has to generate the creative content.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Any, List
+from config import logger
+from utils.prompts import TRAVEL_ITINERARY_PROMPT
+from utils.cost_utils import reconcile_costs
+
+# Fields the model is still asked to produce (see TRAVEL_ITINERARY_JSON_SCHEMA)
+ITINERARY_MODEL_FIELDS = ['daily_itinerary', 'travel_tips', 'budget_breakdown']
+
+def parse_trip_dates(travel_data: Dict[str, Any]) -> tuple[datetime, datetime, int]:
+    """
+    Parse the trip start/end dates and compute its length
+
+    Args:
+        travel_data: Dictionary containing start_date and end_date in YYYY-MM-DD format
+
+    Returns:
+        (start_dt, end_dt, trip_days)
+    """
+    start_dt = datetime.strptime(travel_data['start_date'], '%Y-%m-%d')
+    end_dt = datetime.strptime(travel_data['end_date'], '%Y-%m-%d')
+    trip_days = (end_dt - start_dt).days + 1
+    return start_dt, end_dt, trip_days
+
+def build_trip_calendar(start_dt: datetime, trip_days: int) -> List[Dict[str, Any]]:
+    """
+    Build the calendar fields for every day of a trip
+
+    Args:
+        start_dt: First day of the trip
+        trip_days: Number of days in the trip
+
+    Returns:
+        List of dictionaries with day, date and day_of_week
+    """
+    calendar = []
+    for offset in range(trip_days):
+        current = start_dt + timedelta(days=offset)
+        calendar.append({
+            "day": offset + 1,
+            "date": current.strftime('%Y-%m-%d'),
+            "day_of_week": current.strftime('%A')
+        })
+    return calendar
+
+def format_itinerary_prompt(travel_data: Dict[str, Any], template: str = TRAVEL_ITINERARY_PROMPT) -> str:
+    """
+    Build the itinerary generation prompt for a travel request
+
+    Args:
+        travel_data: Dictionary containing destination, budget, start_date, end_date, travelers, preferences
+        template: Prompt template to fill (TRAVEL_ITINERARY_PROMPT or TRAVEL_ITINERARY_CHAT_PROMPT)
+
+    Returns:
+        The formatted prompt
+    """
+    start_dt, _, trip_days = parse_trip_dates(travel_data)
+    calendar = build_trip_calendar(start_dt, trip_days)
+    calendar_text = ', '.join(f"Day {entry['day']} = {entry['date']} ({entry['day_of_week']})" for entry in calendar)
+    preferences = travel_data['preferences']
+
+    return template.format(
+        trip_days=trip_days,
+        start_date=travel_data['start_date'],
+        end_date=travel_data['end_date'],
+        calendar_text=calendar_text,
+        destination=travel_data['destination'],
+        budget=travel_data['budget'],
+        travelers=travel_data['travelers'],
+        preferences_text=', '.join(preferences) if isinstance(preferences, list) else str(preferences)
+    )
+
+def complete_itinerary(itinerary_data: Dict[str, Any], travel_data: Dict[str, Any], request_id: str) -> Dict[str, Any]:
+    """
+    Fill in the server-computed itinerary fields
+
+    Sets destination and the day/date/day_of_week of every day, overriding any values the model produced,
+    then reconciles the cost fields (see utils/cost_utils.py). Extra days beyond the requested trip length are dropped.
+
+    Args:
+        itinerary_data: Parsed model response in the slim itinerary schema
+        travel_data: Original request data with destination, budget, start_date and end_date
+        request_id: Request identifier for logging
+
+    Returns:
+        The completed itinerary in the public response format
+    """
+    start_dt, _, trip_days = parse_trip_dates(travel_data)
+    calendar = build_trip_calendar(start_dt, trip_days)
+
+    days = itinerary_data.get('daily_itinerary') or []
+    if len(days) != trip_days:
+        logger.warning(f"[{request_id}] Itinerary has {len(days)} day(s), expected {trip_days}")
+
+    daily_itinerary = []
+    for day_data, calendar_fields in zip(days, calendar):
+        if not isinstance(day_data, dict):
+            continue
+        # Calendar fields first so the response keeps its familiar field order
+        daily_itinerary.append({**calendar_fields, **{k: v for k, v in day_data.items() if k not in calendar_fields}})
+
+    completed = {
+        "destination": travel_data['destination'],
+        "total_cost": itinerary_data.get('total_cost'),
+        "budget_status": None,
+        "daily_itinerary": daily_itinerary,
+        "travel_tips": itinerary_data.get('travel_tips', []),
+        "budget_breakdown": itinerary_data.get('budget_breakdown', {})
+    }
+    return reconcile_costs(completed, travel_data['budget'], request_id)
@@ -0,0 +1,79 @@
+"""
+Pluggable JSON backend
+This module picks the fastest available JSON implementation (orjson when installed, stdlib json otherwise)
+and exposes a small common interface used by the response helpers and the AI response parser.
+"""
+
+import json
+import os
+from typing import Any
+
+# Allow forcing the stdlib backend (e.g. for benchmarking or debugging serialization differences)
+_requested_backend = os.getenv('JSON_BACKEND', 'auto').lower()
+
+try:
+    if _requested_backend == 'stdlib':
+        raise ImportError("stdlib JSON backend requested")
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can always catch this one
+JSONDecodeError = json.JSONDecodeError
+
+BACKEND_NAME = 'orjson' if orjson is not None else 'stdlib'
+
+def _default(obj: Any) -> Any:
+    """
+    Fallback serializer for types neither backend handles natively
+    """
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps_bytes(data: Any) -> bytes:
+    """
+    Serialize data to compact UTF-8 encoded JSON bytes
+
+    Args:
+        data: JSON-serializable object
+
+    Returns:
+        Encoded JSON document
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def dumps(data: Any) -> str:
+    """
+    Serialize data to a compact JSON string
+
+    Args:
+        data: JSON-serializable object
+
+    Returns:
+        JSON document as text
+    """
+    if orjson is not None:
+        return dumps_bytes(data).decode('utf-8')
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(',', ':'))
+
+def loads(text: Any) -> Any:
+    """
+    Parse a JSON document
+
+    Args:
+        text: JSON document as str or bytes
+
+    Returns:
+        Parsed Python object
+
+    Raises:
+        JSONDecodeError: If the document is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
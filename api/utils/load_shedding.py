@@ -0,0 +1,151 @@
+"""
+Load shedding
+This module tracks in-flight requests and recent latency per route and rejects new requests with 503 and
+Retry-After when a route is already too deep or a new request would likely wait longer than clients do,
+so server capacity goes to requests that can still complete in time.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+from flask import Flask, g, request
+from config import logger, BULKHEAD_LIMITS, LOAD_SHED_MAX_DEPTH, LOAD_SHED_MAX_EXPECTED_WAIT, LOAD_SHED_DEFAULT_CONCURRENCY
+from utils.response_helpers import error_response
+
+# Smoothing factor for the per-route latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+# Blueprints that are never shed, so monitoring keeps working under load
+EXEMPT_BLUEPRINTS = {'health'}
+
+class RouteLoad:
+    """
+    In-flight count, latency average and counters for one route
+    """
+
+    def __init__(self, concurrency: int, max_depth: int):
+        self.concurrency = max(1, concurrency)
+        self.max_depth = max_depth
+        self.in_flight = 0
+        self.avg_latency: Optional[float] = None
+        self.admitted = 0
+        self.shed = 0
+
+    def expected_wait(self) -> float:
+        """
+        Estimated seconds a new request would queue before it starts running
+        """
+        if self.avg_latency is None or self.in_flight < self.concurrency:
+            return 0.0
+        return (self.in_flight - self.concurrency + 1) / self.concurrency * self.avg_latency
+
+class LoadShedder:
+    """
+    Admission control applied to every request of a Flask app
+    """
+
+    def __init__(self, max_depth: int, max_expected_wait: float):
+        """
+        Args:
+            max_depth: In-flight requests per route beyond which new ones are shed (bulkheaded routes use at most
+                their bulkhead's concurrency plus queue, beyond which the bulkhead would reject them anyway)
+            max_expected_wait: Estimated queue wait in seconds beyond which new requests are shed
+        """
+        self.max_depth = max_depth
+        self.max_expected_wait = max_expected_wait
+        self._lock = threading.Lock()
+        self._routes: Dict[str, RouteLoad] = {}
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Register the admission check and the completion hook on the app
+        """
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _route(self, endpoint: str, blueprint: Optional[str]) -> RouteLoad:
+        route = self._routes.get(endpoint)
+        if route is None:
+            # Routes of a bulkheaded tool run at most that many requests at once, and hold at most that many more
+            limits = BULKHEAD_LIMITS.get(blueprint)
+            if limits is not None:
+                concurrency = limits["max_concurrency"]
+                max_depth = min(self.max_depth, limits["max_concurrency"] + limits["max_queue"])
+            else:
+                concurrency, max_depth = LOAD_SHED_DEFAULT_CONCURRENCY, self.max_depth
+            route = self._routes[endpoint] = RouteLoad(concurrency, max_depth)
+        return route
+
+    def _before_request(self):
+        if request.method == 'OPTIONS' or request.endpoint is None or request.blueprint in EXEMPT_BLUEPRINTS:
+            return None
+
+        with self._lock:
+            route = self._route(request.endpoint, request.blueprint)
+            expected_wait = route.expected_wait()
+            if route.in_flight >= route.max_depth or expected_wait > self.max_expected_wait:
+                route.shed += 1
+                in_flight = route.in_flight
+                shed = True
+            else:
+                route.in_flight += 1
+                route.admitted += 1
+                shed = False
+
+        if shed:
+            retry_after = min(60, max(1, math.ceil(expected_wait)))
+            logger.warning(f"Shedding {request.method} {request.path}: {in_flight} in flight, expected wait {expected_wait:.1f}s")
+            response, status_code = error_response("The server is busy. Please try again in a moment.", 503)
+            response.headers['Retry-After'] = str(retry_after)
+            return response, status_code
+
+        g.load_shed_admitted_at = time.monotonic()
+        return None
+
+    def _after_request(self, response):
+        g.load_shed_status = response.status_code
+        return response
+
+    def _teardown_request(self, exc) -> None:
+        started = g.pop('load_shed_admitted_at', None)
+        if started is None:
+            return
+        latency = time.monotonic() - started
+        with self._lock:
+            route = self._routes[request.endpoint]
+            route.in_flight -= 1
+            if g.pop('load_shed_status', None) == 503:
+                # Fast rejections (full bulkhead, exhausted rate budget) say nothing about how long work takes,
+                # and would pull the average down and let more load in exactly when the route is overloaded
+                return
+            if route.avg_latency is None:
+                route.avg_latency = latency
+            else:
+                route.avg_latency = LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * route.avg_latency
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get per-route load and shed counts for monitoring
+        """
+        with self._lock:
+            return {
+                "max_depth": self.max_depth,
+                "max_expected_wait_s": self.max_expected_wait,
+                "routes": {
+                    endpoint: {
+                        "in_flight": route.in_flight,
+                        "concurrency": route.concurrency,
+                        "max_depth": route.max_depth,
+                        "avg_latency_ms": round(route.avg_latency * 1000, 1) if route.avg_latency is not None else None,
+                        "expected_wait_s": round(route.expected_wait(), 2),
+                        "admitted": route.admitted,
+                        "shed": route.shed
+                    }
+                    for endpoint, route in self._routes.items()
+                }
+            }
+
+# Shared load shedder installed by create_app()
+load_shedder = LoadShedder(LOAD_SHED_MAX_DEPTH, LOAD_SHED_MAX_EXPECTED_WAIT)
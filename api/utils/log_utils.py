@@ -0,0 +1,125 @@
+"""
+Logging setup
+This module moves log I/O off the request path: records are put on an in-memory queue and written by a
+background listener to the console and to a log file that rotates by size and age, with rotated files
+gzip-compressed. Lines logged during a request are tagged with its request ID, and per-request info lines can
+be sampled by request ID.
+"""
+
+import atexit
+import gzip
+import logging
+import os
+import queue
+import re
+import shutil
+import time
+import zlib
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import List, Optional
+from utils.request_context import RequestContextFilter
+
+# Lines logged outside a request context can still carry a "[request_id]" prefix
+_REQUEST_ID_PATTERN = re.compile(r'^\[([^\]]+)\]')
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """
+    Compress a rotated log file into dest and remove the original
+    """
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotates the log file when it reaches max_bytes or every rotate_interval seconds, keeping
+    backup_count gzip-compressed backups (api.log.1.gz, api.log.2.gz, ...)
+    """
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, rotate_interval: float):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.namer = lambda name: name + '.gz'
+        self.rotator = _gzip_rotator
+        self.rotate_interval = rotate_interval
+        self._next_rollover = time.time() + rotate_interval if rotate_interval > 0 else None
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self._next_rollover is not None and time.time() >= self._next_rollover:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        if self._next_rollover is not None:
+            self._next_rollover = time.time() + self.rotate_interval
+
+class RequestSamplingFilter(logging.Filter):
+    """
+    Keeps info and debug lines for a sample of requests and drops them for the rest
+    The decision is made per request ID, so a sampled request is logged completely; warnings, errors and
+    lines without a request ID are always kept
+    """
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.threshold = int(max(0.0, min(1.0, sample_rate)) * 0xFFFFFFFF)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.threshold >= 0xFFFFFFFF:
+            return True
+        request_id = getattr(record, 'request_id', None)
+        if request_id is None:
+            match = _REQUEST_ID_PATTERN.match(str(record.msg))
+            if not match:
+                return True
+            request_id = match.group(1)
+        return zlib.crc32(request_id.encode()) <= self.threshold
+
+def configure_logging(level: str, log_format: str, log_file: Optional[str], max_bytes: int, backup_count: int,
+                      rotate_interval: float, info_sample_rate: float, use_queue: bool) -> None:
+    """
+    Configure the root logger
+
+    Args:
+        level: Log level name
+        log_format: Format string for all handlers (may use %(request_tag)s, "[request_id] " inside requests)
+        log_file: Log file path, or None for console only
+        max_bytes: Size at which the log file rotates (0 disables size rotation)
+        backup_count: Number of compressed backups to keep
+        rotate_interval: Seconds after which the log file rotates (0 disables time rotation)
+        info_sample_rate: Fraction of requests whose info lines are logged (1.0 logs all)
+        use_queue: Hand records to a background listener instead of writing them on the calling thread
+    """
+    formatter = logging.Formatter(log_format, defaults={'request_tag': '', 'request_id': None})
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(CompressingRotatingFileHandler(log_file, max_bytes, backup_count, rotate_interval))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # The context filter runs first, on the calling thread, where the request context is visible
+    context_filter = RequestContextFilter()
+    sampling_filter = RequestSamplingFilter(info_sample_rate)
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    if not use_queue:
+        for handler in handlers:
+            handler.addFilter(context_filter)
+            handler.addFilter(sampling_filter)
+            root.addHandler(handler)
+        return
+
+    # Sampling runs before enqueueing, so dropped lines cost nothing further
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(context_filter)
+    queue_handler.addFilter(sampling_filter)
+    root.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Flush queued records on shutdown
+    atexit.register(listener.stop)
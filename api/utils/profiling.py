@@ -0,0 +1,145 @@
+"""
+Opt-in request profiling
+This module profiles selected requests when PROFILING_ENABLED is set: requests carrying the X-Profile header
+(with PROFILING_TOKEN; without a token the header is only honored outside production) or a random
+PROFILING_SAMPLE_RATE share of requests. Each profiled view writes its profile to PROFILING_DIR, named by request
+ID: a pstats file from cProfile, or a speedscope flame graph from pyinstrument's sampling profiler when it is
+installed and selected.
+"""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from functools import wraps
+from typing import Optional
+from flask import Flask, request
+from config import logger, PROFILING_ENABLED, PROFILING_SAMPLE_RATE, PROFILING_DIR, PROFILING_TOKEN, PROFILER
+from utils.env_utils import is_production
+
+try:
+    if PROFILER != 'pyinstrument':
+        raise ImportError("cProfile requested")
+    from pyinstrument import Profiler as SamplingProfiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    SamplingProfiler = None
+
+PROFILE_HEADER = 'X-Profile'
+
+_profile_lock = threading.Lock()
+
+# Functions listed in the text summary written next to each cProfile dump
+SUMMARY_LIMIT = 40
+
+# Without a token, any client could force a profile and a disk write, so production ignores the header
+_header_requires_token = is_production()
+
+def _should_profile() -> bool:
+    """
+    Decide whether the current request is profiled
+    """
+    header = request.headers.get(PROFILE_HEADER)
+    if header:
+        if PROFILING_TOKEN:
+            # Compared as bytes: compare_digest rejects str arguments with non-ASCII characters
+            if hmac.compare_digest(header.encode(), PROFILING_TOKEN.encode()):
+                return True
+            logger.warning(f"Ignoring {PROFILE_HEADER} header with an invalid token")
+        elif not _header_requires_token:
+            return True
+    return PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE
+
+def _profile_path(request_id: Optional[str], extension: str) -> str:
+    name = request_id or time.strftime("%Y%m%d_%H%M%S")
+    endpoint = (request.endpoint or 'unknown').replace('.', '_')
+    return os.path.join(PROFILING_DIR, f"{name}_{endpoint}.{extension}")
+
+def _write_cprofile(profiler: cProfile.Profile, request_id: Optional[str]) -> str:
+    """
+    Write the pstats dump and a cumulative-time text summary, returning the pstats path
+    """
+    path = _profile_path(request_id, 'prof')
+    profiler.dump_stats(path)
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(SUMMARY_LIMIT)
+    with open(_profile_path(request_id, 'txt'), 'w', encoding='utf-8') as f:
+        f.write(summary.getvalue())
+    return path
+
+def _write_sampling_profile(profiler, request_id: Optional[str]) -> str:
+    """
+    Write a speedscope flame graph and a text call tree, returning the flame graph path
+    """
+    path = _profile_path(request_id, 'speedscope.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(profiler.output(renderer=SpeedscopeRenderer()))
+    with open(_profile_path(request_id, 'txt'), 'w', encoding='utf-8') as f:
+        f.write(profiler.output_text())
+    return path
+
+def _save_profile(profiler, request_id: Optional[str]) -> None:
+    """
+    Write a finished profile, logging instead of failing the request if it can't be written
+    """
+    try:
+        os.makedirs(PROFILING_DIR, exist_ok=True)
+        if SamplingProfiler is not None:
+            path = _write_sampling_profile(profiler, request_id)
+        else:
+            path = _write_cprofile(profiler, request_id)
+        logger.info(f"[{request_id}] Profile written to {path}")
+    except Exception as e:
+        logger.error(f"[{request_id}] Failed to write profile for {request.path}: {str(e)}")
+
+def _profiled(view, get_request_id):
+    """
+    Wrap a view so selected requests run under the profiler
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # One profiled request at a time: profilers hook the interpreter, and concurrent ones interfere
+        if not _should_profile() or not _profile_lock.acquire(blocking=False):
+            return view(*args, **kwargs)
+
+        try:
+            if SamplingProfiler is not None:
+                profiler = SamplingProfiler()
+                profiler.start()
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                if SamplingProfiler is not None:
+                    profiler.stop()
+                else:
+                    profiler.disable()
+                _save_profile(profiler, get_request_id())
+        finally:
+            _profile_lock.release()
+    return wrapper
+
+def init_app(app: Flask, get_request_id) -> None:
+    """
+    Wrap the app's registered view functions with the profiler when PROFILING_ENABLED is set
+    Call after all blueprints are registered
+
+    Args:
+        app: The Flask app
+        get_request_id: Function returning the current request's ID (used to name profile files)
+    """
+    if not PROFILING_ENABLED:
+        return
+    for endpoint, view in list(app.view_functions.items()):
+        if endpoint != 'static':
+            app.view_functions[endpoint] = _profiled(view, get_request_id)
+    profiler_name = 'pyinstrument' if SamplingProfiler is not None else 'cProfile'
+    logger.warning(f"Request profiling enabled ({profiler_name}, sample rate {PROFILING_SAMPLE_RATE}, header {PROFILE_HEADER}); writing to {PROFILING_DIR}")
+    if _header_requires_token and not PROFILING_TOKEN:
+        logger.warning(f"PROFILING_TOKEN is not set; the {PROFILE_HEADER} header is ignored in production")
@@ -3,16 +3,15 @@ Common prompts for AI services
 This module contains all prompts used across different AI models to ensure consistency and avoid duplication.
 """
 
-# Email Enhancement Prompts
-EMAIL_ENHANCEMENT_PROMPT = """
-Please analyze and enhance the following email content. Provide your response in the exact JSON structure specified below.
-
-Original Email:
-{email_content}
-
-Please provide your analysis and enhancement in the following JSON format:
+def _template(text: str) -> str:
+    """
+    Escape the braces of a prompt fragment for use in a str.format() template
+    """
+    return text.replace('{', '{{').replace('}', '}}')
 
-{{
+# Email Enhancement Prompts
+# Response format and guidelines shared by the single-prompt and chat (Ollama) variants
+_EMAIL_RESPONSE_FORMAT = """{
     "original_email_score": "percentage (0-100%)",
     "enhanced_email": "the improved email content",
     "recommended_subject": "suggested subject line",
@@ -21,15 +20,15 @@ Please provide your analysis and enhancement in the following JSON format:
         "specific improvement 2",
         "specific improvement 3"
     ],
-    "analysis": {{
+    "analysis": {
         "tone": "professional/friendly/formal/informal",
         "clarity": "clear/unclear",
         "conciseness": "concise/verbose",
         "call_to_action": "present/missing/weak"
-    }}
-}}
+    }
+}"""
 
-IMPORTANT: For the "key_improvements" field, provide specific, contextual improvements that directly reference elements from the original email. Instead of generic advice, mention specific phrases, sentences, or content from the original email and explain how they were improved. For example:
+_EMAIL_GUIDELINES = """IMPORTANT: For the "key_improvements" field, provide specific, contextual improvements that directly reference elements from the original email. Instead of generic advice, mention specific phrases, sentences, or content from the original email and explain how they were improved. For example:
 - "Changed 'I wanted to follow up' to 'I'm following up on our discussion' for more directness"
 - "Added specific details about the project timeline that were missing from your original message"
 - "Restructured your opening to lead with the most important point about the budget approval"
@@ -46,6 +45,16 @@ Focus on:
 Respond only with the JSON structure, no additional text.
 """
 
+EMAIL_ENHANCEMENT_PROMPT = """
+Please analyze and enhance the following email content. Provide your response in the exact JSON structure specified below.
+
+Original Email:
+{email_content}
+
+Please provide your analysis and enhancement in the following JSON format:
+
+""" + _template(_EMAIL_RESPONSE_FORMAT) + "\n\n" + _template(_EMAIL_GUIDELINES)
+
 # Email Response JSON Schema. This schema defines the expected structure of the email enhancement response
 EMAIL_RESPONSE_JSON_SCHEMA = {
   "type": "object",
@@ -99,78 +108,65 @@ EMAIL_RESPONSE_JSON_SCHEMA = {
 }
 
 # Travel Itinerary Generation Prompts
-TRAVEL_ITINERARY_PROMPT = """
-Create a {trip_days}-day travel itinerary from {start_date} to {end_date} for {destination} with budget ${budget} for {travelers} travelers. 
-
-Traveler preferences: {preferences_text}
-
-Return ONLY valid JSON with no additional text or explanations:
-
-{{
-    "destination": "{destination}",
-    "total_cost": "total cost in dollars",
-    "budget_status": "within_budget/over_budget",
+# Response format and requirements shared by the single-prompt and chat (Ollama) variants
+_TRAVEL_RESPONSE_FORMAT = """{
     "daily_itinerary": [
-        {{
-            "day": 1,
-            "date": "{start_date}",
-            "day_of_week": "day name",
+        {
             "weather": "weather description",
             "activities": [
-                {{
+                {
                     "time": "09:00",
                     "description": "Activity description",
                     "type": "culture/food/adventure/relaxation/sightseeing/shopping",
                     "cost": "$50",
                     "location": "Location name"
-                }}
+                }
             ]
-        }}
+        }
     ],
     "travel_tips": [
         "Tip 1",
-        "Tip 2", 
+        "Tip 2",
         "Tip 3"
     ],
-    "budget_breakdown": {{
+    "budget_breakdown": {
         "accommodation": "$500",
         "food": "$300",
         "activities": "$200",
         "transportation": "$150",
         "other": "$50"
-    }}
-}}
+    }
+}"""
 
-Important: Ensure the JSON is valid and complete. Include realistic activities, costs, and tips for {destination}. The total cost should be realistic for the budget of ${budget}.
+# Filled with the trip's details (single prompt) or with references to the user message (chat)
+_TRAVEL_REQUIREMENTS = """Important: Ensure the JSON is valid and complete. "daily_itinerary" must contain {entries}, in order. Include realistic activities, costs, and tips for {destination}. Give every cost as a single dollar amount such as "$50". The budget breakdown should be realistic for {budget}.
 """
 
+TRAVEL_ITINERARY_PROMPT = """
+Create a {trip_days}-day travel itinerary from {start_date} to {end_date} for {destination} with budget ${budget} for {travelers} travelers.
+
+Trip dates: {calendar_text}
+
+Traveler preferences: {preferences_text}
+
+Return ONLY valid JSON with no additional text or explanations:
+
+""" + _template(_TRAVEL_RESPONSE_FORMAT) + "\n\n" + _TRAVEL_REQUIREMENTS.format(
+    entries="exactly {trip_days} entries, one per trip date",
+    destination="{destination}",
+    budget="the budget of ${budget}"
+)
+
 # Travel Itinerary JSON Schema. This schema defines the expected structure of the travel itinerary response
+# Calendar fields, destination, total cost and budget status are computed on the server (see utils/itinerary_utils.py)
 TRAVEL_ITINERARY_JSON_SCHEMA = {
   "type": "object",
   "properties": {
-    "destination": {
-      "type": "string"
-    },
-    "total_cost": {
-      "type": "string"
-    },
-    "budget_status": {
-      "type": "string"
-    },
     "daily_itinerary": {
       "type": "array",
       "items": {
         "type": "object",
         "properties": {
-          "day": {
-            "type": "number"
-          },
-          "date": {
-            "type": "string"
-          },
-          "day_of_week": {
-            "type": "string"
-          },
           "weather": {
             "type": "string"
           },
@@ -206,9 +202,6 @@ TRAVEL_ITINERARY_JSON_SCHEMA = {
           }
         },
         "required": [
-          "day",
-          "date",
-          "day_of_week",
           "weather",
           "activities"
         ]
@@ -249,9 +242,6 @@ TRAVEL_ITINERARY_JSON_SCHEMA = {
     }
   },
   "required": [
-    "destination",
-    "total_cost",
-    "budget_status",
     "daily_itinerary",
     "travel_tips",
     "budget_breakdown"
@@ -259,28 +249,25 @@ TRAVEL_ITINERARY_JSON_SCHEMA = {
 }
 
 # News Fetching Prompts
-NEWS_FETCH_PROMPT = """
-Generate 5 realistic news articles for the specified categories and country.
-
-Categories: {categories}
-Country: {region}
+# Number of articles requested per news fetch
+NEWS_ARTICLE_COUNT = 5
 
-Return ONLY valid JSON:
-
-{{
+# Response format and requirements shared by the single-prompt and chat (Ollama) variants
+_NEWS_RESPONSE_FORMAT = """{
     "articles": [
-        {{
+        {
             "title": "Concise, engaging headline (max 80 characters)",
             "description": "Clear 2-3 sentence summary with key details",
             "category": "Exact category from the list",
             "source": "Realistic news source (e.g., Reuters, BBC, CNN, local papers)"
-        }}
+        }
     ]
-}}
+}"""
 
-CRITICAL REQUIREMENTS:
-• Generate 5 articles total
-• Focus on NATIONAL/COUNTRY-LEVEL news for {region}
+# Filled with the request's region and categories (single prompt) or with references to the user message (chat)
+_NEWS_REQUIREMENTS = """CRITICAL REQUIREMENTS:
+• Generate {article_count} articles total
+• Focus on NATIONAL/COUNTRY-LEVEL news for {country}
 • DO NOT create city-specific or local news
 • Include national politics, economy, sports, technology, and international news
 • Use country-wide events, not local events
@@ -288,9 +275,9 @@ CRITICAL REQUIREMENTS:
 • Examples of BAD topics: local city events, neighborhood news, city-specific businesses
 
 Guidelines:
-• Distribute evenly across selected categories: {categories}
-• Prioritize country-level relevance for {region}
-• Include both domestic and international news with {region} perspective
+• Distribute evenly across {categories}
+• Prioritize country-level relevance for {country}
+• Include both domestic and international news {perspective}
 • Use current events and realistic scenarios
 • Keep titles concise and engaging
 • Ensure descriptions are informative but brief
@@ -299,6 +286,21 @@ Guidelines:
 Respond with JSON only.
 """
 
+NEWS_FETCH_PROMPT = f"""
+Generate {NEWS_ARTICLE_COUNT} realistic news articles for the specified categories and country.
+
+Categories: {{categories}}
+Country: {{region}}
+
+Return ONLY valid JSON:
+
+""" + _template(_NEWS_RESPONSE_FORMAT) + "\n\n" + _NEWS_REQUIREMENTS.format(
+    article_count=NEWS_ARTICLE_COUNT,
+    country="{region}",
+    categories="selected categories: {categories}",
+    perspective="with {region} perspective"
+)
+
 # News JSON Schema. This schema defines the expected structure of the news articles response
 NEWS_JSON_SCHEMA = {
   "type": "object",
@@ -343,33 +345,89 @@ SYSTEM_MESSAGES = {
     "gemini-flash": "You are an expert email writing assistant. You analyze emails and provide enhancements with specific improvements. Always respond in the exact JSON format requested."
 }
 
+# Chat prompts for local (Ollama) models
+# The static instructions live in the system message so every request of an operation shares the same prompt
+# prefix, which Ollama can keep in its KV cache; only the short user message changes between requests.
+OPERATION_SYSTEM_MESSAGES = {
+    "email": SYSTEM_MESSAGES["deepseek-api"],
+    "itinerary": "You are an expert travel planner. Create detailed, realistic travel itineraries in the exact JSON format requested.",
+    "news": "You are an expert news aggregator. You generate realistic news articles based on specified categories and regions. Always respond in the exact JSON format requested."
+}
+
+EMAIL_ENHANCEMENT_CHAT_INSTRUCTIONS = """
+Analyze and enhance the email content the user sends. Provide your response in the following JSON format:
+
+""" + _EMAIL_RESPONSE_FORMAT + "\n\n" + _EMAIL_GUIDELINES
+
+EMAIL_ENHANCEMENT_CHAT_PROMPT = """Original Email:
+{email_content}"""
+
+TRAVEL_ITINERARY_CHAT_INSTRUCTIONS = """
+Create a travel itinerary for the trip the user describes. Return ONLY valid JSON with no additional text or explanations:
+
+""" + _TRAVEL_RESPONSE_FORMAT + "\n\n" + _TRAVEL_REQUIREMENTS.format(
+    entries="exactly one entry per trip date",
+    destination="the destination",
+    budget="the requested budget"
+)
+
+TRAVEL_ITINERARY_CHAT_PROMPT = """Create a {trip_days}-day travel itinerary from {start_date} to {end_date} for {destination} with budget ${budget} for {travelers} travelers.
+
+Trip dates: {calendar_text}
+
+Traveler preferences: {preferences_text}"""
+
+NEWS_FETCH_CHAT_INSTRUCTIONS = f"""
+Generate {NEWS_ARTICLE_COUNT} realistic news articles for the categories and country the user specifies.
+
+Return ONLY valid JSON:
+
+""" + _NEWS_RESPONSE_FORMAT + "\n\n" + _NEWS_REQUIREMENTS.format(
+    article_count=NEWS_ARTICLE_COUNT,
+    country="the country",
+    categories="the selected categories",
+    perspective="from the country's perspective"
+)
+
+NEWS_FETCH_CHAT_PROMPT = """Categories: {categories}
+Country: {region}"""
+
+OPERATION_CHAT_INSTRUCTIONS = {
+    "email": EMAIL_ENHANCEMENT_CHAT_INSTRUCTIONS,
+    "itinerary": TRAVEL_ITINERARY_CHAT_INSTRUCTIONS,
+    "news": NEWS_FETCH_CHAT_INSTRUCTIONS
+}
+
 # Model-specific configurations
 MODEL_CONFIGS = {
     "deepseek-api": {
         "model": "deepseek-chat",
         "temperature": 0.7,
-        "max_tokens": 2000,
+        "max_output_tokens": 8192,
         "timeout": 50
     },
     "local-deepseek-r1": {
         "model": "deepseek-r1",
         "temperature": 0.7,
         "top_p": 0.9,
-        "max_tokens": 2000,
+        "max_output_tokens": 8192,
+        "token_budget_multiplier": 3.0,  # Reasoning model: leave room for <think> output
+        "num_ctx": 8192,  # Fixed per model: changing it forces Ollama to reload the model
         "timeout": 60
     },
     "local-llama3": {
         "model": "llama3",
         "temperature": 0.7,
         "top_p": 0.9,
-        "max_tokens": 2000,
+        "max_output_tokens": 8192,
+        "num_ctx": 8192,  # Fixed per model: changing it forces Ollama to reload the model
         "timeout": 60
     },
     "gemini-flash": {
         "model": "gemini-2.5-flash",
         "temperature": 0.7,
         "top_p": 0.9,
-        "max_tokens": 2000,
+        "max_output_tokens": 65536,
         "timeout": 60
     }
 } 
\ No newline at end of file
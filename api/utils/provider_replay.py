@@ -0,0 +1,160 @@
+"""
+Provider record/replay
+This module sits between the AI services and their providers. In record mode every provider response is appended,
+with its latency, to a gzip-compressed JSON Lines archive, keyed by a hash of the prompt and the parameters that
+shape the output. In replay mode responses are served from the archive instead of calling the provider, waiting the
+recorded latency times PROVIDER_REPLAY_LATENCY_SCALE, so parsing, validation and caching can be exercised and
+benchmarked offline without paying for live calls.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+from config import logger, PROVIDER_REPLAY_MODE, PROVIDER_REPLAY_ARCHIVE, PROVIDER_REPLAY_LATENCY_SCALE
+from utils.deadline import remaining
+from utils.timing import phase
+
+T = TypeVar('T')
+
+MODES = ("off", "record", "replay")
+
+class ReplayMiss(LookupError):
+    """
+    Raised in replay mode when the archive holds no recording for a call
+    """
+
+def replay_key(provider: str, params: Dict[str, Any]) -> str:
+    """
+    Hash a provider call's parameters (prompt included) into its archive key
+    """
+    canonical = json.dumps({"provider": provider, **params}, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def iter_archive(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the recordings in an archive, oldest first
+
+    Yields:
+        Dictionaries with key, provider, model, latency and response
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+class ProviderReplay:
+    """
+    Records provider responses to an archive or replays them from it
+    """
+
+    def __init__(self, mode: str, archive_path: str, latency_scale: float = 1.0):
+        if mode not in MODES:
+            logger.warning(f"Unknown PROVIDER_REPLAY_MODE '{mode}', record/replay disabled")
+            mode = "off"
+        self.mode = mode
+        self.archive_path = archive_path
+        self.latency_scale = max(0.0, latency_scale)
+        self._lock = threading.Lock()
+        # key -> recordings, and the next recording to serve for each key (repeated calls cycle through them)
+        self._index: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._cursors: Dict[str, int] = {}
+        if mode != "off":
+            logger.warning(f"Provider {mode} mode enabled ({archive_path})")
+
+    def call(self, provider: str, params: Dict[str, Any], fn: Callable[[], T],
+             encode: Callable[[T], Any], decode: Callable[[Any], T]) -> T:
+        """
+        Make a provider call, recording or replaying it according to the mode
+
+        Args:
+            provider: Provider name ("deepseek", "gemini" or "ollama")
+            params: The prompt and the parameters that shape the output (not timeouts or adaptive token limits),
+                used to match a replayed call to its recording
+            fn: Function making the live call
+            encode: Function turning the live result into JSON-serializable data for the archive
+            decode: Function rebuilding the result from the archived data
+
+        Returns:
+            The live or replayed result
+
+        Raises:
+            ReplayMiss: In replay mode, if the call was never recorded
+        """
+        if self.mode == "off":
+            return fn()
+
+        key = replay_key(provider, params)
+        if self.mode == "replay":
+            return decode(self._replay(provider, key))
+
+        started = time.monotonic()
+        result = fn()
+        self._record({
+            "key": key,
+            "provider": provider,
+            "model": params.get("model"),
+            "latency": round(time.monotonic() - started, 4),
+            "response": encode(result)
+        })
+        return result
+
+    def recorded_models(self, provider: str) -> List[str]:
+        """
+        Get the model IDs the archive holds recordings of for a provider (none outside replay mode)
+        """
+        if self.mode != "replay":
+            return []
+        return sorted({
+            entry["model"] for entries in self._load().values() for entry in entries
+            if entry.get("provider") == provider and entry.get("model")
+        })
+
+    def _record(self, entry: Dict[str, Any]) -> None:
+        """
+        Append a recording to the archive (each append is a separate gzip member, which gzip reads as one stream)
+        """
+        line = json.dumps(entry, separators=(',', ':'), default=str) + "\n"
+        try:
+            with self._lock, gzip.open(self.archive_path, 'at', encoding='utf-8') as f:
+                f.write(line)
+        except OSError as e:
+            logger.error(f"Failed to record {entry['provider']} response to {self.archive_path}: {str(e)}")
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            if self._index is None:
+                index: Dict[str, List[Dict[str, Any]]] = {}
+                try:
+                    for entry in iter_archive(self.archive_path):
+                        index.setdefault(entry["key"], []).append(entry)
+                except FileNotFoundError:
+                    logger.error(f"Replay archive {self.archive_path} not found")
+                logger.info(f"Loaded {sum(len(entries) for entries in index.values())} recordings from {self.archive_path}")
+                self._index = index
+            return self._index
+
+    def _replay(self, provider: str, key: str) -> Any:
+        """
+        Serve the next recording for a key after its (scaled) recorded latency
+        """
+        entries = self._load().get(key)
+        if not entries:
+            raise ReplayMiss(f"No recorded {provider} response for this request")
+        with self._lock:
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+        entry = entries[cursor % len(entries)]
+
+        delay = entry.get("latency", 0) * self.latency_scale
+        left = remaining()
+        if left is not None:
+            delay = min(delay, max(0.0, left))
+        if delay > 0:
+            with phase('replay'):
+                time.sleep(delay)
+        return entry["response"]
+
+provider_replay = ProviderReplay(PROVIDER_REPLAY_MODE, PROVIDER_REPLAY_ARCHIVE, PROVIDER_REPLAY_LATENCY_SCALE)
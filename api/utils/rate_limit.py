@@ -0,0 +1,279 @@
+"""
+Provider rate limiting
+This module paces calls to hosted AI providers against requests-per-minute and tokens-per-minute budgets
+using token buckets, classifies provider errors as retryable or not (including any Retry-After delay),
+and computes jittered exponential backoff delays.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+import httpx
+import openai
+from config import logger, PROVIDER_BACKOFF_BASE, PROVIDER_BACKOFF_MAX, PROVIDER_MAX_PACING_WAIT
+from utils.deadline import DeadlineExceeded, remaining
+
+# HTTP statuses worth retrying: request timeout, rate limited, and server-side failures
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a call would have to wait longer than the pacing limit for rate budget, or the provider kept
+    rejecting it as rate limited
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        # Seconds until the rate budget allows another call
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """
+    Continuously refilling budget of `rate_per_minute` units, holding at most one minute's worth
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = float(rate_per_minute)
+        self._per_second = rate_per_minute / 60.0
+        self._available = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._available = min(self.capacity, self._available + (now - self._updated) * self._per_second)
+        self._updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Take `amount` units, going into debt if needed (caller holds the limiter lock)
+
+        Returns:
+            Seconds until the debt is repaid, i.e. how long the caller must wait before proceeding
+        """
+        self._refill(now)
+        self._available -= min(amount, self.capacity)
+        return 0.0 if self._available >= 0 else -self._available / self._per_second
+
+    def wait_for(self, amount: float, now: float) -> float:
+        """
+        Seconds until `amount` units would be available, without taking them (caller holds the limiter lock)
+        """
+        self._refill(now)
+        shortfall = min(amount, self.capacity) - self._available
+        return 0.0 if shortfall <= 0 else shortfall / self._per_second
+
+    def credit(self, amount: float, now: float) -> None:
+        """
+        Return units that were reserved but not used (caller holds the limiter lock)
+        """
+        self._refill(now)
+        self._available = min(self.capacity, self._available + amount)
+
+    def level(self, now: float) -> float:
+        self._refill(now)
+        return self._available
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given as delay seconds or an HTTP date
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _gemini_retry_delay(details: Any) -> Optional[float]:
+    """
+    Extract the retryDelay (e.g. "37s") from a Gemini google.rpc.RetryInfo error detail
+    """
+    error = details.get('error') if isinstance(details, dict) else None
+    for detail in (error or {}).get('details') or []:
+        delay = detail.get('retryDelay') if isinstance(detail, dict) else None
+        if isinstance(delay, str) and delay.endswith('s'):
+            try:
+                return float(delay[:-1])
+            except ValueError:
+                return None
+    return None
+
+def classify_error(error: Exception) -> Tuple[bool, Optional[int], Optional[float]]:
+    """
+    Decide whether a provider error is worth retrying
+
+    Args:
+        error: Exception raised by the OpenAI (DeepSeek) or google-genai (Gemini) client
+
+    Returns:
+        (retryable, status_code, retry_after_seconds) - status_code and retry_after are None when unknown
+    """
+    if isinstance(error, DeadlineExceeded):
+        return False, None, None
+
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    status = status if isinstance(status, int) else None
+
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    retry_after = _parse_retry_after(headers.get('retry-after'))
+    if retry_after is None and status == 429:
+        retry_after = _gemini_retry_delay(getattr(error, 'details', None))
+
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES, status, retry_after
+    if isinstance(error, (openai.APIConnectionError, httpx.TransportError, ConnectionError, TimeoutError)):
+        return True, None, None
+    return False, None, None
+
+def error_token_usage(error: Exception) -> Optional[int]:
+    """
+    Get the total token usage a provider reported in an error body, if any (most errors carry none)
+    """
+    for body in (getattr(error, 'body', None), getattr(error, 'details', None)):
+        if not isinstance(body, dict):
+            continue
+        usage = body.get('usage') or body.get('usageMetadata') or {}
+        total = usage.get('total_tokens', usage.get('totalTokenCount')) if isinstance(usage, dict) else None
+        if isinstance(total, int):
+            return total
+    return None
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Full-jitter exponential backoff delay for a retry attempt (0-based), which spreads out calls that failed together
+    """
+    return random.uniform(0, min(PROVIDER_BACKOFF_MAX, PROVIDER_BACKOFF_BASE * 2 ** attempt))
+
+class ProviderRateLimiter:
+    """
+    Paces calls made with one provider credential against its request and token budgets
+    """
+
+    def __init__(self, name: str, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        """
+        Args:
+            name: Limiter name for logging
+            requests_per_minute: Request budget (0 disables request pacing)
+            tokens_per_minute: Token budget (0 disables token pacing)
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._blocked_until = 0.0
+        self._paced = 0
+        self._total_pacing_wait = 0.0
+        self._rate_limited = 0
+        self._auth_failures = 0
+        self._rejected = 0
+
+    def wait_time(self, tokens: float) -> float:
+        """
+        Seconds until a call reserving `tokens` tokens could start, without reserving anything
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._blocked_until - now)
+            if self._requests is not None:
+                wait = max(wait, self._requests.wait_for(1, now))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.wait_for(tokens, now))
+            return wait
+
+    def acquire(self, tokens: float, request_id: str) -> None:
+        """
+        Reserve one request and `tokens` tokens of budget, sleeping until the budget allows the call
+
+        Raises:
+            RateLimitExceeded: If the wait would exceed PROVIDER_MAX_PACING_WAIT or the request deadline
+        """
+        left = remaining()
+        max_wait = PROVIDER_MAX_PACING_WAIT if left is None else min(PROVIDER_MAX_PACING_WAIT, left)
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._blocked_until - now)
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1, now))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            if wait > max_wait:
+                # Give the reservation back so rejected calls don't starve admitted ones
+                if self._requests is not None:
+                    self._requests.credit(1, now)
+                if self._tokens is not None:
+                    self._tokens.credit(tokens, now)
+                self._rejected += 1
+                raise RateLimitExceeded(f"{self.name} rate limit reached; next slot in {wait:.1f}s", wait)
+            if wait > 0:
+                self._paced += 1
+                self._total_pacing_wait += wait
+
+        if wait > 0:
+            logger.info(f"[{request_id}] Pacing {self.name} call for {wait:.2f}s to stay within rate limits")
+            time.sleep(wait)
+
+    def settle(self, reserved_tokens: float, used_tokens: Optional[int]) -> None:
+        """
+        Return the difference between the reserved and the reported token usage to the token budget
+        """
+        if self._tokens is None or used_tokens is None or used_tokens >= reserved_tokens:
+            return
+        with self._lock:
+            self._tokens.credit(reserved_tokens - used_tokens, time.monotonic())
+
+    def throttle(self, seconds: float) -> None:
+        """
+        Record a rate-limit response and hold back calls with this credential, e.g. for a Retry-After interval
+        """
+        with self._lock:
+            self._rate_limited += 1
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def suspend(self, seconds: float) -> None:
+        """
+        Record an authentication failure and hold back calls with this credential (not counted as rate limiting)
+        """
+        with self._lock:
+            self._auth_failures += 1
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def headroom(self) -> float:
+        """
+        Fraction of the request and token budgets currently available (the lower of the two)
+        1.0 when neither budget is limited, 0.0 while the credential is held back
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._blocked_until > now:
+                return 0.0
+            fraction = 1.0
+            for bucket in (self._requests, self._tokens):
+                if bucket is not None:
+                    fraction = min(fraction, max(0.0, bucket.level(now)) / bucket.capacity)
+            return fraction
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get the remaining budget and counters for monitoring
+        """
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "requests_per_minute": self._requests.rate_per_minute if self._requests is not None else None,
+                "tokens_per_minute": self._tokens.rate_per_minute if self._tokens is not None else None,
+                "available_requests": round(self._requests.level(now), 1) if self._requests is not None else None,
+                "available_tokens": round(self._tokens.level(now)) if self._tokens is not None else None,
+                "blocked_for_s": round(max(0.0, self._blocked_until - now), 1),
+                "paced": self._paced,
+                "avg_pacing_wait_ms": round(self._total_pacing_wait / self._paced * 1000, 1) if self._paced else 0.0,
+                "rate_limited": self._rate_limited,
+                "auth_failures": self._auth_failures,
+                "rejected": self._rejected
+            }
@@ -0,0 +1,140 @@
+"""
+Request context
+This module gives every API request a collision-free request ID and a W3C trace context (continuing an incoming
+traceparent header when there is one), makes them available to services and log records without passing them
+through every call, and collects the request IDs returned by upstream AI providers for correlation.
+"""
+
+import itertools
+import logging
+import re
+import secrets
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+from flask import Flask, request
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+TRACEPARENT_HEADER = 'traceparent'
+
+# Request IDs set by the proxy in front of the API, kept for correlation
+UPSTREAM_ID_HEADERS = ('X-Request-ID', 'X-Vercel-Id')
+
+_TRACEPARENT_PATTERN = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+_SAFE_ID_PATTERN = re.compile(r'^[A-Za-z0-9._:;-]{1,128}$')
+
+# A random per-process tag plus a counter keeps IDs unique across threads, processes and serverless instances
+_PROCESS_TAG = secrets.token_hex(2)
+_counter = itertools.count(1)
+
+def new_request_id() -> str:
+    """
+    Generate a unique request ID that still sorts by time, e.g. "20250101_120000_123_a1f3_2a"
+    """
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]}_{_PROCESS_TAG}_{next(_counter):x}"
+
+class RequestContext:
+    """
+    Identifiers of one API request
+    """
+
+    def __init__(self, request_id: str, trace_id: str, parent_span_id: Optional[str], upstream_ids: Dict[str, str]):
+        self.request_id = request_id
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.upstream_ids = upstream_ids
+        # (provider, provider request ID) pairs, in call order
+        self.provider_request_ids: List[tuple] = []
+        # Seconds until the provider's rate budget allows another call, when a call failed for lack of it
+        self.retry_after: Optional[float] = None
+
+    def traceparent(self) -> str:
+        """
+        W3C traceparent header value identifying this request's span
+        """
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+_context: ContextVar[Optional[RequestContext]] = ContextVar('request_context', default=None)
+
+def get_context() -> Optional[RequestContext]:
+    """
+    Get the current request's context, or None outside requests
+    """
+    return _context.get()
+
+def get_request_id() -> Optional[str]:
+    """
+    Get the current request's ID, or None outside requests
+    """
+    context = _context.get()
+    return context.request_id if context is not None else None
+
+def add_provider_request_id(provider: str, provider_request_id: Optional[str]) -> None:
+    """
+    Attach the request ID an AI provider returned for a call made by the current request
+    """
+    context = _context.get()
+    if context is not None and provider_request_id:
+        context.provider_request_ids.append((provider, str(provider_request_id)))
+        logging.getLogger('config').info(f"[{context.request_id}] {provider} request ID: {provider_request_id}")
+
+def set_retry_after(seconds: float) -> None:
+    """
+    Record that a provider call of the current request was rejected for rate limits, and when to try again
+    """
+    context = _context.get()
+    if context is not None:
+        context.retry_after = seconds
+
+def _start_context() -> RequestContext:
+    """
+    Build the context for the current Flask request from its headers
+    """
+    trace_id, parent_span_id = None, None
+    match = _TRACEPARENT_PATTERN.match(request.headers.get(TRACEPARENT_HEADER, '').strip().lower())
+    if match and match.group(1) != '0' * 32:
+        trace_id, parent_span_id = match.group(1), match.group(2)
+
+    upstream_ids = {}
+    for header in UPSTREAM_ID_HEADERS:
+        value = request.headers.get(header)
+        if value and _SAFE_ID_PATTERN.match(value):
+            upstream_ids[header] = value
+
+    return RequestContext(new_request_id(), trace_id or secrets.token_hex(16), parent_span_id, upstream_ids)
+
+class RequestContextFilter(logging.Filter):
+    """
+    Adds request_id and request_tag attributes to log records emitted during a request
+    request_tag is "[request_id] " unless the message already starts with the request ID
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _context.get()
+        record.request_id = context.request_id if context is not None else None
+        if context is None or str(record.msg).startswith(f"[{context.request_id}]"):
+            record.request_tag = ''
+        else:
+            record.request_tag = f"[{context.request_id}] "
+        return True
+
+def init_app(app: Flask) -> None:
+    """
+    Start a request context for every request of the app and return its IDs in the response headers
+    """
+    @app.before_request
+    def _set_context():
+        _context.set(_start_context())
+
+    @app.after_request
+    def _add_headers(response):
+        context = _context.get()
+        if context is not None:
+            response.headers[REQUEST_ID_HEADER] = context.request_id
+            response.headers[TRACEPARENT_HEADER] = context.traceparent()
+        return response
+
+    @app.teardown_request
+    def _clear_context(exc):
+        _context.set(None)
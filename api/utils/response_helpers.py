@@ -1,14 +1,25 @@
-from flask import jsonify
+from flask import current_app
 from typing import Dict, Any, Optional
 import logging
+import math
+from utils import json_backend
+from utils.request_context import get_context
+from utils.timing import timed_phase
 
 logger = logging.getLogger(__name__)
 
+@timed_phase('serialize')
+def json_response(data: Any):
+    """
+    Serialize data with the configured JSON backend into a Flask response
+    """
+    return current_app.response_class(json_backend.dumps_bytes(data), mimetype='application/json')
+
 def success_response(data: Dict[str, Any], status_code: int = 200) -> tuple:
     """
     Create a standardized success response
     """
-    response = jsonify(data)
+    response = json_response(data)
     response.headers['Content-Type'] = 'application/json'
     response.headers['Cache-Control'] = 'no-cache'
     return response, status_code
@@ -20,8 +31,21 @@ def error_response(message: str, status_code: int = 400, details: Optional[Dict[
     response = {'error': message}
     if details:
         response['details'] = details
-    return jsonify(response), status_code
+    return json_response(response), status_code
+
+def service_error_response(message: str) -> tuple:
+    """
+    Create the response for a failed AI service call
+    503 with Retry-After when the provider's rate budget ran out (see format_error_message), otherwise 500
+    """
+    context = get_context()
+    if context is None or context.retry_after is None:
+        return error_response(message, 500)
+    response, status_code = error_response(message, 503)
+    response.headers['Retry-After'] = str(max(1, math.ceil(context.retry_after)))
+    return response, status_code
 
+@timed_phase('validate')
 def validate_json_request(request) -> tuple[Optional[Dict], Optional[tuple]]:
     """
     Validate that the request contains valid JSON
@@ -36,6 +60,7 @@ def validate_json_request(request) -> tuple[Optional[Dict], Optional[tuple]]:
     
     return data, None
 
+@timed_phase('validate')
 def validate_required_field(data: Dict, field_name: str, field_type: type = str) -> tuple[Optional[Any], Optional[tuple]]:
     """
     Validate that a required field exists and is of the correct type
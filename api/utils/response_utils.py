@@ -3,11 +3,42 @@ Common utilities for AI response processing
 This module contains shared functions for cleaning, validating, and processing AI responses.
 """
 
-import json
 import logging
 import re
+import threading
 from typing import Dict, Any, Optional, List
 from config import logger
+from utils import json_backend
+from utils.rate_limit import RateLimitExceeded
+from utils.request_context import set_retry_after
+from utils.timing import timed_phase
+
+# Parse outcomes per model: "direct" (valid JSON as returned), "cleaned" (needed cleaning) or "failed"
+_parse_stats: Dict[str, Dict[str, int]] = {}
+_parse_stats_lock = threading.Lock()
+
+def _record_parse_outcome(model_id: str, outcome: str) -> None:
+    """
+    Count a safe_json_parse outcome for a model
+    """
+    with _parse_stats_lock:
+        stats = _parse_stats.setdefault(model_id, {"direct": 0, "cleaned": 0, "failed": 0})
+        stats[outcome] += 1
+
+def get_parse_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get JSON parse outcome counts and failure rates per model
+    
+    Returns:
+        Dictionary keyed by model ID with direct, cleaned and failed counts plus failure_rate and clean_rate
+    """
+    with _parse_stats_lock:
+        snapshot = {model_id: dict(stats) for model_id, stats in _parse_stats.items()}
+    for stats in snapshot.values():
+        total = stats["direct"] + stats["cleaned"] + stats["failed"]
+        stats["failure_rate"] = round(stats["failed"] / total, 4) if total else 0.0
+        stats["clean_rate"] = round(stats["cleaned"] / total, 4) if total else 0.0
+    return snapshot
 
 def clean_ai_response(response: str) -> str:
     """
@@ -58,6 +89,7 @@ def validate_response_structure(data: Dict[str, Any], required_fields: List[str]
             return f'Invalid AI response: missing field "{field}"'
     return None
 
+@timed_phase('parse')
 def safe_json_parse(response_text: str, request_id: str, model_id: str) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
     """
     Safely parse JSON response with enhanced error handling
@@ -72,36 +104,43 @@ def safe_json_parse(response_text: str, request_id: str, model_id: str) -> tuple
     """
     if not response_text:
         logger.error(f"[{request_id}] {model_id} returned empty response")
+        _record_parse_outcome(model_id, "failed")
         return None, f"{model_id} returned empty response"
     
     try:
-        # First attempt: direct JSON parsing
-        try:
-            parsed_data = json.loads(response_text)
-            logger.info(f"[{request_id}] Successfully parsed {model_id} response as JSON")
-            return parsed_data, None
-        except json.JSONDecodeError:
-            pass
+        # First attempt: direct JSON parsing (skipped when the text cannot be a bare JSON document)
+        if response_text.lstrip()[:1] in ('{', '['):
+            try:
+                parsed_data = json_backend.loads(response_text)
+                logger.info(f"[{request_id}] Successfully parsed {model_id} response as JSON")
+                _record_parse_outcome(model_id, "direct")
+                return parsed_data, None
+            except json_backend.JSONDecodeError:
+                pass
         
         # Second attempt: clean and parse
         cleaned_response = clean_ai_response(response_text)
         if not cleaned_response:
             logger.error(f"[{request_id}] {model_id} response could not be cleaned")
+            _record_parse_outcome(model_id, "failed")
             return None, f"{model_id} response could not be cleaned"
         
         try:
-            parsed_data = json.loads(cleaned_response)
+            parsed_data = json_backend.loads(cleaned_response)
             logger.info(f"[{request_id}] Successfully parsed {model_id} response after cleaning")
+            _record_parse_outcome(model_id, "cleaned")
             return parsed_data, None
-        except json.JSONDecodeError as e:
+        except json_backend.JSONDecodeError as e:
             logger.error(f"[{request_id}] Failed to parse {model_id} response as JSON after cleaning: {str(e)}")
             logger.error(f"[{request_id}] Raw {model_id} response: {response_text[:1000]}...")
             logger.error(f"[{request_id}] Cleaned {model_id} response: {cleaned_response[:1000]}...")
+            _record_parse_outcome(model_id, "failed")
             return None, f"Failed to parse {model_id} response as JSON: {str(e)}"
             
     except Exception as e:
         logger.error(f"[{request_id}] Unexpected error parsing {model_id} response: {str(e)}")
         logger.error(f"[{request_id}] Raw {model_id} response: {response_text[:500]}...")
+        _record_parse_outcome(model_id, "failed")
         return None, f"Unexpected error parsing {model_id} response: {str(e)}"
 
 def format_error_message(error: Exception, model_id: str, request_id: str) -> str:
@@ -117,8 +156,15 @@ def format_error_message(error: Exception, model_id: str, request_id: str) -> st
         Formatted error message
     """
     error_msg = str(error)
-    
-    if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+
+    if isinstance(error, RateLimitExceeded):
+        # Lets the route answer 503 with Retry-After instead of a 500
+        set_retry_after(error.retry_after)
+    if status == 429 or "rate limit" in error_msg.lower() or "resource_exhausted" in error_msg.lower():
+        logger.error(f"[{request_id}] {model_id} rate limit reached: {error_msg}")
+        return f"The {model_id} service is receiving too many requests right now. Please try again in a moment."
+    elif "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
         logger.error(f"[{request_id}] {model_id} call timed out: {error_msg}")
         return f"The {model_id} service is taking longer than expected. Please try again in a moment."
     elif "connection" in error_msg.lower() or "socket" in error_msg.lower():
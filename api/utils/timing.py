@@ -0,0 +1,113 @@
+"""
+Request phase timing
+This module records how long each phase of a request takes (validation, queueing, the IP location lookup,
+LLM calls, parsing, serialization) and reports the breakdown in a Server-Timing response header and in one
+structured log line per request.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Optional
+from flask import Flask, request
+from config import logger
+from utils import json_backend
+from utils.request_context import get_context
+
+class RequestTimer:
+    """
+    Accumulated phase durations of one request
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        # phase name -> [total seconds, count]
+        self.phases: Dict[str, list] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        entry = self.phases.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def server_timing(self, total: float) -> str:
+        """
+        Format the phases as a Server-Timing header value
+        """
+        metrics = [f"{name};dur={seconds * 1000:.1f}" for name, (seconds, _) in self.phases.items()]
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+_timer: ContextVar[Optional[RequestTimer]] = ContextVar('request_timer', default=None)
+
+@contextmanager
+def phase(name: str):
+    """
+    Time a block as a phase of the current request (no-op outside requests)
+    Repeated phases with the same name are summed
+    """
+    timer = _timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        timer.add(name, time.monotonic() - started)
+
+def timed_phase(name: str):
+    """
+    Decorator that times every call of a function as a phase of the current request
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def init_app(app: Flask) -> None:
+    """
+    Time every request of the app and emit the Server-Timing header and timing log line
+    """
+    @app.before_request
+    def _start_timer():
+        _timer.set(RequestTimer())
+
+    @app.after_request
+    def _report_timings(response):
+        timer = _timer.get()
+        if timer is None:
+            return response
+        total = time.monotonic() - timer.started
+        response.headers['Server-Timing'] = timer.server_timing(total)
+
+        if request.endpoint is not None and request.method != 'OPTIONS':
+            context = get_context()
+            record = {
+                "request_id": context.request_id if context else None,
+                "trace_id": context.trace_id if context else None,
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "total_ms": round(total * 1000, 1),
+                "phases": {
+                    name: {"ms": round(seconds * 1000, 1), "count": count}
+                    for name, (seconds, count) in timer.phases.items()
+                }
+            }
+            if context and context.upstream_ids:
+                record["upstream_ids"] = context.upstream_ids
+            if context and context.provider_request_ids:
+                record["provider_request_ids"] = [
+                    {"provider": provider, "id": provider_request_id}
+                    for provider, provider_request_id in context.provider_request_ids
+                ]
+            logger.info(f"request_timing {json_backend.dumps(record)}")
+        return response
+
+    @app.teardown_request
+    def _clear_timer(exc):
+        _timer.set(None)
@@ -0,0 +1,150 @@
+"""
+Output token budgeting
+This module estimates how many output tokens each AI operation needs from its inputs (email length, trip days,
+article count) and calibrates the estimate from the usage reported by previous responses, so providers get a
+max token limit that neither truncates long outputs nor over-reserves for short ones.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+from config import logger
+from utils.prompts import MODEL_CONFIGS, NEWS_ARTICLE_COUNT
+
+# Rough characters-per-token ratio for English text
+CHARS_PER_TOKEN = 4
+
+# Heuristic cost model per operation: tokens = base + per_unit * units
+# email: units = input email tokens, itinerary: units = trip days, news: units = articles (see estimate_units)
+OPERATION_TOKEN_MODELS = {
+    "email": {"base": 350, "per_unit": 1.4, "min_tokens": 600},
+    "itinerary": {"base": 350, "per_unit": 380, "min_tokens": 800},
+    "news": {"base": 100, "per_unit": 130, "min_tokens": 500}
+}
+
+# Headroom applied on top of the estimate
+SAFETY_MARGIN = 1.25
+
+# Observed samples needed before calibrated numbers replace the heuristic
+MIN_CALIBRATION_SAMPLES = 10
+CALIBRATION_WINDOW = 200
+CALIBRATION_PERCENTILE = 0.95
+
+# Fallback ceiling for models without a max_output_tokens entry
+DEFAULT_MAX_OUTPUT_TOKENS = 8192
+
+def estimate_units(operation: str, **inputs: Any) -> float:
+    """
+    Compute the size driver of an operation from its inputs
+
+    Args:
+        operation: One of "email", "itinerary" or "news"
+        inputs: email_content for email, trip_days for itinerary, categories for news
+
+    Returns:
+        Number of units for the operation's token model
+    """
+    if operation == "email":
+        return max(1.0, len(inputs.get("email_content") or "") / CHARS_PER_TOKEN)
+    if operation == "itinerary":
+        return float(max(1, inputs.get("trip_days") or 1))
+    if operation == "news":
+        # The prompt asks for NEWS_ARTICLE_COUNT articles spread across the categories; given more categories
+        # than that, models write at least one article per category
+        return float(max(NEWS_ARTICLE_COUNT, len(inputs.get("categories") or ())))
+    raise ValueError(f"Unknown operation: {operation}")
+
+class TokenBudgetPlanner:
+    """
+    Plans max output tokens per request and learns from observed usage
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (model_id, operation) -> recent observed/estimated output token ratios
+        self._observations: Dict[Tuple[str, str], deque] = {}
+
+    def _heuristic_tokens(self, model_id: str, operation: str, units: float) -> float:
+        """
+        Estimate output tokens from the static per-operation token model
+        """
+        token_model = OPERATION_TOKEN_MODELS[operation]
+        multiplier = MODEL_CONFIGS.get(model_id, {}).get("token_budget_multiplier", 1.0)
+        return (token_model["base"] + token_model["per_unit"] * units) * multiplier
+
+    def _correction_factor(self, model_id: str, operation: str) -> Optional[float]:
+        """
+        Get the calibrated observed/estimated ratio for a model/operation, or None if not enough samples yet
+        """
+        with self._lock:
+            samples = list(self._observations.get((model_id, operation), ()))
+        if len(samples) < MIN_CALIBRATION_SAMPLES:
+            return None
+        samples.sort()
+        index = min(len(samples) - 1, int(math.ceil(CALIBRATION_PERCENTILE * len(samples))) - 1)
+        return samples[index]
+
+    def plan(self, model_id: str, operation: str, **inputs: Any) -> Tuple[int, float]:
+        """
+        Plan the output token limit for a request
+
+        Args:
+            model_id: Model identifier (key in MODEL_CONFIGS, or a discovered local model)
+            operation: One of "email", "itinerary" or "news"
+            inputs: Operation inputs passed to estimate_units()
+
+        Returns:
+            (max_tokens, units) - units should be passed back to record() with the observed usage
+        """
+        units = estimate_units(operation, **inputs)
+        estimate = self._heuristic_tokens(model_id, operation, units)
+
+        correction = self._correction_factor(model_id, operation)
+        if correction is not None:
+            estimate *= correction
+
+        ceiling = MODEL_CONFIGS.get(model_id, {}).get("max_output_tokens", DEFAULT_MAX_OUTPUT_TOKENS)
+        max_tokens = int(min(ceiling, max(OPERATION_TOKEN_MODELS[operation]["min_tokens"], estimate * SAFETY_MARGIN)))
+        return max_tokens, units
+
+    def record(self, model_id: str, operation: str, units: float, output_tokens: Optional[int], truncated: bool = False) -> None:
+        """
+        Record the output tokens a request actually used
+
+        Args:
+            model_id: Model identifier
+            operation: One of "email", "itinerary" or "news"
+            units: Units returned by plan() for the request
+            output_tokens: Output tokens reported by the provider (ignored if None)
+            truncated: Whether the provider stopped because the token limit was reached
+        """
+        if not output_tokens or units <= 0:
+            return
+        # A truncated response needed more than it got; over-weight it so the next plan grows
+        needed = output_tokens * 1.5 if truncated else output_tokens
+        if truncated:
+            logger.warning(f"{model_id} {operation} output truncated at {output_tokens} tokens")
+        with self._lock:
+            window = self._observations.setdefault((model_id, operation), deque(maxlen=CALIBRATION_WINDOW))
+            window.append(needed / self._heuristic_tokens(model_id, operation, units))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the calibration state for monitoring
+
+        Returns:
+            Dictionary keyed by "model_id:operation" with sample counts and the calibrated correction factor
+        """
+        with self._lock:
+            keys = list(self._observations.keys())
+        return {
+            f"{model_id}:{operation}": {
+                "samples": len(self._observations[(model_id, operation)]),
+                "correction_factor": self._correction_factor(model_id, operation)
+            }
+            for model_id, operation in keys
+        }
+
+# Shared planner instance used by all AI services
+token_budget_planner = TokenBudgetPlanner()